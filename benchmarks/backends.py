@@ -0,0 +1,42 @@
+import asyncio
+import os
+import tempfile
+import time
+from petstore.app import TABLES, PetsDatabase
+
+PETS = 10_000
+BATCH = 100
+REPEATS = 50
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in TABLES:
+            database = PetsDatabase.create(
+                backend=backend, path=os.path.join(directory, "petstore.db")
+            ).pets
+
+            started = time.perf_counter()
+            for start in range(0, PETS, BATCH):
+                await database.create_items(
+                    [
+                        {"name": f"Max {i}", "category": "cat"}
+                        for i in range(start, start + BATCH)
+                    ]
+                )
+            create_items = (time.perf_counter() - started) / (PETS // BATCH) * 1e3
+
+            started = time.perf_counter()
+            for page in range(REPEATS):
+                await database.list_items(page=page, size=BATCH)
+            list_items = (time.perf_counter() - started) / REPEATS * 1e3
+            await database.close()
+
+            print(
+                f"{backend:>8}: create_items {create_items:7.2f}ms"
+                f"  list_items {list_items:7.2f}ms  ({BATCH} pets)"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
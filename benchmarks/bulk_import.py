@@ -0,0 +1,43 @@
+import asyncio
+import sys
+from typing import AsyncIterator
+from petstore import types
+from petstore.bulk import import_items
+from petstore.database import Database
+
+PETS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+CHUNK_SIZES = [100, 1_000, 10_000]
+
+
+async def ndjson_lines() -> AsyncIterator[bytes]:
+    for number in range(PETS):
+        yield b'{"name": "Max %d", "category": "cat"}\n' % number
+
+
+async def csv_lines() -> AsyncIterator[bytes]:
+    yield b"name,category\n"
+    for number in range(PETS):
+        yield b"Max %d,cat\n" % number
+
+
+async def main() -> None:
+    print(f"{PETS} pets, rows/s")
+    print(f"{'chunk size':>10} {'ndjson':>10} {'csv':>10}")
+    for chunk_size in CHUNK_SIZES:
+        rates = []
+        for lines in (ndjson_lines, csv_lines):
+            database = Database(types.Pet)
+            report = await import_items(
+                database,
+                lines(),
+                format="csv" if lines is csv_lines else "ndjson",
+                chunk_size=chunk_size,
+            )
+            assert report.imported == PETS
+            rates.append(report.as_dict()["rows_per_second"])
+        print(f"{chunk_size:>10} " + " ".join(f"{rate:>10}" for rate in rates))
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
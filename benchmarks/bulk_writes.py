@@ -0,0 +1,57 @@
+import asyncio
+import strawberry
+import time
+from petstore import types
+from petstore.app import PetsDatabase
+from petstore.database import Database
+from petstore.schema.mutation import Mutation
+from petstore.schema.query import Query
+
+SIZES = [10, 1_000, 100_000]
+
+CREATE_PETS = """
+mutation CreatePets($input: CreatePetsInput!) {
+    createPets(input: $input) { ... on Pets { pets { id } } }
+}
+"""
+
+DELETE_PETS = """
+mutation DeletePets($ids: [ID!]!) {
+    deletePets(ids: $ids) { ... on DeletedPets { pets { id } } }
+}
+"""
+
+
+async def main() -> None:
+    schema = strawberry.Schema(query=Query, mutation=Mutation)
+    print(f"{'pets':>8} {'createPets':>12} {'deletePets':>12} {'per pet':>10}")
+    for size in SIZES:
+        database = Database(types.Pet, indexes=["category"], search=["name"])
+        context = {"database": PetsDatabase(pets=database)}
+        pets = [{"name": f"Max {i}", "category": "cat"} for i in range(size)]
+
+        started = time.perf_counter()
+        result = await schema.execute(
+            CREATE_PETS,
+            variable_values={"input": {"pets": pets}},
+            context_value=context,
+        )
+        created = time.perf_counter() - started
+        assert result.data is not None
+        ids = [pet["id"] for pet in result.data["createPets"]["pets"]]
+
+        started = time.perf_counter()
+        result = await schema.execute(
+            DELETE_PETS, variable_values={"ids": ids}, context_value=context
+        )
+        deleted = time.perf_counter() - started
+        assert result.errors is None
+
+        print(
+            f"{size:>8} {created * 1e3:>10.1f}ms {deleted * 1e3:>10.1f}ms"
+            f" {(created + deleted) / size * 1e6:>8.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
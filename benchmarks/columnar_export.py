@@ -0,0 +1,56 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import AsyncIterator, Callable, List
+from petstore.app import EXPORT_FORMATS, PetsDatabase
+from petstore.database import Database
+
+PETS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+CATEGORIES = ["cat", "dog", "fish", "bird", "hamster"]
+
+
+async def measure(
+    name: str, database: Database, export: Callable[[Database], AsyncIterator[bytes]]
+) -> None:
+    lags: List[float] = []
+
+    async def tick() -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - started - 0.001)
+
+    ticking = asyncio.create_task(tick())
+    path = os.path.join(tempfile.mkdtemp(), f"pets.{name}")
+    started = time.perf_counter()
+    with open(path, "wb") as file:
+        async for chunk in export(database):
+            file.write(chunk)
+    elapsed = time.perf_counter() - started
+    ticking.cancel()
+    print(
+        f"{name:>8} {elapsed:8.2f}s {PETS / elapsed:10.0f} pets/s"
+        f" {os.path.getsize(path) / 1e6:8.1f}MB"
+        f" {max(lags) * 1e3:8.1f}ms max loop lag"
+    )
+    os.remove(path)
+
+
+async def main() -> None:
+    database = PetsDatabase.create(backend="frozen")
+    for start in range(0, PETS, 10_000):
+        await database.pets.create_items(
+            [
+                {"name": f"Max {number}", "category": CATEGORIES[number % 5]}
+                for number in range(start, min(start + 10_000, PETS))
+            ]
+        )
+    print(f"{PETS} pets")
+    for name, (_, export) in EXPORT_FORMATS.items():
+        await measure(name, database.pets, export)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
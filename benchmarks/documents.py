@@ -0,0 +1,50 @@
+import asyncio
+import strawberry
+import time
+from petstore.app import PetsDatabase, create_context
+from petstore.cache import ResponseCache
+from petstore.schema import documents, schema
+from petstore.schema.mutation import Mutation
+from petstore.schema.query import Query
+from petstore.schema.subscription import Subscription
+
+REPEATS = 5_000
+
+GET_PET = """
+query GetPet($id: ID!) {
+    getPet(id: $id) { ... on Pet { id name category } }
+}
+"""
+
+
+async def measure(
+    label: str, schema: strawberry.Schema, database: PetsDatabase, id: str
+) -> None:
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        result = await schema.execute(
+            GET_PET, variable_values={"id": id}, context_value=create_context(database)
+        )
+        assert result.errors is None
+    elapsed = (time.perf_counter() - started) / REPEATS * 1e6
+    print(f"{label:>18}: {elapsed:7.1f}µs per getPet")
+
+
+async def main() -> None:
+    uncached = strawberry.Schema(
+        query=Query, mutation=Mutation, subscription=Subscription
+    )
+    database = PetsDatabase.create()
+    pet = await database.pets.create_item({"name": "Max", "category": "cat"})
+    id = pet["id"]  # type: ignore
+    await measure("without the cache", uncached, database, id)
+    await measure("with the cache", schema, database, id)
+    print(f"document cache: {documents.stats()}")
+
+    cached = PetsDatabase(pets=database.pets, response_cache=ResponseCache())
+    await measure("with responses", schema, cached, id)
+    print(f"response cache: {cached.response_cache.stats()}")  # type: ignore
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
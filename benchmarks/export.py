@@ -0,0 +1,64 @@
+import aiohttp
+import asyncio
+import sys
+import time
+import tracemalloc
+from aiohttp import web
+from typing import Any, Dict, cast
+from petstore.app import PetsDatabase, create_app
+
+PETS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+PAGE_SIZE = 100
+
+
+async def main() -> None:
+    database = PetsDatabase.create(backend="frozen")
+    for start in range(0, PETS, 10_000):
+        await database.pets.create_items(
+            [
+                {"name": f"Max {number}", "category": "cat"}
+                for number in range(start, min(start + 10_000, PETS))
+            ]
+        )
+    runner = web.AppRunner(create_app(database))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    print(f"{PETS} pets")
+
+    started = time.perf_counter()
+    exported = 0
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"http://127.0.0.1:{port}/export") as response:
+            async for chunk in response.content.iter_chunked(1 << 16):
+                exported += chunk.count(b"\n")
+    elapsed = time.perf_counter() - started
+    print(f"  /export        {elapsed:8.2f}s {exported / elapsed:10.0f} pets/s")
+
+    started = time.perf_counter()
+    listed = 0
+    page = 1
+    while True:
+        result = cast(
+            Dict[str, Any], await database.pets.list_items(page=page, size=PAGE_SIZE)
+        )
+        listed += len(result["items"])
+        if page >= result["total_pages"]:
+            break
+        page += 1
+    elapsed = time.perf_counter() - started
+    print(f"  list_items     {elapsed:8.2f}s {listed / elapsed:10.0f} pets/s")
+
+    tracemalloc.start()
+    async for _ in database.pets.export_items():
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  export memory  {peak / 1e6:8.1f}MB peak")
+
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+import asyncio
+import time
+from typing import Optional
+from petstore import types
+from petstore.database import Database
+
+SUBSCRIBERS = (1, 1_000, 10_000, 100_000)
+CATEGORIES = 1_000
+MUTATIONS = 20
+
+
+async def measure(count: int, categories: Optional[int]) -> None:
+    database = Database(types.Pet, indexes=["category"])
+    matching = count if categories is None else count // categories
+    received = 0
+    all_received = asyncio.Event()
+
+    async def subscribe(category: Optional[str]) -> None:
+        nonlocal received
+        async for _ in database.subscribe_to_list(category=category):
+            received += 1
+            if received == matching * MUTATIONS:
+                all_received.set()
+
+    subscribers = [
+        asyncio.create_task(
+            subscribe(None if categories is None else str(i % categories))
+        )
+        for i in range(count)
+    ]
+    await asyncio.sleep(0)
+
+    mutation = 0.0
+    started = time.perf_counter()
+    for i in range(MUTATIONS):
+        mutation_started = time.perf_counter()
+        await database.create_item({"name": f"Max {i}", "category": "0"})
+        mutation += time.perf_counter() - mutation_started
+        await asyncio.sleep(0)
+    await all_received.wait()
+    delivered = time.perf_counter() - started
+
+    for subscriber in subscribers:
+        subscriber.cancel()
+    await asyncio.gather(*subscribers, return_exceptions=True)
+
+    label = "all pets" if categories is None else f"1 of {categories} categories"
+    print(
+        f"{count:>7} subscribers ({label}): createItem"
+        f" {mutation / MUTATIONS * 1e6:7.1f}µs  delivered to {matching} in"
+        f" {delivered / MUTATIONS * 1e3:8.2f}ms per event"
+    )
+
+
+async def main() -> None:
+    for count in SUBSCRIBERS:
+        await measure(count, None)
+    for count in SUBSCRIBERS[1:]:
+        await measure(count, CATEGORIES)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
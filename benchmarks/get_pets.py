@@ -0,0 +1,49 @@
+import asyncio
+import time
+from petstore import types
+from petstore.app import PetsDatabase, create_context
+from petstore.database import Database
+from petstore.schema import schema
+from petstore.tables import DictTable, FrozenTable
+
+PETS = 1_000
+REPEATS = 50
+
+GET_PETS = """
+query GetPets($ids: [ID!]!) {
+    getPets(ids: $ids) { ... on Pets { pets { id name category } } }
+}
+"""
+
+
+async def main() -> None:
+    for table in (DictTable, FrozenTable):
+        database = Database(types.Pet, table=table)
+        pets = await database.create_items(
+            [{"name": f"Max {i}", "category": "cat"} for i in range(PETS)]
+        )
+        ids = [pet["id"] for pet in pets]  # type: ignore
+
+        started = time.perf_counter()
+        for _ in range(REPEATS):
+            await database.get_items(ids)
+        get_items = (time.perf_counter() - started) / REPEATS * 1e3
+
+        started = time.perf_counter()
+        for _ in range(REPEATS):
+            result = await schema.execute(
+                GET_PETS,
+                variable_values={"ids": ids},
+                context_value=create_context(PetsDatabase(pets=database)),
+            )
+            assert result.errors is None
+        get_pets = (time.perf_counter() - started) / REPEATS * 1e3
+
+        print(
+            f"{table.__name__:>12}: get_items {get_items:8.2f}ms"
+            f"  getPets {get_pets:8.2f}ms  ({PETS} ids)"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
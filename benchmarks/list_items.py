@@ -0,0 +1,30 @@
+import asyncio
+import sys
+import time
+from typing import cast
+from petstore import types
+from petstore.database import Database
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+REPEATS = 200
+
+
+async def main() -> None:
+    database = Database(types.Pet)
+    print(f"{'pets':>10} {'first page':>14} {'middle page':>14} {'last page':>14}")
+    for size in SIZES:
+        while cast(int, await database.count_items()) < size:
+            await database.create_item({"name": "Max", "category": "cat"})
+        total_pages = -(-cast(int, await database.count_items()) // 20)
+        timings = []
+        for page in (1, total_pages // 2, total_pages):
+            started = time.perf_counter()
+            for _ in range(REPEATS):
+                await database.list_items(page=page, size=20)
+            timings.append((time.perf_counter() - started) / REPEATS * 1e6)
+        print(f"{size:>10} " + " ".join(f"{timing:>12.1f}us" for timing in timings))
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+import asyncio
+import gc
+import sys
+import tracemalloc
+import uuid
+from petstore import types
+from petstore.database import Database
+from petstore.tables import CompactTable, DictTable, FrozenTable
+
+PETS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+CATEGORIES = ["cat", "dog", "fish", "bird", "hamster"]
+
+
+def make_pet(number: int) -> dict:
+    # Build fresh strings, as decoded request bodies would.
+    return {
+        "name": f"Max {number}",
+        "category": "".join(CATEGORIES[number % len(CATEGORIES)]),
+    }
+
+
+async def measure_database(table: type) -> int:
+    gc.collect()
+    tracemalloc.start()
+    database = Database(types.Pet, table=table)
+    for number in range(PETS):
+        await database.create_item(make_pet(number))
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del database
+    return size
+
+
+def measure_table(table: type) -> int:
+    ids = [str(uuid.uuid4()) for _ in range(PETS)]
+    gc.collect()
+    tracemalloc.start()
+    store = table(types.Pet)
+    for number, id in enumerate(ids):
+        store[id] = {"id": id, **make_pet(number)}
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    return size
+
+
+async def main() -> None:
+    print(f"{PETS} pets, bytes per pet")
+    print(f"{'table':>14} {'table only':>12} {'database':>12}")
+    for table in (DictTable, FrozenTable, CompactTable):
+        table_size = measure_table(table)
+        database_size = await measure_database(table)
+        print(
+            f"{table.__name__:>14} {table_size / PETS:>12.0f}"
+            f" {database_size / PETS:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
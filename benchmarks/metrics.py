@@ -0,0 +1,48 @@
+import asyncio
+import time
+from typing import Any, List
+from petstore import metrics
+from petstore.app import PetsDatabase
+
+CALLS = 200_000
+SUBSCRIPTIONS = 10_000
+
+
+async def resolve() -> Any:
+    return None
+
+
+async def main() -> None:
+    timings = []
+    for resolver in (resolve, metrics.measured(resolve)):
+        started = time.perf_counter()
+        for _ in range(CALLS):
+            await resolver()
+        timings.append((time.perf_counter() - started) / CALLS * 1e6)
+    print(
+        f"resolver call: {timings[0]:.2f}us plain, {timings[1]:.2f}us measured"
+        f" (+{timings[1] - timings[0]:.2f}us)"
+    )
+
+    database = PetsDatabase.create().pets
+    pets = await database.create_items(
+        [{"name": f"Max {i}", "category": "cat"} for i in range(SUBSCRIPTIONS)]
+    )
+    subscriptions: List[Any] = []
+    for pet in pets:  # type: ignore
+        subscription = database.subscribe_to_item_by_id(pet["id"])
+        subscriptions.append(asyncio.ensure_future(anext(subscription)))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    text = await metrics.render(database)
+    elapsed = (time.perf_counter() - started) * 1e3
+    print(
+        f"/metrics with {len(database.subscribers)} subscription keys:"
+        f" {elapsed:.1f}ms, {len(text) / 1e3:.0f}kB"
+    )
+    for receiving in subscriptions:
+        receiving.cancel()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,41 @@
+import asyncio
+import random
+import time
+from typing import cast
+from petstore import types
+from petstore.database import Database
+
+PETS = 1_000_000
+REPEATS = 1_000
+SYLLABLES = ["ma", "x", "re", "bel", "la", "lu", "na", "fi", "do", "ki", "to", "sa"]
+
+
+def make_name(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))).title()
+
+
+async def main() -> None:
+    rng = random.Random(0)
+    database = Database(types.Pet, search=["name"], trigram_search=True)
+    started = time.perf_counter()
+    for _ in range(PETS):
+        await database.create_item({"name": make_name(rng), "category": "cat"})
+    print(f"created {PETS} pets in {time.perf_counter() - started:.1f}s")
+
+    for label, kwargs in [
+        ("prefix 'ma'", {"prefix": "ma"}),
+        ("prefix 'relu'", {"prefix": "relu"}),
+        ("prefix 'bellalu'", {"prefix": "bellalu"}),
+        ("contains 'lun'", {"contains": "lun"}),
+        ("contains 'kitosa'", {"contains": "kitosa"}),
+    ]:
+        repeats = REPEATS if "prefix" in kwargs else REPEATS // 100
+        started = time.perf_counter()
+        for _ in range(repeats):
+            pets = await database.search_items("name", first=10, **kwargs)
+        elapsed = (time.perf_counter() - started) / repeats * 1e3
+        print(f"{label:>20}: {elapsed:8.3f}ms ({len(cast(list, pets))} results)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+import asyncio
+import tempfile
+import time
+from functools import partial
+from petstore import types
+from petstore.database import Database
+from petstore.wal import WalTable
+
+WRITES = 5_000
+RESTART_PETS = 1_000_000
+BATCH = 10_000
+WRITERS = 50
+
+
+async def write_throughput(database: Database) -> float:
+    started = time.perf_counter()
+    for i in range(WRITES):
+        await database.create_item({"name": f"Max {i}", "category": "cat"})
+    elapsed = time.perf_counter() - started
+    await database.close()
+    return WRITES / elapsed
+
+
+async def concurrent_write_throughput(database: Database) -> float:
+    async def writer(start: int) -> None:
+        for i in range(start, WRITES, WRITERS):
+            await database.create_item({"name": f"Max {i}", "category": "cat"})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer(start) for start in range(WRITERS)))
+    elapsed = time.perf_counter() - started
+    await database.close()
+    return WRITES / elapsed
+
+
+async def main() -> None:
+    writes = await write_throughput(Database(types.Pet))
+    print(f"{'no log':>16}: {writes:9.0f} writes/s")
+    for fsync in ("never", "interval", "always"):
+        with tempfile.TemporaryDirectory() as directory:
+            table = partial(WalTable, path=directory, fsync=fsync)
+            writes = await write_throughput(Database(types.Pet, table=table))
+            print(f"{'fsync=' + fsync:>16}: {writes:9.0f} writes/s")
+    with tempfile.TemporaryDirectory() as directory:
+        table = partial(WalTable, path=directory, fsync="always")
+        writes = await concurrent_write_throughput(Database(types.Pet, table=table))
+        print(f"{f'{WRITERS} writers':>16}: {writes:9.0f} writes/s (fsync=always)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(types.Pet, table=partial(WalTable, path=directory))
+        for start in range(0, RESTART_PETS, BATCH):
+            await database.create_items(
+                [{"name": f"Max {i}", "category": "cat"} for i in range(BATCH)]
+            )
+        await database.close()
+
+        for label, snapshot in (("log only", False), ("snapshot", True)):
+            if snapshot:
+                WalTable(types.Pet, path=directory).snapshot()
+            started = time.perf_counter()
+            wal_table = WalTable(types.Pet, path=directory)
+            table_load = time.perf_counter() - started
+            database = Database(types.Pet, table=lambda cls: wal_table)
+            restart = time.perf_counter() - started
+            await database.close()
+            print(
+                f"{label:>16}: restart {restart:6.2f}s (table {table_load:5.2f}s)"
+                f"  at {RESTART_PETS:,} pets"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
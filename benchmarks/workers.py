@@ -0,0 +1,90 @@
+import aiohttp
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+DURATION = 5.0
+CONNECTIONS = 16
+CLIENTS = max((os.cpu_count() or 1) // 2, 1)
+QUERY = "{ listPets(input: {size: 10}) { ... on PetPage { items { id name } } } }"
+
+
+async def load(url: str) -> int:
+    requests = 0
+    deadline = time.perf_counter() + DURATION
+
+    async def connection() -> None:
+        nonlocal requests
+        async with aiohttp.ClientSession() as session:
+            while time.perf_counter() < deadline:
+                async with session.post(url, json={"query": QUERY}) as response:
+                    await response.read()
+                requests += 1
+
+    await asyncio.gather(*(connection() for _ in range(CONNECTIONS)))
+    return requests
+
+
+def run_client(url: str) -> int:
+    return asyncio.run(load(url))
+
+
+def measure(workers: int) -> None:
+    with socket.socket() as free_socket:
+        free_socket.bind(("127.0.0.1", 0))
+        port = free_socket.getsockname()[1]
+    url = f"http://127.0.0.1:{port}/graphql"
+    launcher = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "petstore.launcher",
+            f"--port={port}",
+            f"--workers={workers}",
+            f"--socket={os.path.join(tempfile.mkdtemp(), 'store.sock')}",
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(200):
+            try:
+                urllib.request.urlopen(url, timeout=1)
+                break
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.05)
+        for i in range(100):
+            request = urllib.request.Request(
+                url,
+                data=(
+                    '{"query": "mutation { createPet(input:'
+                    f' {{name: \\"Max {i}\\", category: \\"cat\\"}}) {{ __typename }} }}"}}'
+                ).encode(),
+                headers={"Content-Type": "application/json"},
+            )
+            urllib.request.urlopen(request).read()
+
+        with multiprocessing.Pool(CLIENTS) as pool:
+            requests = sum(pool.map(run_client, [url] * CLIENTS))
+        print(f"{workers:>3} workers: {requests / DURATION:8.0f} req/s")
+    finally:
+        launcher.terminate()
+        launcher.wait()
+
+
+def main() -> None:
+    print(f"{os.cpu_count()} cores, {CLIENTS} client processes")
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        measure(workers)
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,268 @@
-import strawberry
+import dataclasses
+import json
+import os
 from aiohttp import web
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from graphql import GraphQLError
+from functools import partial
 from strawberry.aiohttp.views import GraphQLView
+from strawberry.dataloader import DataLoader
+from strawberry.http.base import BaseRequestProtocol
+from strawberry.types import ExecutionResult
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
-from petstore import types
+from petstore import errors, metrics, types
+from petstore.bulk import ImportFailed, import_items
+from petstore.cache import ResponseCache, item_tag
+from petstore.columnar import export_arrow
 from petstore.database import Database
+from petstore.documents import PersistedQueries, PersistedQueryNotFound
+from petstore.events import EventBus, LocalBus, SocketBus
+from petstore.remote import RemoteDatabase
+from petstore.tables import CompactTable, DictTable, FrozenTable, SqliteTable, Table
+from petstore.wal import WalTable
 
-from petstore.schema.query import Query
-from petstore.schema.mutation import Mutation
-from petstore.schema.subscription import Subscription
+from petstore.schema import documents, schema
+
+
+TABLES: Dict[str, Callable[..., Table]] = {
+    "memory": DictTable,
+    "frozen": FrozenTable,
+    "compact": CompactTable,
+    "sqlite": SqliteTable,
+    "wal": WalTable,
+}
 
 
 @dataclass
 class PetsDatabase:
     pets: Database
+    bus: EventBus = field(default_factory=LocalBus)
+    response_cache: Optional[ResponseCache] = None
 
+    def __post_init__(self) -> None:
+        if self.response_cache is not None:
+            self.pets.bus.connect(self.response_cache.invalidate)
 
-class GraphQLViewWithContext(GraphQLView):
-    def __init__(self, database: PetsDatabase):
-        super().__init__(
-            schema=strawberry.Schema(
-                query=Query,
-                mutation=Mutation,
-                subscription=Subscription,
+    @classmethod
+    def create(
+        cls,
+        backend: str = "memory",
+        path: str = "petstore.db",
+        bus: Optional[EventBus] = None,
+        store: Optional[str] = None,
+        response_cache: Optional[ResponseCache] = None,
+    ) -> "PetsDatabase":
+        bus = LocalBus() if bus is None else bus
+        options: Dict[str, Any] = {
+            "indexes": ["category"],
+            "search": ["name"],
+            "bus": bus,
+        }
+        if store is not None:
+            return cls(
+                pets=RemoteDatabase(types.Pet, store, **options),
+                bus=bus,
+                response_cache=response_cache,
             )
+        table = TABLES[backend]
+        if backend in ("sqlite", "wal"):
+            table = partial(table, path=path)
+        return cls(
+            pets=Database(types.Pet, table=table, trigram_search=True, **options),
+            bus=bus,
+            response_cache=response_cache,
+        )
+
+    async def start(self) -> None:
+        await self.bus.start()
+
+    async def close(self) -> None:
+        await self.bus.close()
+        await self.pets.close()
+
+
+async def _load_pets(
+    database: PetsDatabase, cache_tags: Set[str], ids: List[str]
+) -> List[Optional[Dict[str, Any]]]:
+    pets = await database.pets.find_items(ids)
+    cache_tags.update(item_tag(types.Pet.__name__, id) for id in ids)
+    return pets
+
+
+async def _start_database(database: PetsDatabase, *_: Any) -> None:
+    await database.start()
+
+
+async def _close_database(database: PetsDatabase, *_: Any) -> None:
+    await database.close()
+
+
+async def _export_ndjson(database: Database) -> AsyncIterator[bytes]:
+    async for pets in database.export_items():
+        yield "".join(f"{json.dumps(dict(pet))}\n" for pet in pets).encode()
+
+
+def _export_arrow(database: Database) -> AsyncIterator[bytes]:
+    fields = [field.name for field in dataclasses.fields(types.Pet)]
+    return export_arrow(database, fields, dictionary=["category"])
+
+
+EXPORT_FORMATS: Dict[str, Tuple[str, Callable[[Database], AsyncIterator[bytes]]]] = {
+    "ndjson": ("application/x-ndjson", _export_ndjson),
+    "arrow": ("application/vnd.apache.arrow.file", _export_arrow),
+}
+
+
+async def _export_pets(
+    database: PetsDatabase, request: web.Request
+) -> web.StreamResponse:
+    format = request.query.get("format", "ndjson")
+    if format not in EXPORT_FORMATS:
+        raise web.HTTPBadRequest(text=f"Unknown export format {format!r}")
+    content_type, export = EXPORT_FORMATS[format]
+    # Written a chunk at a time from a snapshot of the store, waiting for the
+    # client to drain each chunk before reading the next.
+    response = web.StreamResponse(headers={"Content-Type": content_type})
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+    async for chunk in export(database.pets):
+        await response.write(chunk)
+    await response.write_eof()
+    return response
+
+
+async def _import_pets(database: PetsDatabase, request: web.Request) -> web.Response:
+    format = request.query.get(
+        "format", "csv" if request.content_type == "text/csv" else "ndjson"
+    )
+    try:
+        chunk_size = int(request.query.get("chunk_size", 1000))
+        report = await import_items(
+            database.pets,
+            request.content.iter_any(),
+            format=format,
+            chunk_size=chunk_size,
         )
+    except (ValueError, errors.BadRequestError) as error:
+        raise web.HTTPBadRequest(text=str(error))
+    except ImportFailed as failure:
+        return web.json_response(failure.report.as_dict(), status=failure.status_code)
+    return web.json_response(report.as_dict())
+
+
+async def _metrics(
+    database: PetsDatabase, caches: Dict[str, Any], request: web.Request
+) -> web.Response:
+    return web.Response(
+        body=(await metrics.render(database.pets, caches)).encode(),
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+    )
+
+
+def create_context(database: PetsDatabase) -> Dict[str, Any]:
+    # Pet lookups in one request are batched into a single store read and
+    # remembered for the rest of the request.
+    cache_tags: Set[str] = set()
+    return {
+        "database": database,
+        "pets": DataLoader(load_fn=partial(_load_pets, database, cache_tags)),
+        "response_cache": database.response_cache,
+        "cache_tags": cache_tags,
+    }
+
+
+class GraphQLViewWithContext(GraphQLView):
+    def __init__(
+        self,
+        database: PetsDatabase,
+        persisted_queries: Optional[PersistedQueries] = None,
+    ):
+        super().__init__(schema=schema)
         self._database = database
+        self.persisted_queries = (
+            PersistedQueries(maxsize=10_000)
+            if persisted_queries is None
+            else persisted_queries
+        )
 
     async def get_context(self, *args, **kwargs):
-        return {"database": self._database}
+        return create_context(self._database)
 
+    def should_render_graphiql(self, request: BaseRequestProtocol) -> bool:
+        # A GET for a persisted query has no query text but is not a browser.
+        return (
+            "extensions" not in request.query_params
+            and super().should_render_graphiql(request)
+        )
+
+    def parse_json(self, data: Union[str, bytes]) -> Dict[str, Any]:
+        return self.persisted_queries.resolve(super().parse_json(data))
+
+    def parse_query_params(
+        self, params: Mapping[str, Optional[Union[str, List[str]]]]
+    ) -> Dict[str, Any]:
+        return self.persisted_queries.resolve(super().parse_query_params(params))
+
+    async def execute_operation(
+        self, request: web.Request, context: Dict[str, Any], root_value: Any
+    ) -> ExecutionResult:
+        try:
+            return await super().execute_operation(request, context, root_value)
+        except PersistedQueryNotFound:
+            error = GraphQLError(
+                "PersistedQueryNotFound",
+                extensions={"code": "PERSISTED_QUERY_NOT_FOUND"},
+            )
+            return ExecutionResult(data=None, errors=[error])
 
-def create_app(
-    database: PetsDatabase = PetsDatabase(pets=Database(types.Pet)),
-) -> web.Application:
+
+def create_app(database: Optional[PetsDatabase] = None) -> web.Application:
     app = web.Application()
 
-    app.router.add_route(
-        "*",
-        "/graphql",
-        handler=GraphQLViewWithContext(database=database),
-    )
+    if database is None:
+        hub = os.environ.get("PETSTORE_EVENT_HUB")
+        ttl = os.environ.get("PETSTORE_RESPONSE_CACHE_TTL")
+        backend = os.environ.get("PETSTORE_BACKEND", "memory")
+        store = os.environ.get("PETSTORE_STORE")
+        # Workers on an event hub each keep their own indexes over one shared
+        # table. Behind a store process the store already sends every event.
+        if hub is not None and store is not None:
+            raise ValueError("PETSTORE_EVENT_HUB cannot be used with PETSTORE_STORE")
+        if hub is not None and backend != "sqlite":
+            raise ValueError("PETSTORE_EVENT_HUB needs the shared sqlite backend")
+        database = PetsDatabase.create(
+            backend=backend,
+            path=os.environ.get("PETSTORE_DATABASE", "petstore.db"),
+            bus=None if hub is None else SocketBus(hub),
+            store=store,
+            response_cache=None if ttl is None else ResponseCache(ttl=float(ttl)),
+        )
+        app.on_cleanup.append(partial(_close_database, database))
+    app.on_startup.append(partial(_start_database, database))
+
+    view = GraphQLViewWithContext(database=database)
+    caches: Dict[str, Any] = {
+        "documents": documents,
+        "persisted_queries": view.persisted_queries,
+    }
+    if database.response_cache is not None:
+        caches["responses"] = database.response_cache
+
+    app.router.add_route("*", "/graphql", handler=view)
+    app.router.add_get("/export", partial(_export_pets, database))
+    app.router.add_post("/import", partial(_import_pets, database))
+    app.router.add_get("/metrics", partial(_metrics, database, caches))
 
     return app
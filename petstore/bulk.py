@@ -0,0 +1,180 @@
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    get_type_hints,
+)
+
+from petstore import errors
+from petstore.database import Database
+from petstore.inputs import CreatePetInput
+
+FORMATS = ("ndjson", "csv")
+FIELDS = get_type_hints(CreatePetInput)
+MAX_ERRORS = 100
+MAX_LINE_BYTES = 1 << 16
+
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    rejected: int = 0
+    errors: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    started: float = field(default_factory=time.perf_counter)
+
+    def reject(self, line: int, reason: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"line {line}: {reason}")
+
+    def as_dict(self) -> Dict[str, Any]:
+        seconds = time.perf_counter() - self.started
+        return {
+            "imported": self.imported,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "error": self.error,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(self.imported / seconds) if seconds else 0,
+        }
+
+
+class ImportFailed(Exception):
+    # Raised when a chunk cannot be committed. The chunks before it stay
+    # imported, and the report says how far the import got.
+    def __init__(self, report: ImportReport, status_code: int) -> None:
+        super().__init__(report.error)
+        self.report = report
+        self.status_code = status_code
+
+
+def _check_row(row: Any) -> Optional[str]:
+    if not isinstance(row, dict):
+        return "expected an object"
+    for name in row:
+        if name not in FIELDS:
+            return f"unknown field {name!r}"
+    for name, type in FIELDS.items():
+        if not isinstance(row.get(name), type):
+            return f"{name!r} must be a {type.__name__}"
+    return None
+
+
+async def _split_lines(
+    chunks: AsyncIterable[bytes], max_line_bytes: int
+) -> AsyncIterator[Optional[bytes]]:
+    # A line longer than max_line_bytes comes out as None, and no more than
+    # max_line_bytes of it is ever held in memory.
+    partial = bytearray()
+    too_long = False
+    async for chunk in chunks:
+        start = 0
+        while start < len(chunk):
+            end = chunk.find(b"\n", start)
+            stop = len(chunk) if end < 0 else end + 1
+            if end >= 0 and not partial and not too_long:
+                line = chunk[start:stop]
+                yield None if len(line) > max_line_bytes else line
+                start = stop
+                continue
+            if not too_long:
+                partial += chunk[start:stop]
+                too_long = len(partial) > max_line_bytes
+                if too_long:
+                    partial.clear()
+            if end < 0:
+                break
+            yield None if too_long else bytes(partial)
+            partial.clear()
+            too_long = False
+            start = stop
+    if partial or too_long:
+        yield None if too_long else bytes(partial)
+
+
+async def _parse_rows(
+    chunks: AsyncIterable[bytes], format: str, max_line_bytes: int
+) -> AsyncIterator[Tuple[int, Any]]:
+    # One record per line in either format, so a bad line only costs itself.
+    header: Optional[List[str]] = None
+    number = 0
+    async for raw_line in _split_lines(chunks, max_line_bytes):
+        number += 1
+        if raw_line is None:
+            yield number, f"line is longer than {max_line_bytes} bytes"
+            continue
+        try:
+            line = raw_line.decode()
+            if not line.strip():
+                continue
+            if format == "ndjson":
+                yield number, json.loads(line)
+                continue
+            values = next(csv.reader([line]))
+        except ValueError as error:
+            yield number, f"unreadable line: {error}"
+            continue
+        if header is None:
+            header = values
+        elif len(values) != len(header):
+            yield number, f"expected {len(header)} columns"
+        else:
+            yield number, dict(zip(header, values))
+
+
+async def import_items(
+    database: Database,
+    chunks: AsyncIterable[bytes],
+    format: str = "ndjson",
+    chunk_size: int = 1000,
+    progress: Optional[Callable[[ImportReport], None]] = None,
+    max_line_bytes: int = MAX_LINE_BYTES,
+) -> ImportReport:
+    if format not in FORMATS or chunk_size < 1:
+        raise errors.BadRequestError()
+    report = ImportReport()
+    chunk: List[Dict[str, Any]] = []
+    first_line = 0
+
+    async def commit() -> None:
+        failure: Optional[Exception]
+        try:
+            result = await database.create_items(chunk)
+            failure = result if isinstance(result, errors.ApiError) else None
+        except Exception as error:
+            failure = error
+        if failure is not None:
+            reason = str(failure) or type(failure).__name__
+            report.error = f"import stopped at line {first_line}: {reason}"
+            status_code = (
+                failure.status_code if isinstance(failure, errors.ApiError) else 500
+            )
+            raise ImportFailed(report, status_code) from failure
+        report.imported += len(chunk)
+        chunk.clear()
+        if progress is not None:
+            progress(report)
+
+    async for number, row in _parse_rows(chunks, format, max_line_bytes):
+        reason = row if isinstance(row, str) else _check_row(row)
+        if reason is not None:
+            report.reject(number, reason)
+            continue
+        if not chunk:
+            first_line = number
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            await commit()
+    if chunk:
+        await commit()
+    return report
@@ -0,0 +1,116 @@
+import json
+import time
+from petstore.documents import LruCache, query_hash
+from petstore.events import Emission
+from strawberry.extensions import SchemaExtension
+from strawberry.types import ExecutionContext
+from strawberry.types.graphql import OperationType
+from graphql import ExecutionResult
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+# When the response expires, the response and the tags that invalidate it.
+CachedResponse = Tuple[float, ExecutionResult, Set[str]]
+
+# Tagged onto responses that must not be cached, such as unexpected errors.
+UNCACHEABLE = "uncacheable"
+
+
+def item_tag(name: str, id: str) -> str:
+    return f"item/{name}/{id}"
+
+
+def collection_tag(name: str) -> str:
+    return f"list/{name}"
+
+
+class ResponseCache(LruCache[CachedResponse]):
+    def __init__(self, maxsize: int = 1000, ttl: Optional[float] = 60.0) -> None:
+        super().__init__(maxsize)
+        self.ttl = ttl
+        self.invalidations = 0
+        self._tagged: Dict[str, Set[str]] = {}
+
+    def get_response(self, key: str) -> Optional[ExecutionResult]:
+        cached = self._entries.get(key)
+        if cached is not None and cached[0] <= time.monotonic():
+            self._discard(key)
+        cached = self.get(key)
+        return None if cached is None else cached[1]
+
+    def put_response(self, key: str, result: ExecutionResult, tags: Set[str]) -> None:
+        expires = float("inf") if self.ttl is None else time.monotonic() + self.ttl
+        self._discard(key)
+        self.put(key, (expires, result, tags))
+        for tag in tags:
+            self._tagged.setdefault(tag, set()).add(key)
+
+    def invalidate(self, emission: Emission) -> None:
+        name, _, items, _, _ = emission
+        self.invalidations += 1
+        for tag in [
+            collection_tag(name),
+            *(item_tag(name, item["id"]) for item in items),
+        ]:
+            for key in self._tagged.pop(tag, ()):
+                self._discard(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            **super().stats(),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+    def _discard(self, key: str) -> None:
+        cached = self._entries.pop(key, None)
+        if cached is not None:
+            self._evicted(key, cached)
+
+    def _evicted(self, key: str, value: CachedResponse) -> None:
+        for tag in value[2]:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+
+def response_key(execution_context: ExecutionContext) -> str:
+    return ":".join(
+        [
+            query_hash(execution_context.query or ""),
+            execution_context.operation_name or "",
+            json.dumps(execution_context.variables, sort_keys=True, default=str),
+        ]
+    )
+
+
+class ResponseCaching(SchemaExtension):
+    # Read queries are answered from the context's response cache when it has
+    # one; resolvers tag the context with the pets and lists they read.
+    def on_execute(self) -> Iterator[None]:
+        execution_context = self.execution_context
+        context = execution_context.context
+        cache = context.get("response_cache") if isinstance(context, dict) else None
+        if cache is None or execution_context.operation_type != OperationType.QUERY:
+            yield
+            return
+        key = response_key(execution_context)
+        cached = cache.get_response(key)
+        if cached is not None:
+            execution_context.result = cached
+            yield
+            return
+        invalidations = cache.invalidations
+        yield
+        result = execution_context.result
+        # A response read while a write was published may already be stale.
+        if (
+            result is not None
+            and not result.errors
+            and context["cache_tags"]
+            and UNCACHEABLE not in context["cache_tags"]
+            and cache.invalidations == invalidations
+        ):
+            cache.put_response(key, result, set(context["cache_tags"]))
@@ -0,0 +1,330 @@
+import asyncio
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from petstore.database import Database
+
+# Apache Arrow IPC file format, written without pyarrow: flatbuffer metadata
+# messages followed by 8-byte aligned column buffers that readers can map
+# without copying.
+MAGIC = b"ARROW1"
+CONTINUATION = b"\xff\xff\xff\xff"
+METADATA_V5 = 4
+SCHEMA, DICTIONARY_BATCH, RECORD_BATCH = 1, 2, 3
+UTF8 = 5
+
+Block = Tuple[int, int, int]
+
+
+class _Table:
+    def __init__(self, *slots: Optional[Tuple[str, Any]]) -> None:
+        self.slots = slots
+
+
+class _Vector:
+    def __init__(self, items: Sequence[Any], struct_format: str = "") -> None:
+        self.items = items
+        self.struct_format = struct_format
+
+
+SCALARS = {"bool": "<?", "ubyte": "<B", "short": "<h", "int": "<i", "long": "<q"}
+
+
+def _align(buffer: bytearray, alignment: int) -> None:
+    buffer.extend(bytes(-len(buffer) % alignment))
+
+
+def _flatbuffer(root: _Table) -> bytes:
+    # Objects are laid out front to back, every child after the field that
+    # points to it, so each offset is a forward uoffset as flatbuffers expects.
+    buffer = bytearray(4)
+    struct.pack_into("<I", buffer, 0, _write(buffer, root))
+    _align(buffer, 8)
+    return bytes(buffer)
+
+
+def _write(buffer: bytearray, value: Any) -> int:
+    if isinstance(value, str):
+        _align(buffer, 4)
+        position = len(buffer)
+        encoded = value.encode()
+        buffer.extend(struct.pack("<I", len(encoded)) + encoded + b"\0")
+        return position
+    if isinstance(value, _Vector):
+        return _write_vector(buffer, value)
+    return _write_table(buffer, value)
+
+
+def _write_vector(buffer: bytearray, vector: _Vector) -> int:
+    if vector.struct_format:
+        # The length prefix sits right before the 8-byte aligned structs.
+        _align(buffer, 8)
+        buffer.extend(bytes(4))
+        position = len(buffer)
+        buffer.extend(struct.pack("<I", len(vector.items)))
+        for item in vector.items:
+            buffer.extend(struct.pack(vector.struct_format, *item))
+        return position
+    _align(buffer, 4)
+    position = len(buffer)
+    buffer.extend(struct.pack("<I", len(vector.items)))
+    pointers = []
+    for _ in vector.items:
+        pointers.append(len(buffer))
+        buffer.extend(bytes(4))
+    for pointer, item in zip(pointers, vector.items):
+        struct.pack_into("<I", buffer, pointer, _write(buffer, item) - pointer)
+    return position
+
+
+def _write_table(buffer: bytearray, table: _Table) -> int:
+    layout: List[Tuple[int, int, str, Any]] = []
+    size = 4
+    for slot, field in enumerate(table.slots):
+        if field is None:
+            continue
+        kind, value = field
+        width = struct.calcsize(SCALARS[kind]) if kind in SCALARS else 4
+        size += -size % width
+        layout.append((slot, size, kind, value))
+        size += width
+    vtable = [0] * len(table.slots)
+    for slot, offset, _, _ in layout:
+        vtable[slot] = offset
+
+    _align(buffer, 2)
+    vtable_position = len(buffer)
+    buffer.extend(struct.pack(f"<HH{len(vtable)}H", 4 + 2 * len(vtable), size, *vtable))
+    _align(buffer, 8)
+    position = len(buffer)
+    buffer.extend(bytes(size))
+    struct.pack_into("<i", buffer, position, position - vtable_position)
+    children = []
+    for _, offset, kind, value in layout:
+        if kind in SCALARS:
+            struct.pack_into(SCALARS[kind], buffer, position + offset, value)
+        else:
+            children.append((position + offset, value))
+    for pointer, value in children:
+        struct.pack_into("<I", buffer, pointer, _write(buffer, value) - pointer)
+    return position
+
+
+def _int32(values: Sequence[int]) -> bytes:
+    column = array("i", values)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column.tobytes()
+
+
+def _validity(values: Sequence[Any]) -> Tuple[bytes, int]:
+    null_count = sum(value is None for value in values)
+    if not null_count:
+        return b"", 0
+    bits = bytearray((len(values) + 7) // 8)
+    for index, value in enumerate(values):
+        if value is not None:
+            bits[index >> 3] |= 1 << (index & 7)
+    return bytes(bits), null_count
+
+
+def _utf8(values: Sequence[Optional[str]]) -> List[bytes]:
+    encoded = [b"" if value is None else value.encode() for value in values]
+    return [
+        _int32(list(accumulate(map(len, encoded), initial=0))),
+        b"".join(encoded),
+    ]
+
+
+def _field(name: str, dictionary_id: Optional[int]) -> _Table:
+    dictionary = (
+        None
+        if dictionary_id is None
+        else (
+            "offset",
+            _Table(
+                ("long", dictionary_id),
+                ("offset", _Table(("int", 32), ("bool", True))),
+            ),
+        )
+    )
+    return _Table(
+        ("offset", name),
+        ("bool", True),
+        ("ubyte", UTF8),
+        ("offset", _Table()),
+        dictionary,
+        ("offset", _Vector([])),
+    )
+
+
+class ArrowFileWriter:
+    # Every field is a nullable string; the dictionary fields are written as
+    # int32 codes into one dictionary, which goes out with the footer so the
+    # record batches can be streamed before all the values are known.
+    def __init__(self, fields: Sequence[str], dictionary: Sequence[str] = ()) -> None:
+        self.fields = list(fields)
+        self.dictionary_ids = {
+            field: id for id, field in enumerate(self.fields) if field in dictionary
+        }
+        self.dictionaries: Dict[str, Dict[str, int]] = {
+            field: {} for field in self.dictionary_ids
+        }
+        self.position = 0
+        self.batches: List[Block] = []
+
+    def start(self) -> bytes:
+        header = MAGIC + bytes(2)
+        self.position = len(header)
+        return header + self._message(SCHEMA, self._schema(), [])[0]
+
+    def write_batch(self, items: Sequence[Mapping[str, Any]]) -> bytes:
+        nodes: List[Tuple[int, int]] = []
+        buffers: List[bytes] = []
+        for field in self.fields:
+            values = [_string(item.get(field)) for item in items]
+            validity, null_count = _validity(values)
+            nodes.append((len(values), null_count))
+            buffers.append(validity)
+            if field in self.dictionaries:
+                codes = self.dictionaries[field]
+                buffers.append(
+                    _int32(
+                        [
+                            0 if value is None else codes.setdefault(value, len(codes))
+                            for value in values
+                        ]
+                    )
+                )
+            else:
+                buffers.extend(_utf8(values))
+        message, block = self._message(
+            RECORD_BATCH, self._record_batch(len(items), nodes, buffers), buffers
+        )
+        self.batches.append(block)
+        return message
+
+    def finish(self) -> bytes:
+        messages: List[bytes] = []
+        dictionary_blocks: List[Block] = []
+        for field, codes in self.dictionaries.items():
+            values = list(codes)
+            buffers = [b"", *_utf8(values)]
+            message, block = self._message(
+                DICTIONARY_BATCH,
+                _Table(
+                    ("long", self.dictionary_ids[field]),
+                    (
+                        "offset",
+                        self._record_batch(len(values), [(len(values), 0)], buffers),
+                    ),
+                    ("bool", False),
+                ),
+                buffers,
+            )
+            messages.append(message)
+            dictionary_blocks.append(block)
+        footer = _flatbuffer(
+            _Table(
+                ("short", METADATA_V5),
+                ("offset", self._schema()),
+                ("offset", _Vector(dictionary_blocks, "<qi4xq")),
+                ("offset", _Vector(self.batches, "<qi4xq")),
+            )
+        )
+        messages.append(CONTINUATION + bytes(4))
+        messages.append(footer + struct.pack("<i", len(footer)) + MAGIC)
+        return b"".join(messages)
+
+    def _schema(self) -> _Table:
+        return _Table(
+            ("short", 0),
+            (
+                "offset",
+                _Vector(
+                    [
+                        _field(field, self.dictionary_ids.get(field))
+                        for field in self.fields
+                    ]
+                ),
+            ),
+        )
+
+    def _record_batch(
+        self, length: int, nodes: List[Tuple[int, int]], buffers: List[bytes]
+    ) -> _Table:
+        offsets = list(
+            accumulate((_padded(len(buffer)) for buffer in buffers), initial=0)
+        )
+        return _Table(
+            ("long", length),
+            ("offset", _Vector(nodes, "<qq")),
+            (
+                "offset",
+                _Vector(
+                    [(offset, len(buffer)) for offset, buffer in zip(offsets, buffers)],
+                    "<qq",
+                ),
+            ),
+        )
+
+    def _message(
+        self, header_type: int, header: _Table, buffers: List[bytes]
+    ) -> Tuple[bytes, Block]:
+        body = b"".join(
+            buffer + bytes(_padded(len(buffer)) - len(buffer)) for buffer in buffers
+        )
+        metadata = _flatbuffer(
+            _Table(
+                ("short", METADATA_V5),
+                ("ubyte", header_type),
+                ("offset", header),
+                ("long", len(body)),
+            )
+        )
+        message = CONTINUATION + struct.pack("<i", len(metadata)) + metadata + body
+        block = (self.position, 8 + len(metadata), len(body))
+        self.position += len(message)
+        return message, block
+
+
+def _padded(size: int) -> int:
+    return size + -size % 8
+
+
+def _string(value: Any) -> Optional[str]:
+    return value if value is None or isinstance(value, str) else str(value)
+
+
+async def export_arrow(
+    database: Database,
+    fields: Sequence[str],
+    dictionary: Sequence[str] = (),
+    row_group_size: int = 65_536,
+    read_size: int = 4096,
+) -> AsyncIterator[bytes]:
+    # The snapshot is read on the event loop in small chunks, so other
+    # requests keep running, and whole row groups are encoded on a thread.
+    writer = ArrowFileWriter(fields, dictionary)
+    yield writer.start()
+    rows: List[Mapping[str, Any]] = []
+    async for items in database.export_items(read_size):
+        rows.extend(items)
+        while len(rows) >= row_group_size:
+            row_group, rows = rows[:row_group_size], rows[row_group_size:]
+            yield await asyncio.to_thread(writer.write_batch, row_group)
+    if rows:
+        yield await asyncio.to_thread(writer.write_batch, rows)
+    yield writer.finish()
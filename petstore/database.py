@@ -1,40 +1,112 @@
 import asyncio
+import base64
+import binascii
 import uuid
 from petstore import errors
+from petstore.events import Emission, EventBus, LocalBus
+from petstore.indexes import OrderedIndex, PrefixIndex, TrigramIndex
+from petstore.subscribers import Channel, Entry, Overflow, Subscriber
+from petstore.tables import DictTable, Table
+from collections import deque
 from copy import deepcopy
-from typing import Any, Dict, List, cast, AsyncGenerator
+from itertools import islice, repeat
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    cast,
+    AsyncGenerator,
+)
+
+Change = Tuple[str, Optional[Mapping[str, Any]], Optional[Mapping[str, Any]]]
 
 
 class Database:
-    def __init__(self, cls: type) -> None:
+    def __init__(
+        self,
+        cls: type,
+        table: Callable[[type], Table] = DictTable,
+        indexes: Sequence[str] = (),
+        search: Sequence[str] = (),
+        trigram_search: bool = False,
+        queue_size: int = 1000,
+        overflow: Overflow = "drop_oldest",
+        bus: Optional[EventBus] = None,
+        replay_size: int = 10_000,
+    ) -> None:
         self.cls = cls
-        self.store: Dict[str, Any] = {}
-        self.subscribers: Dict[str, Any] = {}
+        self.store: Dict[str, Any] = {cls.__name__: table(cls)}
+        self.subscribers: Dict[str, Channel] = {}
+        self.queue_size = queue_size
+        self.overflow = overflow
+        # Events are numbered where the change is made and the numbers travel
+        # with the emission, so every process delivering it hands out the
+        # same cursors. A new epoch starts whenever the numbering does.
+        self.event_epoch = uuid.uuid4().hex
+        self.event_seq = 0
+        # Recent events with the item list subscriptions were routed on, so
+        # subscribers that reconnect can catch up on what they missed.
+        self.replay: Deque[Tuple[Dict[str, Any], Optional[Mapping[str, Any]]]] = deque(
+            maxlen=replay_size
+        )
+        # Versions of items as of each running export's snapshot, kept when a
+        # write replaces them before the export has read them.
+        self.exports: List[Dict[str, Mapping[str, Any]]] = []
+        self.bus = LocalBus() if bus is None else bus
+        self.bus.connect(self._deliver)
+        self.dropped_events = 0
+        self.disconnected_subscribers = 0
+        self.delivered_events: Dict[str, int] = {}
+        self.order: Dict[str, OrderedIndex] = {cls.__name__: OrderedIndex()}
+        self.write_locks: Dict[str, asyncio.Lock] = {cls.__name__: asyncio.Lock()}
+        self.indexes: Dict[str, Dict[Any, OrderedIndex]] = {
+            field: {} for field in indexes
+        }
+        self.prefix_indexes = {field: PrefixIndex() for field in search}
+        # Live list subscriptions, and how many of them filter on a prefix of
+        # each length, so events are only routed on keys someone listens to.
+        self.list_subscribers = 0
+        self.prefix_lengths: Dict[str, Dict[int, int]] = {field: {} for field in search}
+        self.trigram_indexes = {
+            field: TrigramIndex() for field in (search if trigram_search else ())
+        }
+        self._hydrate()
 
     async def get_item(self, id: str) -> Dict[str, Any] | errors.NotFoundError:
-        try:
-            return deepcopy(self.store[self.cls.__name__][id])
-        except KeyError:
-            return errors.NotFoundError()
+        items = await self.get_items([id])
+        return items if isinstance(items, errors.ApiError) else items[0]
 
     async def get_items(
         self, ids: List[str]
     ) -> List[Dict[str, Any]] | errors.NotFoundError:
-        item_dicts = [await self.get_item(id) for id in ids]
-        if any(isinstance(item_dict, errors.NotFoundError) for item_dict in item_dicts):
+        if any(id not in self._order() for id in ids):
+            return errors.NotFoundError()
+        items = await self._fetch(ids)
+        if any(item is None for item in items):
             return errors.NotFoundError()
-        return cast(List[Dict[str, Any]], item_dicts)
+        return [self._read(cast(Mapping[str, Any], item)) for item in items]
+
+    async def find_items(self, ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        # Only ids in the order are looked up, as in get_items, so a table
+        # that normalises ids cannot find a pet through an alias of its id.
+        order = self._order()
+        known_ids = [id for id in ids if id in order]
+        items = dict(zip(known_ids, await self._fetch(known_ids)))
+        found_items = [items.get(id) for id in ids]
+        return [None if item is None else self._read(item) for item in found_items]
 
     async def create_item(
         self, item: Dict[str, Any]
     ) -> Dict[str, Any] | errors.BadRequestError:
-        if "id" in item:
-            return errors.BadRequestError()
-        item["id"] = str(uuid.uuid4())
-        self.store.setdefault(self.cls.__name__, {})[item["id"]] = item
-        await self._emit(f"item{item['id']}", {"type": "create", "data": item})
-        await self._emit(f"list/{self.cls.__name__}", {"type": "create", "data": item})
-        return deepcopy(item)
+        items = await self.create_items([item])
+        return items if isinstance(items, errors.ApiError) else items[0]
 
     async def create_items(
         self, items: List[Dict[str, Any]]
@@ -42,177 +114,599 @@ class Database:
         for item in items:
             if "id" in item:
                 return errors.BadRequestError()
-        return cast(
-            List[Dict[str, Any]],
-            [await self.create_item(item) for item in items],
-        )
+        async with self._write_lock():
+            for item in items:
+                item["id"] = str(uuid.uuid4())
+            created_items = [self._read(item) for item in items]
+            await self._commit(
+                [(item["id"], None, item) for item in items],
+                "create",
+                created_items,
+                created_items,
+            )
+        # Outside the lock, so writes made meanwhile share the table's sync.
+        await self._table().sync()
+        return created_items
 
     async def update_item(
         self, item: Dict[str, Any]
     ) -> Dict[str, Any] | errors.NotFoundError | errors.BadRequestError:
-        if "id" not in item:
-            return errors.BadRequestError()
-        if (
-            self.cls.__name__ not in self.store
-            or item["id"] not in self.store[self.cls.__name__]
-        ):
-            return errors.NotFoundError()
-        self.store[self.cls.__name__][item["id"]].update(item)
-        item = deepcopy(self.store[self.cls.__name__][item["id"]])
-        await self._emit(f"item/{item['id']}", {"type": "update", "data": item})
-        return item
+        items = await self.update_items([item])
+        return items if isinstance(items, errors.ApiError) else items[0]
 
     async def update_items(
         self, items: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]] | errors.NotFoundError | errors.BadRequestError:
-        for item in items:
-            if "id" not in item:
-                return errors.BadRequestError()
-            if (
-                self.cls.__name__ not in self.store
-                or item["id"] not in self.store[self.cls.__name__]
-            ):
-                return errors.NotFoundError()
-        return cast(
-            List[Dict[str, Any]],
-            [await self.update_item(item) for item in items],
-        )
+        return await self._replace_items(items, skip_none=False)
 
     async def delete_item(
         self,
         id: str,
     ) -> Dict[str, str] | errors.NotFoundError:
-        try:
-            del self.store[self.cls.__name__][id]
-        except KeyError:
-            return errors.NotFoundError()
-        await self._emit(f"item/{id}", {"type": "delete", "data": {"id": id}})
-        await self._emit(
-            f"list/{self.cls.__name__}", {"type": "delete", "data": {"id": id}}
-        )
-
-        return {"id": id}
+        deleted_items = await self.delete_items([id])
+        if isinstance(deleted_items, errors.ApiError):
+            return deleted_items
+        return deleted_items[0]
 
     async def delete_items(
         self, ids: List[str]
     ) -> List[Dict[str, str]] | errors.NotFoundError:
-        for id in ids:
+        async with self._write_lock():
+            if any(id not in self._order() for id in ids):
+                return errors.NotFoundError()
+            unique_ids = list(dict.fromkeys(ids))
             if (
-                self.cls.__name__ not in self.store
-                or id not in self.store[self.cls.__name__]
+                self.indexes
+                or self.prefix_indexes
+                or self.trigram_indexes
+                or self.exports
             ):
-                return errors.NotFoundError()
-        return cast(
-            List[Dict[str, str]],
-            [await self.delete_item(id) for id in ids],
-        )
+                old_items = await self._fetch(unique_ids)
+            else:
+                old_items = [{} for _ in unique_ids]
+            deleted_items = [{"id": id} for id in ids]
+            old_items_by_id = dict(zip(unique_ids, old_items))
+            await self._commit(
+                [(id, old_item, None) for id, old_item in zip(unique_ids, old_items)],
+                "delete",
+                deleted_items,
+                [cast(Mapping[str, Any], old_items_by_id[id]) for id in ids],
+            )
+        await self._table().sync()
+        return deleted_items
 
     async def patch_item(
         self, item: Dict[str, Any]
     ) -> Dict[str, Any] | errors.NotFoundError | errors.BadRequestError:
-        if "id" not in item:
-            return errors.BadRequestError()
-        if (
-            self.cls.__name__ not in self.store
-            or item["id"] not in self.store[self.cls.__name__]
-        ):
-            return errors.NotFoundError()
-        self.store[self.cls.__name__][item["id"]].update(
-            {k: v for k, v in item.items() if v is not None}
-        )
-        await self._emit(f"item/{item['id']}", {"type": "update", "data": item})
-        return deepcopy(self.store[self.cls.__name__][item["id"]])
+        items = await self.patch_items([item])
+        return items if isinstance(items, errors.ApiError) else items[0]
 
     async def patch_items(
         self, items: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]] | errors.NotFoundError | errors.BadRequestError:
-        for item in items:
-            if "id" not in item:
-                return errors.BadRequestError()
-            if (
-                self.cls.__name__ not in self.store
-                or item["id"] not in self.store[self.cls.__name__]
-            ):
-                return errors.NotFoundError()
-        return cast(
-            List[Dict[str, Any]],
-            [await self.patch_item(item) for item in items],
-        )
+        return await self._replace_items(items, skip_none=True)
 
-    async def list_items(self, page: int = 1, size: int = 20) -> Dict[str, Any]:
+    async def list_items(
+        self, page: int = 1, size: int = 20, **filters: Any
+    ) -> Dict[str, Any] | errors.BadRequestError:
         start = (page - 1) * size
         end = start + size
-        items = list(deepcopy(self.store.get(self.cls.__name__, {})).values())[
-            start:end
-        ]
-        total_pages = -(-len(self.store.get(self.cls.__name__, {})) // size)
+        order = self._filtered_order(filters)
+        if isinstance(order, errors.BadRequestError):
+            return order
+        items = await self._read_many(order.slice(start, end))
+        total_pages = -(-len(order) // size)
         return {"size": size, "page": page, "total_pages": total_pages, "items": items}
 
-    async def count_items(self) -> int:
-        return len(self.store.get(self.cls.__name__, {}))
+    async def list_items_after(
+        self, after: Optional[str] = None, first: int = 20
+    ) -> Dict[str, Any] | errors.BadRequestError:
+        if first < 0:
+            return errors.BadRequestError()
+        seq = 0
+        if after is not None:
+            try:
+                name, _, raw_seq = (
+                    base64.urlsafe_b64decode(after.encode()).decode().partition(":")
+                )
+                seq = int(raw_seq)
+            except (binascii.Error, UnicodeError, ValueError):
+                return errors.BadRequestError()
+            if name != self.cls.__name__:
+                return errors.BadRequestError()
+        entries = self._order().after(seq, first + 1)
+        items = await self._fetch([id for _, id in entries[:first]])
+        edges = [
+            {"cursor": self._encode_cursor(entry_seq), "node": self._read(item)}
+            for (entry_seq, _), item in zip(entries, items)
+            if item is not None
+        ]
+        return {
+            "edges": edges,
+            "end_cursor": edges[-1]["cursor"] if edges else after,
+            "has_next_page": len(entries) > first,
+        }
+
+    async def count_items(self, **filters: Any) -> int | errors.BadRequestError:
+        order = self._filtered_order(filters)
+        if isinstance(order, errors.BadRequestError):
+            return order
+        return len(order)
+
+    async def search_items(
+        self,
+        field: str,
+        prefix: Optional[str] = None,
+        contains: Optional[str] = None,
+        first: int = 20,
+    ) -> List[Dict[str, Any]] | errors.BadRequestError:
+        if (prefix is None) == (contains is None) or first < 0:
+            return errors.BadRequestError()
+        if prefix is not None and field in self.prefix_indexes:
+            ids = self.prefix_indexes[field].search(prefix, first)
+        elif (
+            contains is not None
+            and len(contains) >= 3
+            and field in self.trigram_indexes
+        ):
+            ids = self.trigram_indexes[field].search(contains, first)
+        else:
+            return errors.BadRequestError()
+        return await self._read_many(ids)
 
-    async def subscribe_to_item_by_id(self, item_id: str) -> AsyncGenerator[Any, None]:
+    async def export_items(
+        self, chunk_size: int = 1000
+    ) -> AsyncGenerator[List[Dict[str, Any]], None]:
+        async with self._write_lock():
+            ids = list(self._order())
+            snapshot: Dict[str, Mapping[str, Any]] = {}
+            self.exports.append(snapshot)
         try:
-            self.store[self.cls.__name__][item_id]
-        except KeyError:
-            raise errors.NotFoundError()
+            for start in range(0, len(ids), chunk_size):
+                stop = start + chunk_size
+                chunk = ids[start:stop]
+                items = await self._fetch(chunk)
+                yield [
+                    self._read(snapshot.get(id) or cast(Mapping[str, Any], item))
+                    for id, item in zip(chunk, items)
+                    if id in snapshot or item is not None
+                ]
+                # In-memory tables never suspend, so let other requests run
+                # between chunks of a large export.
+                await asyncio.sleep(0)
+        finally:
+            self.exports = [export for export in self.exports if export is not snapshot]
 
-        item_key = f"item/{item_id}"
+    async def close(self) -> None:
+        self._table().close()
 
-        if item_key not in self.subscribers:
-            self.subscribers[item_key] = []
+    def subscription_stats(self) -> Dict[str, int]:
+        backlogs = {
+            subscriber: subscriber.backlog()
+            for channel in self.subscribers.values()
+            for subscriber in channel.subscribers
+        }
+        return {
+            "subscribers": len(backlogs),
+            "queued_events": sum(queued for queued, _ in backlogs.values()),
+            "max_queue_depth": max(
+                (queued for queued, _ in backlogs.values()), default=0
+            ),
+            "dropped_events": self.dropped_events
+            + sum(
+                subscriber.dropped + dropped
+                for subscriber, (_, dropped) in backlogs.items()
+            ),
+            "disconnected_subscribers": self.disconnected_subscribers
+            + sum(
+                subscriber.disconnected
+                or (subscriber.overflow == "disconnect" and dropped > 0)
+                for subscriber, (_, dropped) in backlogs.items()
+            ),
+        }
 
-        queue: asyncio.Queue = asyncio.Queue()
-        self.subscribers[item_key].append(queue)
+    async def subscribe_to_item_by_id(
+        self,
+        item_id: str,
+        overflow: Optional[Overflow] = None,
+        coalesce_ms: Optional[int] = None,
+        since: Optional[str] = None,
+    ) -> AsyncGenerator[Any, None]:
+        if not await self._exists([item_id]):
+            raise errors.NotFoundError()
 
-        try:
-            while True:
-                data = await queue.get()
-                yield data
-        finally:
-            self.subscribers[item_key].remove(queue)
+        item_keys = [f"item/{item_id}"]
+        async for data in self._subscribe(item_keys, overflow, coalesce_ms, since):
+            yield data
 
     async def subscribe_to_items_by_id(
-        self, item_ids: List[str]
+        self,
+        item_ids: List[str],
+        overflow: Optional[Overflow] = None,
+        coalesce_ms: Optional[int] = None,
+        since: Optional[str] = None,
     ) -> AsyncGenerator[Any, None]:
-        for item_id in item_ids:
-            try:
-                self.store[self.cls.__name__][item_id]
-            except KeyError:
-                raise errors.NotFoundError()
-
-        queue: asyncio.Queue = asyncio.Queue()
+        if not await self._exists(item_ids):
+            raise errors.NotFoundError()
 
         item_keys = [f"item/{item_id}" for item_id in item_ids]
+        async for data in self._subscribe(item_keys, overflow, coalesce_ms, since):
+            yield data
 
-        for item_key in item_keys:
-            if item_key not in self.subscribers:
-                self.subscribers[item_key] = []
-            self.subscribers[item_key].append(queue)
+    async def subscribe_to_list(
+        self,
+        overflow: Optional[Overflow] = None,
+        coalesce_ms: Optional[int] = None,
+        since: Optional[str] = None,
+        **filters: Any,
+    ) -> AsyncGenerator[Any, None]:
+        filters = {name: value for name, value in filters.items() if value is not None}
+        list_filter: Optional[Tuple[str, Any]] = None
+        lengths: Dict[int, int] = {}
+        length = 0
+        if len(filters) > 1:
+            raise errors.BadRequestError()
+        if filters:
+            [(name, value)] = filters.items()
+            field = name.removesuffix("_prefix")
+            if name in self.indexes:
+                list_filter = (name, value)
+            elif name != field and field in self.prefix_indexes and value:
+                list_filter = (name, value.casefold())
+                lengths = self.prefix_lengths[field]
+                length = len(list_filter[1])
+            else:
+                raise errors.BadRequestError()
 
+        list_keys = [self._list_key(list_filter)]
+        self.list_subscribers += 1
+        if length:
+            lengths[length] = lengths.get(length, 0) + 1
         try:
-            while True:
-                data = await queue.get()
+            async for data in self._subscribe(list_keys, overflow, coalesce_ms, since):
                 yield data
         finally:
-            self.subscribers[item_key].remove(queue)
+            self.list_subscribers -= 1
+            if length:
+                lengths[length] -= 1
+                if not lengths[length]:
+                    del lengths[length]
 
-    async def subscribe_to_list(self) -> AsyncGenerator[Any, None]:
-        queue: asyncio.Queue = asyncio.Queue()
+    async def _subscribe(
+        self,
+        keys: List[str],
+        overflow: Optional[Overflow],
+        coalesce_ms: Optional[int],
+        since: Optional[str] = None,
+    ) -> AsyncGenerator[Any, None]:
+        if coalesce_ms is not None and coalesce_ms < 0:
+            raise errors.BadRequestError()
+        since_seq = None if since is None else self._decode_event_cursor(since)
+        if since_seq is not None and not (
+            self.event_seq - len(self.replay) <= since_seq <= self.event_seq
+        ):
+            # Older events were dropped from the replay log, or the cursor
+            # comes from another numbering; the client has to resync.
+            raise errors.GoneError()
 
-        list_key = f"list/{self.cls.__name__}"
-        if list_key not in self.subscribers:
-            self.subscribers[list_key] = []
-        self.subscribers[list_key].append(queue)
+        channels: Dict[str, Channel] = {}
+        for key in keys:
+            if key not in self.subscribers:
+                self.subscribers[key] = Channel(self.queue_size)
+            channels[key] = self.subscribers[key]
+
+        subscriber = Subscriber(
+            list(channels.values()), overflow or self.overflow, coalesce_ms
+        )
+        for channel in channels.values():
+            channel.subscribers.add(subscriber)
+        replayed = [] if since_seq is None else self._replayed(set(keys), since_seq)
 
         try:
-            while True:
-                data = await queue.get()
+            for data in replayed:
                 yield data
+            while True:
+                for data in await subscriber.get():
+                    yield data
         finally:
-            self.subscribers[list_key].remove(queue)
+            for key, channel in channels.items():
+                channel.subscribers.discard(subscriber)
+                if not channel.subscribers and self.subscribers.get(key) is channel:
+                    del self.subscribers[key]
+            self.dropped_events += subscriber.dropped
+            self.disconnected_subscribers += subscriber.disconnected
+
+    async def _replace_items(
+        self, items: List[Dict[str, Any]], skip_none: bool
+    ) -> List[Dict[str, Any]] | errors.NotFoundError | errors.BadRequestError:
+        async with self._write_lock():
+            for item in items:
+                if "id" not in item:
+                    return errors.BadRequestError()
+                if item["id"] not in self._order():
+                    return errors.NotFoundError()
+            unique_ids = list(dict.fromkeys(item["id"] for item in items))
+            pending = dict(zip(unique_ids, await self._fetch(unique_ids)))
+            if any(old_item is None for old_item in pending.values()):
+                return errors.NotFoundError()
+            changes: List[Change] = []
+            for item in items:
+                old_item = pending[item["id"]]
+                pending[item["id"]] = {
+                    **old_item,
+                    **{k: v for k, v in item.items() if v is not None or not skip_none},
+                }
+                changes.append((item["id"], old_item, pending[item["id"]]))
+            replaced_items = [
+                self._read(cast(Mapping[str, Any], new_item))
+                for _, _, new_item in changes
+            ]
+            await self._commit(changes, "update", replaced_items)
+        await self._table().sync()
+        return replaced_items
+
+    def _table(self) -> Table:
+        return self.store[self.cls.__name__]
+
+    def _order(self) -> OrderedIndex:
+        return self.order[self.cls.__name__]
+
+    def _write_lock(self) -> asyncio.Lock:
+        return self.write_locks[self.cls.__name__]
+
+    async def _exists(self, ids: List[str]) -> bool:
+        return all(id in self._order() for id in ids)
+
+    async def _event_position(self) -> Tuple[str, int]:
+        return self.event_epoch, self.event_seq
+
+    async def _fetch(self, ids: List[str]) -> List[Optional[Mapping[str, Any]]]:
+        table = self._table()
+        return await table.run(table.get_many, ids)
+
+    async def _read_many(self, ids: List[str]) -> List[Dict[str, Any]]:
+        return [self._read(item) for item in await self._fetch(ids) if item is not None]
+
+    async def _commit(
+        self,
+        changes: List[Change],
+        type: str,
+        items: List[Dict[str, Any]],
+        list_items: Optional[Sequence[Mapping[str, Any]]] = None,
+    ) -> None:
+        # Kept before writing, so an export reading concurrently from another
+        # thread never sees a newer version without its snapshot copy.
+        for snapshot in self.exports:
+            for id, old_item, _ in changes:
+                if old_item is not None:
+                    snapshot.setdefault(id, old_item)
+        table = self._table()
+        try:
+            await table.run(
+                table.write_many, [(id, new_item) for id, _, new_item in changes]
+            )
+        except asyncio.CancelledError:
+            # Tables finish a write the mutation stopped waiting for, so it is
+            # indexed and announced all the same.
+            await self._index_items(changes)
+            await self._emit_items(type, items, list_items)
+            raise
+        await self._index_items(changes)
+        await self._emit_items(type, items, list_items)
+
+    async def _index_items(self, changes: List[Change]) -> None:
+        indexed: List[Change] = []
+        try:
+            for id, old_item, new_item in changes:
+                indexed.append((id, old_item, new_item))
+                self._index_item(id, old_item, new_item)
+        except BaseException:
+            table = self._table()
+            await table.run(
+                table.write_many,
+                [(id, old_item) for id, old_item, _ in reversed(changes)],
+            )
+            for id, old_item, new_item in reversed(indexed):
+                self._index_item(id, new_item, old_item)
+            raise
+
+    def _filtered_order(
+        self, filters: Dict[str, Any]
+    ) -> OrderedIndex | errors.BadRequestError:
+        filters = {
+            field: value for field, value in filters.items() if value is not None
+        }
+        if not filters:
+            return self._order()
+        if len(filters) > 1 or not all(field in self.indexes for field in filters):
+            return errors.BadRequestError()
+        [(field, value)] = filters.items()
+        return self.indexes[field].get(value, OrderedIndex())
+
+    def _hydrate(self) -> None:
+        items = list(self._table().items())
+        self._order().extend(id for id, _ in items)
+        for field, index in self.indexes.items():
+            ids_by_value: Dict[Any, List[str]] = {}
+            for id, item in items:
+                if item.get(field) is not None:
+                    ids_by_value.setdefault(item[field], []).append(id)
+            for value, ids in ids_by_value.items():
+                index[value] = OrderedIndex()
+                index[value].extend(ids)
+        search_indexes: List[Tuple[str, PrefixIndex | TrigramIndex]] = [
+            *self.prefix_indexes.items(),
+            *self.trigram_indexes.items(),
+        ]
+        for field, search_index in search_indexes:
+            for id, item in items:
+                if item.get(field) is not None:
+                    search_index.add(id, item[field])
+
+    def _index_item(
+        self,
+        id: str,
+        old_item: Optional[Mapping[str, Any]],
+        new_item: Optional[Mapping[str, Any]],
+    ) -> None:
+        if old_item is None:
+            self._order().add(id)
+        elif new_item is None:
+            self._order().remove(id)
+        for field, index in self.indexes.items():
+            old_value = None if old_item is None else old_item.get(field)
+            new_value = None if new_item is None else new_item.get(field)
+            if old_value == new_value:
+                continue
+            if old_value in index:
+                index[old_value].remove(id)
+                if not index[old_value]:
+                    del index[old_value]
+            if new_value is not None:
+                index.setdefault(new_value, OrderedIndex()).add(id)
+        search_indexes: List[Tuple[str, PrefixIndex | TrigramIndex]] = [
+            *self.prefix_indexes.items(),
+            *self.trigram_indexes.items(),
+        ]
+        for field, search_index in search_indexes:
+            new_value = None if new_item is None else new_item.get(field)
+            if new_value is None:
+                search_index.remove(id)
+            elif old_item is None or old_item.get(field) != new_value:
+                search_index.add(id, new_value)
+
+    def _sync_item(self, id: str, new_item: Optional[Mapping[str, Any]]) -> None:
+        # The table already holds the new version, so the indexed values of
+        # the old one are looked up in the indexes themselves.
+        if id not in self._order():
+            if new_item is not None:
+                self._index_item(id, None, new_item)
+            return
+        old_item = {
+            field: value
+            for field, index in self.indexes.items()
+            for value, ids in index.items()
+            if id in ids
+        }
+        self._index_item(id, old_item, new_item)
+
+    def _read(self, item: Mapping[str, Any]) -> Dict[str, Any]:
+        if self._table().copy_on_read:
+            return deepcopy(cast(Dict[str, Any], item))
+        return cast(Dict[str, Any], item)
+
+    def _encode_cursor(self, seq: int) -> str:
+        return base64.urlsafe_b64encode(f"{self.cls.__name__}:{seq}".encode()).decode()
+
+    def _encode_event_cursor(self, seq: int) -> str:
+        return base64.urlsafe_b64encode(f"{self.event_epoch}:{seq}".encode()).decode()
+
+    def _decode_event_cursor(self, cursor: str) -> int:
+        try:
+            epoch, _, raw_seq = (
+                base64.urlsafe_b64decode(cursor.encode()).decode().partition(":")
+            )
+            seq = int(raw_seq)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise errors.BadRequestError()
+        if seq < 0:
+            raise errors.BadRequestError()
+        if epoch != self.event_epoch:
+            raise errors.GoneError()
+        return seq
+
+    async def _emit_items(
+        self,
+        type: str,
+        items: List[Dict[str, Any]],
+        list_items: Optional[Sequence[Mapping[str, Any]]] = None,
+    ) -> None:
+        await self.bus.publish(
+            (
+                self.cls.__name__,
+                type,
+                items,
+                list_items,
+                (self.event_epoch, self.event_seq + 1),
+            )
+        )
+
+    def _deliver(self, emission: Emission) -> None:
+        name, type, items, list_items, (epoch, seq) = emission
+        if name != self.cls.__name__:
+            return
+        if epoch != self.event_epoch or seq != self.event_seq + 1:
+            self._follow(epoch, seq - 1)
+        if epoch != self.event_epoch:
+            # Another process changed a table shared with this one.
+            for item in items:
+                self._sync_item(item["id"], None if type == "delete" else item)
+        self.delivered_events[type] = self.delivered_events.get(type, 0) + len(items)
+        batches: Dict[str, List[Entry]] = {}
+        for item, list_item in zip(
+            items, repeat(None) if list_items is None else list_items
+        ):
+            self.event_seq += 1
+            event = {
+                "type": type,
+                "data": item,
+                "seq": self.event_seq,
+                "cursor": self._encode_event_cursor(self.event_seq),
+            }
+            self.replay.append((event, list_item))
+            for key in self._event_keys(item, list_item):
+                if key in self.subscribers:
+                    batches.setdefault(key, []).append((self.event_seq, event))
+        self._publish(batches)
+
+    def _follow(self, epoch: str, seq: int) -> None:
+        # Events relayed from other processes by an event hub were numbered
+        # there; this database keeps numbering them itself, so its cursors
+        # stay contiguous.
+        pass
+
+    def _event_keys(
+        self, item: Mapping[str, Any], list_item: Optional[Mapping[str, Any]]
+    ) -> List[str]:
+        keys = [f"item/{item['id']}"]
+        if list_item is not None and self.list_subscribers:
+            keys.extend(
+                self._list_key(list_filter)
+                for list_filter in [None, *self._list_filters(list_item)]
+            )
+        return keys
+
+    def _replayed(self, keys: Set[str], since: int) -> List[Dict[str, Any]]:
+        start = len(self.replay) - (self.event_seq - since)
+        return [
+            event
+            for event, list_item in islice(self.replay, start, None)
+            if any(key in keys for key in self._event_keys(event["data"], list_item))
+        ]
+
+    def _list_key(self, list_filter: Optional[Tuple[str, Any]]) -> str:
+        if list_filter is None:
+            return f"list/{self.cls.__name__}"
+        return f"list/{self.cls.__name__}?{list_filter[0]}={list_filter[1]}"
+
+    def _list_filters(self, item: Mapping[str, Any]) -> List[Tuple[str, Any]]:
+        list_filters = [
+            (field, item[field])
+            for field in self.indexes
+            if item.get(field) is not None
+        ]
+        # Only prefixes as long as a subscribed one are keyed, so a long name
+        # costs nothing more than the subscriptions it could match.
+        for field, lengths in self.prefix_lengths.items():
+            if lengths and isinstance(item.get(field), str):
+                value = item[field].casefold()
+                list_filters.extend(
+                    (f"{field}_prefix", value[:length])
+                    for length in lengths
+                    if length <= len(value)
+                )
+        return list_filters
 
-    async def _emit(self, key: str, data: Dict[str, Any]) -> None:
-        if key in self.subscribers:
-            for queue in self.subscribers[key]:
-                await queue.put(data)
+    def _publish(self, batches: Dict[str, List[Entry]]) -> None:
+        for key, entries in batches.items():
+            self.subscribers[key].publish(entries)
@@ -0,0 +1,120 @@
+import hashlib
+import json
+from collections import OrderedDict
+from graphql import DocumentNode, GraphQLError
+from strawberry.extensions import SchemaExtension
+from strawberry.http.exceptions import HTTPException
+from strawberry.schema.execute import parse_document, validate_document
+from typing import Any, Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+Document = Tuple[DocumentNode, List[GraphQLError]]
+
+V = TypeVar("V")
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+class LruCache(Generic[V]):
+    def __init__(self, maxsize: int = 1000) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, V] = OrderedDict()
+
+    def get(self, key: str) -> Optional[V]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: V) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._evicted(*self._entries.popitem(last=False))
+
+    def _evicted(self, key: str, value: V) -> None:
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class DocumentCache(SchemaExtension, LruCache[Document]):
+    # One instance is shared by every execution of the schema, so the parsed
+    # and validated documents outlive the request that produced them.
+    def __init__(self, maxsize: int = 1000) -> None:
+        LruCache.__init__(self, maxsize)
+
+    def on_parse(self) -> Iterator[None]:
+        execution_context = self.execution_context
+        if execution_context.query is None:
+            yield
+            return
+        key = query_hash(execution_context.query)
+        cached = self.get(key)
+        if cached is None:
+            try:
+                document = parse_document(
+                    execution_context.query, **execution_context.parse_options
+                )
+            except GraphQLError:
+                # Left to the regular parser, which reports the syntax error.
+                yield
+                return
+            cached = document, validate_document(
+                execution_context.schema._schema,
+                document,
+                execution_context.validation_rules,
+            )
+            self.put(key, cached)
+        document, errors = cached
+        execution_context.graphql_document = document
+        # Setting the errors, even to an empty list, skips validation.
+        execution_context.errors = list(errors)
+        yield
+
+
+class PersistedQueryNotFound(Exception):
+    pass
+
+
+class PersistedQueries(LruCache[str]):
+    # Automatic persisted queries: clients send the sha256 of a query and
+    # only send the query itself when the hash is not known yet.
+    def resolve(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        extensions = data.get("extensions")
+        if extensions is None:
+            return data
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except json.JSONDecodeError:
+                raise HTTPException(400, "Unable to parse extensions")
+        if not isinstance(extensions, dict):
+            raise HTTPException(400, "extensions must be an object")
+        persisted_query = extensions.get("persistedQuery")
+        if persisted_query is None:
+            return data
+        if not isinstance(persisted_query, dict):
+            raise HTTPException(400, "persistedQuery must be an object")
+        if persisted_query.get("version") != 1:
+            raise HTTPException(400, "Unsupported persisted query version")
+        key = persisted_query.get("sha256Hash")
+        if not isinstance(key, str):
+            raise HTTPException(400, "sha256Hash must be a string")
+        query = data.get("query")
+        if query is None:
+            query = self.get(key)
+            if query is None:
+                raise PersistedQueryNotFound()
+            return {**data, "query": query}
+        if query_hash(query) != key:
+            raise HTTPException(400, "provided sha does not match query")
+        self.put(key, query)
+        return data
@@ -12,3 +12,13 @@ class NotFoundError(ApiError):
 class BadRequestError(ApiError):
     def __init__(self) -> None:
         super().__init__("Bad request", 400)
+
+
+class SlowConsumerError(ApiError):
+    def __init__(self) -> None:
+        super().__init__("Too many pending events", 429)
+
+
+class GoneError(ApiError):
+    def __init__(self) -> None:
+        super().__init__("Events are no longer available", 410)
@@ -0,0 +1,174 @@
+import asyncio
+import marshal
+import os
+import struct
+import sys
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+# The collection name, the event type, the items sent to subscribers, the
+# items list subscriptions are routed on (None for events that are not listed)
+# and the epoch and sequence number of the first event.
+Emission = Tuple[
+    str,
+    str,
+    List[Dict[str, Any]],
+    Optional[Sequence[Mapping[str, Any]]],
+    Tuple[str, int],
+]
+
+FRAME = struct.Struct("<I")
+
+
+class EventBus(Protocol):
+    def connect(self, receiver: Callable[[Emission], None]) -> None:
+        ...
+
+    async def start(self) -> None:
+        ...
+
+    async def publish(self, emission: Emission) -> None:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+class LocalBus:
+    def __init__(self) -> None:
+        self.receivers: List[Callable[[Emission], None]] = []
+
+    def connect(self, receiver: Callable[[Emission], None]) -> None:
+        self.receivers.append(receiver)
+
+    async def start(self) -> None:
+        pass
+
+    async def publish(self, emission: Emission) -> None:
+        for receiver in self.receivers:
+            receiver(emission)
+
+    async def close(self) -> None:
+        pass
+
+
+class SocketBus(LocalBus):
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reading: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._writer is not None:
+            return
+        reader, self._writer = await asyncio.open_unix_connection(self.path)
+        self._reading = asyncio.create_task(self._read(reader))
+
+    async def publish(self, emission: Emission) -> None:
+        await super().publish(emission)
+        if self._writer is None or self._writer.is_closing():
+            return
+        name, type, items, list_items, stamp = emission
+        # Serialised once per publish; the hub relays the frame unchanged.
+        payload = marshal.dumps(
+            (
+                name,
+                type,
+                items,
+                None if list_items is None else [dict(item) for item in list_items],
+                stamp,
+            )
+        )
+        self._writer.write(FRAME.pack(len(payload)) + payload)
+        try:
+            await self._writer.drain()
+        except ConnectionError:
+            # Local subscribers already have the events; only other
+            # processes miss out while the hub is gone.
+            pass
+
+    async def close(self) -> None:
+        if self._reading is not None:
+            self._reading.cancel()
+        if self._writer is not None:
+            self._writer.close()
+        self._writer = self._reading = None
+
+    async def _read(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                [size] = FRAME.unpack(await reader.readexactly(FRAME.size))
+                emission = marshal.loads(await reader.readexactly(size))
+                for receiver in self.receivers:
+                    receiver(emission)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+
+class EventHub:
+    def __init__(self, path: str, max_buffer: int = 16 << 20) -> None:
+        self.path = path
+        self.max_buffer = max_buffer
+        self._writers: Set[asyncio.StreamWriter] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._server = await asyncio.start_unix_server(self._relay, self.path)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    async def _relay(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._writers.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(FRAME.size)
+                frame = header + await reader.readexactly(*FRAME.unpack(header))
+                for other in list(self._writers):
+                    if other is writer:
+                        continue
+                    if other.transport.get_write_buffer_size() > self.max_buffer:
+                        # A worker that stopped reading is cut off rather than
+                        # buffered without limit.
+                        self._writers.discard(other)
+                        other.close()
+                    else:
+                        other.write(frame)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+
+async def serve_hub(path: str) -> None:
+    hub = EventHub(path)
+    await hub.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await hub.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve_hub(sys.argv[1]))
@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import AsyncIterator, BinaryIO, List, Optional
+
+from petstore.app import PetsDatabase
+from petstore.bulk import FORMATS, ImportFailed, ImportReport, import_items
+
+
+async def _read_chunks(file: BinaryIO) -> AsyncIterator[bytes]:
+    while True:
+        chunk = file.read(1 << 16)
+        if not chunk:
+            return
+        yield chunk
+
+
+class _Progress:
+    def __init__(self, interval: float = 1.0) -> None:
+        self.interval = interval
+        self.reported = time.perf_counter()
+
+    def __call__(self, report: ImportReport) -> None:
+        now = time.perf_counter()
+        if now - self.reported < self.interval:
+            return
+        self.reported = now
+        rows_per_second = report.imported / (now - report.started)
+        print(
+            f"{report.imported} imported, {report.rejected} rejected"
+            f" ({rows_per_second:.0f} rows/s)",
+            file=sys.stderr,
+        )
+
+
+async def _import(args: argparse.Namespace, file: BinaryIO) -> ImportReport:
+    database = PetsDatabase.create(
+        backend=args.backend, path=args.database, store=args.socket
+    )
+    await database.start()
+    try:
+        return await import_items(
+            database.pets,
+            _read_chunks(file),
+            format=args.format,
+            chunk_size=args.chunk_size,
+            progress=_Progress(),
+        )
+    finally:
+        await database.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="petstore-import", description="Load pets from NDJSON or CSV."
+    )
+    parser.add_argument("file", help="File to import, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--backend", default="wal")
+    parser.add_argument("--database", default="petstore.db")
+    parser.add_argument("--socket", help="Unix socket of a running store process")
+    args = parser.parse_args(argv)
+    if args.format is None:
+        args.format = "csv" if args.file.endswith(".csv") else "ndjson"
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be positive")
+
+    try:
+        if args.file == "-":
+            report = asyncio.run(_import(args, sys.stdin.buffer))
+        else:
+            with open(args.file, "rb") as file:
+                report = asyncio.run(_import(args, file))
+    except ImportFailed as failure:
+        print(json.dumps(failure.report.as_dict()))
+        sys.exit(1)
+    print(json.dumps(report.as_dict()))
+
+
+if __name__ == "__main__":
+    main()
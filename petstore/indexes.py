@@ -0,0 +1,232 @@
+from array import array
+from itertools import islice
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, cast
+
+
+class OrderedIndex:
+    def __init__(self) -> None:
+        self._keys: List[Optional[str]] = []
+        self._seqs = array("q")
+        self._next_seq = 1
+        self._slots: Dict[str, int] = {}
+        # Fenwick tree over slots, 1 for a live key and 0 for a tombstone,
+        # so offsets can be resolved to slots in O(log n).
+        self._tree = array("q", [0])
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._slots
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._keys:
+            if key is not None:
+                yield key
+
+    def add(self, key: str) -> None:
+        if key in self._slots:
+            return
+        self._slots[key] = len(self._keys)
+        self._keys.append(key)
+        self._seqs.append(self._next_seq)
+        self._next_seq += 1
+        position = len(self._tree)
+        lowest_bit = position & -position
+        self._tree.append(
+            1 + self._prefix_sum(position - 1) - self._prefix_sum(position - lowest_bit)
+        )
+
+    def extend(self, keys: Iterable[str]) -> None:
+        new_keys = [key for key in dict.fromkeys(keys) if key not in self._slots]
+        start = len(self._keys)
+        self._slots.update(zip(new_keys, range(start, start + len(new_keys))))
+        self._keys.extend(new_keys)
+        self._seqs.extend(range(self._next_seq, self._next_seq + len(new_keys)))
+        self._next_seq += len(new_keys)
+        self._build_tree()
+
+    def remove(self, key: str) -> None:
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return
+        self._keys[slot] = None
+        position = slot + 1
+        while position < len(self._tree):
+            self._tree[position] -= 1
+            position += position & -position
+        if len(self._keys) > 64 and len(self._keys) > 2 * len(self._slots):
+            self._compact()
+
+    def slice(self, start: int, stop: int) -> List[str]:
+        start = max(start, 0)
+        stop = min(stop, len(self._slots))
+        keys: List[str] = []
+        if start >= stop:
+            return keys
+        slot = self._find_slot(start)
+        while len(keys) < stop - start:
+            key = self._keys[slot]
+            if key is not None:
+                keys.append(key)
+            slot += 1
+        return keys
+
+    def seq(self, key: str) -> int:
+        return self._seqs[self._slots[key]]
+
+    def after(self, seq: int, limit: int) -> List[Tuple[int, str]]:
+        entries: List[Tuple[int, str]] = []
+        slot = bisect_right(self._seqs, seq)
+        while slot < len(self._keys) and len(entries) < limit:
+            key = self._keys[slot]
+            if key is not None:
+                entries.append((self._seqs[slot], key))
+            slot += 1
+        return entries
+
+    def _prefix_sum(self, position: int) -> int:
+        total = 0
+        while position > 0:
+            total += self._tree[position]
+            position -= position & -position
+        return total
+
+    def _find_slot(self, offset: int) -> int:
+        position = 0
+        remaining = offset
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            next_position = position + step
+            if (
+                next_position < len(self._tree)
+                and self._tree[next_position] <= remaining
+            ):
+                position = next_position
+                remaining -= self._tree[next_position]
+            step >>= 1
+        return position
+
+    def _compact(self) -> None:
+        live_slots = [slot for slot, key in enumerate(self._keys) if key is not None]
+        keys = [cast(str, self._keys[slot]) for slot in live_slots]
+        self._seqs = array("q", (self._seqs[slot] for slot in live_slots))
+        self._keys = list(keys)
+        self._slots = {key: slot for slot, key in enumerate(keys)}
+        self._build_tree()
+
+    def _build_tree(self) -> None:
+        self._tree = array("q", [0])
+        if len(self._slots) == len(self._keys):
+            # Without tombstones every node covers exactly its lowest bit.
+            self._tree.extend(
+                position & -position for position in range(1, len(self._keys) + 1)
+            )
+            return
+        self._tree.extend(0 if key is None else 1 for key in self._keys)
+        for position in range(1, len(self._tree)):
+            parent = position + (position & -position)
+            if parent < len(self._tree):
+                self._tree[parent] += self._tree[position]
+
+
+class PrefixIndex:
+    def __init__(self, load: int = 512) -> None:
+        self._load = load
+        self._buckets: List[List[Tuple[str, str]]] = []
+        self._maxes: List[Tuple[str, str]] = []
+        self._values: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, key: str, value: str) -> None:
+        self.remove(key)
+        entry = (value.casefold(), key)
+        self._values[key] = entry[0]
+        if not self._buckets:
+            self._buckets.append([entry])
+            self._maxes.append(entry)
+            return
+        position = min(bisect_left(self._maxes, entry), len(self._buckets) - 1)
+        bucket = self._buckets[position]
+        insort(bucket, entry)
+        self._maxes[position] = bucket[-1]
+        if len(bucket) > 2 * self._load:
+            half = len(bucket) // 2
+            self._buckets.insert(position + 1, bucket[half:])
+            del bucket[half:]
+            self._maxes.insert(position, bucket[-1])
+
+    def remove(self, key: str) -> None:
+        value = self._values.pop(key, None)
+        if value is None:
+            return
+        entry = (value, key)
+        position = bisect_left(self._maxes, entry)
+        bucket = self._buckets[position]
+        del bucket[bisect_left(bucket, entry)]
+        if bucket:
+            self._maxes[position] = bucket[-1]
+        else:
+            del self._buckets[position]
+            del self._maxes[position]
+
+    def search(self, prefix: str, limit: int) -> List[str]:
+        prefix = prefix.casefold()
+        keys: List[str] = []
+        position = bisect_left(self._maxes, (prefix, ""))
+        if position == len(self._buckets):
+            return keys
+        slot = bisect_left(self._buckets[position], (prefix, ""))
+        while position < len(self._buckets) and len(keys) < limit:
+            bucket = self._buckets[position]
+            while slot < len(bucket) and len(keys) < limit:
+                value, key = bucket[slot]
+                if not value.startswith(prefix):
+                    return keys
+                keys.append(key)
+                slot += 1
+            position += 1
+            slot = 0
+        return keys
+
+
+class TrigramIndex:
+    # Postings keep keys in the order they were indexed, so a search walks
+    # the rarest trigram's keys and stops at the first limit that match.
+    def __init__(self) -> None:
+        self._trigrams: Dict[str, Dict[str, None]] = {}
+        self._values: Dict[str, str] = {}
+
+    def add(self, key: str, value: str) -> None:
+        self.remove(key)
+        value = value.casefold()
+        self._values[key] = value
+        for trigram in self._split(value):
+            self._trigrams.setdefault(trigram, {})[key] = None
+
+    def remove(self, key: str) -> None:
+        value = self._values.pop(key, None)
+        if value is None:
+            return
+        for trigram in self._split(value):
+            keys = self._trigrams[trigram]
+            del keys[key]
+            if not keys:
+                del self._trigrams[trigram]
+
+    def search(self, substring: str, limit: int) -> List[str]:
+        substring = substring.casefold()
+        trigrams = self._split(substring)
+        if not trigrams:
+            return []
+        keys = min((self._trigrams.get(trigram, {}) for trigram in trigrams), key=len)
+        return list(
+            islice((key for key in keys if substring in self._values[key]), limit)
+        )
+
+    @staticmethod
+    def _split(value: str) -> Set[str]:
+        return {"".join(trigram) for trigram in zip(value, value[1:], value[2:])}
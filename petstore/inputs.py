@@ -24,6 +24,13 @@ class UpdatePetInput:
 class ListPetsInput:
     page: Optional[int] = 1
     size: Optional[int] = 20
+    category: Optional[str] = None
+
+
+@strawberry.input
+class ListPetsConnectionInput:
+    first: Optional[int] = 20
+    after: Optional[str] = None
 
 
 @strawberry.input
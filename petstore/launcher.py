@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import tempfile
+from aiohttp import web
+from multiprocessing.connection import wait
+from multiprocessing.synchronize import Event
+from typing import List, Optional
+
+from petstore.app import PetsDatabase, create_app
+from petstore.cache import ResponseCache
+from petstore.remote import StoreServer
+
+
+async def _serve_store(backend: str, path: str, store: str, ready: Event) -> None:
+    database = PetsDatabase.create(backend=backend, path=path)
+    server = StoreServer(database.pets, store)
+    await database.start()
+    await server.start()
+    ready.set()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+        await database.close()
+
+
+def run_store(backend: str, path: str, store: str, ready: Event) -> None:
+    try:
+        asyncio.run(_serve_store(backend, path, store, ready))
+    except KeyboardInterrupt:
+        pass
+
+
+def run_worker(
+    host: str, port: int, store: str, response_cache_ttl: Optional[float] = None
+) -> None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    # Each worker listens on the same port and the kernel spreads the
+    # connections between them.
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    # Each worker caches its own responses; the store broadcasts every write
+    # to all of them, so any worker's write invalidates every cache.
+    response_cache = (
+        None if response_cache_ttl is None else ResponseCache(ttl=response_cache_ttl)
+    )
+    app = create_app(PetsDatabase.create(store=store, response_cache=response_cache))
+    web.run_app(app, sock=sock, print=None)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="petstore", description="Serve the pet store from several processes."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backend", default="memory")
+    parser.add_argument("--database", default="petstore.db")
+    parser.add_argument("--socket", help="Unix socket of the store process")
+    parser.add_argument(
+        "--response-cache-ttl",
+        type=float,
+        default=os.environ.get("PETSTORE_RESPONSE_CACHE_TTL"),
+        help="Cache read query responses for this many seconds",
+    )
+    args = parser.parse_args(argv)
+    store = args.socket or os.path.join(tempfile.mkdtemp(), "store.sock")
+
+    ready = multiprocessing.Event()
+    processes = [
+        multiprocessing.Process(
+            target=run_store, args=(args.backend, args.database, store, ready)
+        )
+    ]
+    processes[0].start()
+    if not ready.wait(60):
+        processes[0].terminate()
+        raise SystemExit("The store process did not start")
+    for _ in range(args.workers):
+        processes.append(
+            multiprocessing.Process(
+                target=run_worker,
+                args=(args.host, args.port, store, args.response_cache_ttl),
+            )
+        )
+        processes[-1].start()
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers")
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit())
+    try:
+        wait([process.sentinel for process in processes])
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import functools
+import inspect
+import os
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Set,
+    Tuple,
+    TypeVar,
+    cast,
+)
+
+from petstore import types
+from petstore.database import Database
+from petstore.subscribers import Subscriber
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+ERROR_TYPES = (types.NotFoundError, types.BadRequestError, types.UnexpectedError)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+# Plain ints and floats updated from the event loop thread only, so recording
+# a sample is a couple of increments with no locking.
+resolver_durations: Dict[str, Histogram] = defaultdict(Histogram)
+resolver_errors: Dict[Tuple[str, str], int] = defaultdict(int)
+subscription_messages: Dict[str, int] = defaultdict(int)
+
+
+def measured(resolver: F) -> F:
+    name = resolver.__name__
+    if inspect.isasyncgenfunction(resolver):
+
+        @functools.wraps(resolver)
+        async def subscribe(*args: Any, **kwargs: Any) -> AsyncGenerator[Any, None]:
+            messages = resolver(*args, **kwargs)
+            try:
+                async for message in messages:
+                    subscription_messages[name] += 1
+                    yield message
+            except Exception as error:
+                resolver_errors[name, type(error).__name__] += 1
+                raise
+            finally:
+                await messages.aclose()
+
+        return cast(F, subscribe)
+
+    @functools.wraps(resolver)
+    async def resolve(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            result = await resolver(*args, **kwargs)
+        except Exception as error:
+            resolver_errors[name, type(error).__name__] += 1
+            raise
+        finally:
+            resolver_durations[name].observe(time.perf_counter() - started)
+        if isinstance(result, ERROR_TYPES):
+            resolver_errors[name, type(result).__name__] += 1
+        return result
+
+    return cast(F, resolve)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample(name: str, labels: Labels, value: float) -> str:
+    if not labels:
+        return f"{name} {value}"
+    rendered = ",".join(f'{label}="{_escape(text)}"' for label, text in labels)
+    return f"{name}{{{rendered}}} {value}"
+
+
+def _family(
+    name: str,
+    type: str,
+    help: str,
+    samples: Iterable[Tuple[Labels, float]],
+    worker: Labels,
+) -> List[str]:
+    return [
+        f"# HELP {name} {help}",
+        f"# TYPE {name} {type}",
+        *(_sample(name, (*worker, *labels), value) for labels, value in samples),
+    ]
+
+
+def _histograms(
+    name: str, help: str, histograms: Mapping[str, Histogram], worker: Labels
+) -> List[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+    for resolver, histogram in sorted(histograms.items()):
+        labels: Labels = (*worker, ("resolver", resolver))
+        count = 0
+        for bound, bucket_count in zip(
+            [*map(str, histogram.buckets), "+Inf"], histogram.counts
+        ):
+            count += bucket_count
+            lines.append(_sample(f"{name}_bucket", (*labels, ("le", bound)), count))
+        lines.append(_sample(f"{name}_sum", labels, histogram.sum))
+        lines.append(_sample(f"{name}_count", labels, count))
+    return lines
+
+
+def _subscription_keys(database: Database) -> List[Tuple[str, int, int]]:
+    # Item keys are summed into one series, so the number of series does not
+    # grow with the number of pets being watched. A subscriber to several
+    # pets is counted once.
+    subscribers: Dict[str, Set[Subscriber]] = {}
+    for key, channel in database.subscribers.items():
+        if key.startswith("item/"):
+            key = "item/*"
+        subscribers.setdefault(key, set()).update(channel.subscribers)
+    return [
+        (
+            key,
+            len(key_subscribers),
+            sum(subscriber.backlog()[0] for subscriber in key_subscribers),
+        )
+        for key, key_subscribers in sorted(subscribers.items())
+    ]
+
+
+async def render(database: Database, caches: Mapping[str, Any] = {}) -> str:
+    # Counters live in each process. Under the launcher a scrape reaches any
+    # one worker, so every series is labelled with the worker that served it
+    # and never mixes the counts of two processes.
+    worker: Labels = (("worker", str(os.getpid())),)
+    collection = database.cls.__name__
+    stats = database.subscription_stats()
+    subscription_keys = _subscription_keys(database)
+    lines = [
+        *_histograms(
+            "petstore_resolver_duration_seconds",
+            "Time spent in each resolver.",
+            resolver_durations,
+            worker,
+        ),
+        *_family(
+            "petstore_resolver_errors_total",
+            "counter",
+            "Errors returned or raised by each resolver.",
+            (
+                ((("resolver", resolver), ("error", error)), count)
+                for (resolver, error), count in sorted(resolver_errors.items())
+            ),
+            worker,
+        ),
+        *_family(
+            "petstore_subscription_messages_total",
+            "counter",
+            "Messages sent by each subscription resolver.",
+            (
+                ((("resolver", resolver),), count)
+                for resolver, count in sorted(subscription_messages.items())
+            ),
+            worker,
+        ),
+        *_family(
+            "petstore_store_items",
+            "gauge",
+            "Items stored per collection.",
+            [((("collection", collection),), cast(int, await database.count_items()))],
+            worker,
+        ),
+        *_family(
+            "petstore_events_total",
+            "counter",
+            "Events delivered to subscribers per collection and type.",
+            (
+                ((("collection", collection), ("type", type)), count)
+                for type, count in sorted(database.delivered_events.items())
+            ),
+            worker,
+        ),
+        *_family(
+            "petstore_subscribers",
+            "gauge",
+            "Subscribers per subscription key.",
+            (
+                ((("key", key),), subscribers)
+                for key, subscribers, _ in subscription_keys
+            ),
+            worker,
+        ),
+        *_family(
+            "petstore_subscriber_queued_events",
+            "gauge",
+            "Events waiting for subscribers per subscription key.",
+            (((("key", key),), queued) for key, _, queued in subscription_keys),
+            worker,
+        ),
+        *_family(
+            "petstore_subscriber_max_queue_depth",
+            "gauge",
+            "Events waiting for the furthest behind subscriber.",
+            [((), stats["max_queue_depth"])],
+            worker,
+        ),
+        *_family(
+            "petstore_dropped_events_total",
+            "counter",
+            "Events dropped for slow subscribers.",
+            [((), stats["dropped_events"])],
+            worker,
+        ),
+        *_family(
+            "petstore_disconnected_subscribers_total",
+            "counter",
+            "Subscribers disconnected for falling behind.",
+            [((), stats["disconnected_subscribers"])],
+            worker,
+        ),
+    ]
+    for field, type, help in (
+        ("hits", "counter", "Cache lookups that were found."),
+        ("misses", "counter", "Cache lookups that were not found."),
+        ("size", "gauge", "Entries held in each cache."),
+    ):
+        lines.extend(
+            _family(
+                f"petstore_cache_{field}{'_total' if type == 'counter' else ''}",
+                type,
+                help,
+                (
+                    ((("cache", name),), cache.stats()[field])
+                    for name, cache in sorted(caches.items())
+                ),
+                worker,
+            )
+        )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,308 @@
+import asyncio
+import marshal
+import os
+from petstore import errors
+from petstore.database import Database
+from petstore.events import FRAME, Emission
+from petstore.subscribers import Overflow
+from typing import (
+    Any,
+    AsyncGenerator,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
+
+METHODS = frozenset(
+    {
+        "get_items",
+        "find_items",
+        "create_items",
+        "update_items",
+        "patch_items",
+        "delete_items",
+        "list_items",
+        "list_items_after",
+        "count_items",
+        "search_items",
+        "_exists",
+        "_event_position",
+    }
+)
+
+ERRORS = {
+    error.__name__: error for error in (errors.NotFoundError, errors.BadRequestError)
+}
+
+
+def _frame(message: Tuple) -> bytes:
+    payload = marshal.dumps(message)
+    return FRAME.pack(len(payload)) + payload
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Any:
+    [size] = FRAME.unpack(await reader.readexactly(FRAME.size))
+    return marshal.loads(await reader.readexactly(size))
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+class StoreServer:
+    def __init__(
+        self, database: Database, path: str, max_buffer: int = 16 << 20
+    ) -> None:
+        self.database = database
+        self.path = path
+        self.max_buffer = max_buffer
+        self._writers: Set[asyncio.StreamWriter] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        database.bus.connect(self._broadcast)
+
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._server = await asyncio.start_unix_server(self._serve, self.path)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    def _broadcast(self, emission: Emission) -> None:
+        # Every worker routes the events to its own subscribers, including the
+        # worker that made the change.
+        frame = _frame((0, "emit", _plain(emission)))
+        for writer in list(self._writers):
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                # A worker that stopped reading is cut off rather than
+                # buffered without limit.
+                self._writers.discard(writer)
+                writer.close()
+            else:
+                writer.write(frame)
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._writers.add(writer)
+        handling: Set[asyncio.Task] = set()
+        exports: Dict[int, AsyncGenerator[List[Dict[str, Any]], None]] = {}
+        try:
+            while True:
+                request_id, method, args, kwargs = await _read_frame(reader)
+                task = asyncio.create_task(
+                    self._handle(writer, exports, request_id, method, args, kwargs)
+                )
+                handling.add(task)
+                task.add_done_callback(handling.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+            for export in exports.values():
+                await export.aclose()
+
+    async def _handle(
+        self,
+        writer: asyncio.StreamWriter,
+        exports: Dict[int, AsyncGenerator[List[Dict[str, Any]], None]],
+        request_id: int,
+        method: str,
+        args: List[Any],
+        kwargs: Dict[str, Any],
+    ) -> None:
+        result: Any
+        try:
+            # Exports are pulled a chunk per request, so a worker only holds
+            # the chunk it is writing out.
+            if method == "export_items":
+                exports[request_id] = self.database.export_items(*args, **kwargs)
+                result = request_id
+            elif method == "_export_next":
+                result = await anext(exports[args[0]], None)
+            elif method == "_export_close":
+                export = exports.pop(args[0], None)
+                if export is not None:
+                    await export.aclose()
+                result = None
+            elif method not in METHODS:
+                raise ValueError(f"Unknown method {method!r}")
+            else:
+                result = await getattr(self.database, method)(*args, **kwargs)
+            if isinstance(result, errors.ApiError):
+                response = (request_id, "error", type(result).__name__)
+            else:
+                response = (request_id, "ok", _plain(result))
+        except Exception as error:
+            response = (request_id, "exception", repr(error))
+        if not writer.is_closing():
+            writer.write(_frame(response))
+
+
+class RemoteDatabase(Database):
+    def __init__(self, cls: type, path: str, **kwargs: Any) -> None:
+        super().__init__(cls, **kwargs)
+        self.path = path
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reading: Optional[asyncio.Task] = None
+        self._connecting = asyncio.Lock()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_request = 1
+
+    async def get_items(
+        self, ids: List[str]
+    ) -> List[Dict[str, Any]] | errors.NotFoundError:
+        return await self._call("get_items", ids)
+
+    async def find_items(self, ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        return await self._call("find_items", ids)
+
+    async def create_items(
+        self, items: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]] | errors.BadRequestError:
+        return await self._call("create_items", items)
+
+    async def update_items(
+        self, items: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]] | errors.NotFoundError | errors.BadRequestError:
+        return await self._call("update_items", items)
+
+    async def delete_items(
+        self, ids: List[str]
+    ) -> List[Dict[str, str]] | errors.NotFoundError:
+        return await self._call("delete_items", ids)
+
+    async def patch_items(
+        self, items: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]] | errors.NotFoundError | errors.BadRequestError:
+        return await self._call("patch_items", items)
+
+    async def list_items(
+        self, page: int = 1, size: int = 20, **filters: Any
+    ) -> Dict[str, Any] | errors.BadRequestError:
+        return await self._call("list_items", page, size, **filters)
+
+    async def list_items_after(
+        self, after: Optional[str] = None, first: int = 20
+    ) -> Dict[str, Any] | errors.BadRequestError:
+        return await self._call("list_items_after", after, first)
+
+    async def count_items(self, **filters: Any) -> int | errors.BadRequestError:
+        return await self._call("count_items", **filters)
+
+    async def search_items(
+        self,
+        field: str,
+        prefix: Optional[str] = None,
+        contains: Optional[str] = None,
+        first: int = 20,
+    ) -> List[Dict[str, Any]] | errors.BadRequestError:
+        return await self._call("search_items", field, prefix, contains, first)
+
+    async def export_items(
+        self, chunk_size: int = 1000
+    ) -> AsyncGenerator[List[Dict[str, Any]], None]:
+        export_id = await self._call("export_items", chunk_size)
+        try:
+            while True:
+                items = await self._call("_export_next", export_id)
+                if items is None:
+                    return
+                yield items
+        finally:
+            if self._writer is not None:
+                await self._call("_export_close", export_id)
+
+    async def close(self) -> None:
+        if self._reading is not None:
+            self._reading.cancel()
+        if self._writer is not None:
+            self._writer.close()
+        self._writer = self._reading = None
+        await super().close()
+
+    async def _exists(self, ids: List[str]) -> bool:
+        return await self._call("_exists", ids)
+
+    async def _subscribe(
+        self,
+        keys: List[str],
+        overflow: Optional[Overflow],
+        coalesce_ms: Optional[int],
+        since: Optional[str] = None,
+    ) -> AsyncGenerator[Any, None]:
+        # Events only arrive while connected to the store.
+        await self._connect()
+        async for data in super()._subscribe(keys, overflow, coalesce_ms, since):
+            yield data
+
+    async def _connect(self) -> asyncio.StreamWriter:
+        if self._writer is not None:
+            return self._writer
+        async with self._connecting:
+            if self._writer is None:
+                reader, self._writer = await asyncio.open_unix_connection(self.path)
+                self._reading = asyncio.create_task(self._receive(reader))
+                # Picks up the store's numbering, so cursors handed out by
+                # another worker resume here.
+                self._follow(*await self._call("_event_position"))
+            return self._writer
+
+    def _follow(self, epoch: str, seq: int) -> None:
+        # Events are numbered by the store. Replay only covers a contiguous
+        # run of its numbers, so a gap, from a lost connection or a restarted
+        # store, starts the log afresh.
+        if (epoch, seq) != (self.event_epoch, self.event_seq):
+            self.replay.clear()
+            self.event_epoch, self.event_seq = epoch, seq
+
+    async def _call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        writer = await self._connect()
+        request_id = self._next_request
+        self._next_request += 1
+        response = self._pending[
+            request_id
+        ] = asyncio.get_running_loop().create_future()
+        try:
+            writer.write(_frame((request_id, method, args, kwargs)))
+            return await response
+        finally:
+            del self._pending[request_id]
+
+    async def _receive(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                request_id, status, value = await _read_frame(reader)
+                if status == "emit":
+                    # Routed like local emissions, to subscribers and any other
+                    # receivers on this process's bus.
+                    await self.bus.publish(value)
+                    continue
+                response = self._pending.get(request_id)
+                if response is None or response.done():
+                    continue
+                if status == "ok":
+                    response.set_result(value)
+                elif status == "error":
+                    response.set_result(ERRORS[value]())
+                else:
+                    response.set_exception(RuntimeError(value))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        self._writer = None
+        for response in self._pending.values():
+            if not response.done():
+                response.set_exception(ConnectionError("Lost the store connection"))
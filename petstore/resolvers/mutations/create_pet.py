@@ -2,8 +2,10 @@ from dataclasses import asdict
 from typing import Dict, Any, cast
 from petstore import inputs, responses, types
 from strawberry.types import Info
+from petstore.metrics import measured
 
 
+@measured
 async def create_pet(
     input: inputs.CreatePetInput, info: Info
 ) -> responses.CreatePetResponse:
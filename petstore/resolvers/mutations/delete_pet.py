@@ -2,8 +2,10 @@ import strawberry
 from typing import Dict, cast
 from petstore import responses, types, errors
 from strawberry.types import Info
+from petstore.metrics import measured
 
 
+@measured
 async def delete_pet(id: strawberry.ID, info: Info) -> responses.DeletePetResponse:
     database = info.context["database"]
     try:
@@ -2,8 +2,10 @@ import strawberry
 from typing import List, Dict, cast
 from petstore import responses, types, errors
 from strawberry.types import Info
+from petstore.metrics import measured
 
 
+@measured
 async def delete_pets(
     ids: List[strawberry.ID], info: Info
 ) -> responses.DeletePetsResponse:
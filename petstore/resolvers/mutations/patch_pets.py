@@ -2,8 +2,10 @@ from dataclasses import asdict
 from typing import List, Dict, Any, cast
 from petstore import inputs, responses, types, errors
 from strawberry.types import Info
+from petstore.metrics import measured
 
 
+@measured
 async def patch_pets(
     input: inputs.PatchPetsInput, info: Info
 ) -> responses.PatchPetsResponse:
@@ -1,4 +1,6 @@
 from .get_pet import get_pet  # noqa: F401
 from .get_pets import get_pets  # noqa: F401
 from .list_pets import list_pets  # noqa: F401
+from .list_pets_connection import list_pets_connection  # noqa: F401
 from .count_pets import count_pets  # noqa: F401
+from .search_pets import search_pets  # noqa: F401
@@ -1,13 +1,23 @@
-from petstore import types
+from typing import Optional
+from petstore import types, errors
 from petstore import responses
 from strawberry.types import Info
+from petstore.cache import UNCACHEABLE, collection_tag
+from petstore.metrics import measured
 
 
-async def count_pets(info: Info) -> responses.PetsCountResponse:
+@measured
+async def count_pets(
+    info: Info, category: Optional[str] = None
+) -> responses.PetsCountResponse:
     database = info.context["database"]
     try:
-        count = await database.pets.count_items()
+        count = await database.pets.count_items(category=category)
+        if isinstance(count, errors.BadRequestError):
+            return types.BadRequestError()
+        info.context["cache_tags"].add(collection_tag(types.Pet.__name__))
         return types.PetsCount(count=count)
 
     except Exception:
+        info.context["cache_tags"].add(UNCACHEABLE)
         return types.UnexpectedError()
@@ -1,17 +1,20 @@
 import strawberry
 from petstore import responses
-from petstore import types, errors
+from petstore import types
 from typing import Dict, Any, cast
 from strawberry.types import Info
+from petstore.cache import UNCACHEABLE
+from petstore.metrics import measured
 
 
+@measured
 async def get_pet(id: strawberry.ID, info: Info) -> responses.GetPetResponse:
-    database = info.context["database"]
     try:
-        pet = await database.pets.get_item(id)
-        if isinstance(pet, errors.NotFoundError):
+        pet = await info.context["pets"].load(id)
+        if pet is None:
             return types.NotFoundError()
         else:
             return types.Pet(**cast(Dict[str, Any], pet))
     except Exception:
+        info.context["cache_tags"].add(UNCACHEABLE)
         return types.UnexpectedError()
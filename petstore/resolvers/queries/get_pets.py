@@ -1,15 +1,17 @@
 import strawberry
 from petstore import responses
-from petstore import types, errors
+from petstore import types
 from typing import List, Dict, Any, cast
 from strawberry.types import Info
+from petstore.cache import UNCACHEABLE
+from petstore.metrics import measured
 
 
+@measured
 async def get_pets(ids: List[strawberry.ID], info: Info) -> responses.GetPetsResponse:
-    database = info.context["database"]
     try:
-        pets = await database.pets.get_items(cast(List[str], ids))
-        if isinstance(pets, errors.NotFoundError):
+        pets = await info.context["pets"].load_many(ids)
+        if any(pet is None for pet in pets):
             return types.NotFoundError()
         else:
             return types.Pets(
@@ -17,4 +19,5 @@ async def get_pets(ids: List[strawberry.ID], info: Info) -> responses.GetPetsRes
             )
 
     except Exception:
+        info.context["cache_tags"].add(UNCACHEABLE)
         return types.UnexpectedError()
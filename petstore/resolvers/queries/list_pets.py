@@ -1,16 +1,23 @@
 from dataclasses import asdict
 from petstore import responses
-from petstore import types, inputs
+from petstore import types, inputs, errors
 from typing import List, Dict, Any, cast
 from strawberry.types import Info
+from petstore.cache import UNCACHEABLE, collection_tag
+from petstore.metrics import measured
 
 
+@measured
 async def list_pets(
     input: inputs.ListPetsInput, info: Info
 ) -> responses.ListPetsResponse:
     database = info.context["database"]
     try:
         pets = await database.pets.list_items(**cast(Dict[str, Any], asdict(input)))
+        if isinstance(pets, errors.BadRequestError):
+            return types.BadRequestError()
+        info.context["pets"].prime_many({pet["id"]: pet for pet in pets["items"]})
+        info.context["cache_tags"].add(collection_tag(types.Pet.__name__))
         return types.PetPage(
             page=pets["page"],
             size=pets["size"],
@@ -21,4 +28,5 @@ async def list_pets(
         )
 
     except Exception:
+        info.context["cache_tags"].add(UNCACHEABLE)
         return types.UnexpectedError()
@@ -0,0 +1,39 @@
+from petstore import responses
+from petstore import types, inputs, errors
+from typing import Dict, Any, cast
+from strawberry.types import Info
+from petstore.cache import UNCACHEABLE, collection_tag
+from petstore.metrics import measured
+
+
+@measured
+async def list_pets_connection(
+    input: inputs.ListPetsConnectionInput, info: Info
+) -> responses.ListPetsConnectionResponse:
+    database = info.context["database"]
+    try:
+        connection = await database.pets.list_items_after(
+            after=input.after,
+            first=20 if input.first is None else input.first,
+        )
+        if isinstance(connection, errors.BadRequestError):
+            return types.BadRequestError()
+        connection = cast(Dict[str, Any], connection)
+        info.context["cache_tags"].add(collection_tag(types.Pet.__name__))
+        info.context["pets"].prime_many(
+            {edge["node"]["id"]: edge["node"] for edge in connection["edges"]}
+        )
+        return types.PetConnection(
+            edges=[
+                types.PetEdge(cursor=edge["cursor"], node=types.Pet(**edge["node"]))
+                for edge in connection["edges"]
+            ],
+            page_info=types.PageInfo(
+                end_cursor=connection["end_cursor"],
+                has_next_page=connection["has_next_page"],
+            ),
+        )
+
+    except Exception:
+        info.context["cache_tags"].add(UNCACHEABLE)
+        return types.UnexpectedError()
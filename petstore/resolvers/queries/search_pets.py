@@ -0,0 +1,31 @@
+from petstore import responses
+from petstore import types, errors
+from typing import List, Dict, Any, Optional, cast
+from strawberry.types import Info
+from petstore.cache import UNCACHEABLE, collection_tag
+from petstore.metrics import measured
+
+
+@measured
+async def search_pets(
+    info: Info,
+    name_prefix: Optional[str] = None,
+    name_contains: Optional[str] = None,
+    first: int = 20,
+) -> responses.SearchPetsResponse:
+    database = info.context["database"]
+    try:
+        pets = await database.pets.search_items(
+            "name", prefix=name_prefix, contains=name_contains, first=first
+        )
+        if isinstance(pets, errors.BadRequestError):
+            return types.BadRequestError()
+        info.context["pets"].prime_many({pet["id"]: pet for pet in pets})
+        info.context["cache_tags"].add(collection_tag(types.Pet.__name__))
+        return types.Pets(
+            pets=[types.Pet(**pet) for pet in cast(List[Dict[str, Any]], pets)]
+        )
+
+    except Exception:
+        info.context["cache_tags"].add(UNCACHEABLE)
+        return types.UnexpectedError()
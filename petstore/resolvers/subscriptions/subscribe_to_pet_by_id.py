@@ -1,14 +1,26 @@
 import strawberry
 from petstore import types, responses
 from strawberry.types import Info
+from typing import Optional
+from petstore.metrics import measured
 
 
+@measured
 async def subscribe_to_pet_by_id(
-    id: strawberry.ID, info: Info
+    id: strawberry.ID,
+    info: Info,
+    coalesce_ms: Optional[int] = None,
+    since: Optional[str] = None,
 ) -> responses.SubscribeToPetByIdResponse:
     database = info.context["database"]
-    async for message in database.pets.subscribe_to_item_by_id(id):
+    async for message in database.pets.subscribe_to_item_by_id(
+        id, coalesce_ms=coalesce_ms, since=since
+    ):
         if message["type"] == "update":
-            yield types.PetUpdateMessage(**message["data"])
+            yield types.PetUpdateMessage(
+                **message["data"], seq=message["seq"], cursor=message["cursor"]
+            )
         elif message["type"] == "delete":
-            yield types.PetDeleteMessage(**message["data"])
+            yield types.PetDeleteMessage(
+                **message["data"], seq=message["seq"], cursor=message["cursor"]
+            )
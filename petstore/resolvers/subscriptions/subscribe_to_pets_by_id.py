@@ -1,15 +1,26 @@
 import strawberry
 from strawberry.types import Info
-from typing import List, cast
+from typing import List, Optional, cast
 from petstore import types, responses
+from petstore.metrics import measured
 
 
+@measured
 async def subscribe_to_pets_by_id(
-    ids: List[strawberry.ID], info: Info
+    ids: List[strawberry.ID],
+    info: Info,
+    coalesce_ms: Optional[int] = None,
+    since: Optional[str] = None,
 ) -> responses.SubscribeToPetsByIdResponse:
     database = info.context["database"]
-    async for message in database.pets.subscribe_to_items_by_id(cast(List[str], ids)):
+    async for message in database.pets.subscribe_to_items_by_id(
+        cast(List[str], ids), coalesce_ms=coalesce_ms, since=since
+    ):
         if message["type"] == "update":
-            yield types.PetUpdateMessage(**message["data"])
+            yield types.PetUpdateMessage(
+                **message["data"], seq=message["seq"], cursor=message["cursor"]
+            )
         elif message["type"] == "delete":
-            yield types.PetDeleteMessage(**message["data"])
+            yield types.PetDeleteMessage(
+                **message["data"], seq=message["seq"], cursor=message["cursor"]
+            )
@@ -1,13 +1,29 @@
 from strawberry.types import Info
+from typing import Optional
 from petstore import types, responses
+from petstore.metrics import measured
 
 
+@measured
 async def subscribe_to_pets_list(
     info: Info,
+    coalesce_ms: Optional[int] = None,
+    category: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    since: Optional[str] = None,
 ) -> responses.SubscribeToPetsListResponse:
     database = info.context["database"]
-    async for message in database.pets.subscribe_to_list():
+    async for message in database.pets.subscribe_to_list(
+        coalesce_ms=coalesce_ms,
+        since=since,
+        category=category,
+        name_prefix=name_prefix,
+    ):
         if message["type"] == "create":
-            yield types.PetCreateMessage(**message["data"])
+            yield types.PetCreateMessage(
+                **message["data"], seq=message["seq"], cursor=message["cursor"]
+            )
         elif message["type"] == "delete":
-            yield types.PetDeleteMessage(**message["data"])
+            yield types.PetDeleteMessage(
+                **message["data"], seq=message["seq"], cursor=message["cursor"]
+            )
@@ -62,11 +62,25 @@ DeletePetsResponse = Union[
 ListPetsResponse = Union[
     types.PetPage,
     types.UnexpectedError,
+    types.BadRequestError,
+]
+
+ListPetsConnectionResponse = Union[
+    types.PetConnection,
+    types.UnexpectedError,
+    types.BadRequestError,
+]
+
+SearchPetsResponse = Union[
+    types.Pets,
+    types.UnexpectedError,
+    types.BadRequestError,
 ]
 
 PetsCountResponse = Union[
     types.PetsCount,
     types.UnexpectedError,
+    types.BadRequestError,
 ]
 
 SubscribeToPetByIdResponse = AsyncGenerator[
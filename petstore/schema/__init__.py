@@ -0,0 +1,15 @@
+import strawberry
+from petstore.cache import ResponseCaching
+from petstore.documents import DocumentCache
+from petstore.schema.mutation import Mutation
+from petstore.schema.query import Query
+from petstore.schema.subscription import Subscription
+
+documents = DocumentCache(maxsize=1000)
+
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    subscription=Subscription,
+    extensions=[documents, ResponseCaching],
+)
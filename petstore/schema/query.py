@@ -14,6 +14,12 @@ class Query:
     list_pets: responses.ListPetsResponse = strawberry.field(
         resolver=queries.list_pets,
     )
+    list_pets_connection: responses.ListPetsConnectionResponse = strawberry.field(
+        resolver=queries.list_pets_connection,
+    )
     count_pets: responses.PetsCountResponse = strawberry.field(
         resolver=queries.count_pets,
     )
+    search_pets: responses.SearchPetsResponse = strawberry.field(
+        resolver=queries.search_pets,
+    )
@@ -0,0 +1,113 @@
+import asyncio
+from petstore import errors
+from typing import Any, Dict, List, Literal, Optional, Set, Tuple, get_args
+
+Overflow = Literal["drop_oldest", "coalesce", "disconnect"]
+
+Entry = Tuple[int, Dict[str, Any]]
+
+
+class Channel:
+    def __init__(self, capacity: int = 1000) -> None:
+        self.capacity = capacity
+        self.head = 0
+        self.subscribers: Set["Subscriber"] = set()
+        self.waiters: Set[asyncio.Future] = set()
+        self._ring: List[Entry] = []
+        self._waking = False
+
+    def publish(self, entries: List[Entry]) -> None:
+        for entry in entries:
+            if len(self._ring) < self.capacity:
+                self._ring.append(entry)
+            else:
+                self._ring[self.head % self.capacity] = entry
+            self.head += 1
+        # Subscribers are woken on a later loop iteration, so publishing costs
+        # the same no matter how many of them are waiting.
+        if self.waiters and not self._waking:
+            self._waking = True
+            asyncio.get_running_loop().call_soon(self._wake)
+
+    def read(self, cursor: int) -> List[Entry]:
+        return [self._ring[seq % self.capacity] for seq in range(cursor, self.head)]
+
+    def _wake(self) -> None:
+        self._waking = False
+        for waiter in self.waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self.waiters.clear()
+
+
+class Subscriber:
+    def __init__(
+        self,
+        channels: List[Channel],
+        overflow: Overflow = "drop_oldest",
+        coalesce_ms: Optional[int] = None,
+    ) -> None:
+        if overflow not in get_args(Overflow):
+            raise ValueError(f"Unknown overflow policy {overflow!r}")
+        self.overflow = overflow
+        self.coalesce_ms = coalesce_ms
+        self.cursors = {channel: channel.head for channel in channels}
+        self.dropped = 0
+        self.disconnected = False
+
+    def backlog(self) -> Tuple[int, int]:
+        queued = overflowed = 0
+        if self.disconnected:
+            return queued, overflowed
+        for channel, cursor in self.cursors.items():
+            lag = channel.head - cursor
+            queued += min(lag, channel.capacity)
+            overflowed += max(lag - channel.capacity, 0)
+        if overflowed and self.overflow == "disconnect":
+            return 0, queued + overflowed
+        return queued, overflowed
+
+    async def get(self) -> List[Dict[str, Any]]:
+        while True:
+            events = self._read()
+            if events:
+                if self.coalesce_ms:
+                    # Whatever else arrives within the window is merged into
+                    # these events, leaving the final state of each item.
+                    await asyncio.sleep(self.coalesce_ms / 1000)
+                    events = coalesce([*events, *self._read()])
+                return events
+            waiter = asyncio.get_running_loop().create_future()
+            for channel in self.cursors:
+                channel.waiters.add(waiter)
+            try:
+                await waiter
+            finally:
+                for channel in self.cursors:
+                    channel.waiters.discard(waiter)
+
+    def _read(self) -> List[Dict[str, Any]]:
+        if self.disconnected:
+            raise errors.SlowConsumerError()
+        queued, overflowed = self.backlog()
+        if overflowed and self.overflow == "disconnect":
+            self.dropped += overflowed
+            self.disconnected = True
+            raise errors.SlowConsumerError()
+        entries: List[Entry] = []
+        for channel, cursor in self.cursors.items():
+            entries.extend(channel.read(max(cursor, channel.head - channel.capacity)))
+            self.cursors[channel] = channel.head
+        if len(self.cursors) > 1:
+            entries.sort(key=lambda entry: entry[0])
+        events = [event for _, event in entries]
+        if overflowed and self.overflow == "coalesce":
+            events = coalesce(events)
+        self.dropped += overflowed + queued - len(events)
+        return events
+
+
+def coalesce(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Only the latest event per item survives, in its own position.
+    latest = {event["data"]["id"]: i for i, event in enumerate(events)}
+    return [event for i, event in enumerate(events) if latest[event["data"]["id"]] == i]
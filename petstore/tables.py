@@ -0,0 +1,302 @@
+import asyncio
+import dataclasses
+import json
+import sqlite3
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+Write = Tuple[str, Optional[Mapping[str, Any]]]
+
+
+class Table(Protocol):
+    copy_on_read: bool
+
+    def get_many(self, ids: Sequence[str]) -> List[Optional[Mapping[str, Any]]]:
+        ...
+
+    def write_many(self, writes: Sequence[Write]) -> None:
+        ...
+
+    def items(self) -> Iterable[Tuple[str, Mapping[str, Any]]]:
+        ...
+
+    # A write that has started is finished even when the caller is
+    # cancelled, so the cancellation never hides a write that was kept.
+    async def run(self, method: Callable[..., T], *args: Any) -> T:
+        ...
+
+    # Waits until every write run so far is durable.
+    async def sync(self) -> None:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+async def finish(future: "asyncio.Future[T]") -> T:
+    # Waits through cancellation for work that carries on regardless, then
+    # passes the cancellation on if the work succeeded.
+    cancelled: Optional[asyncio.CancelledError] = None
+    while not future.done():
+        try:
+            await asyncio.shield(future)
+        except asyncio.CancelledError as error:
+            cancelled = error
+    result = future.result()
+    if cancelled is not None:
+        raise cancelled
+    return result
+
+
+def get_many(
+    table: MutableMapping[str, Mapping[str, Any]], ids: Sequence[str]
+) -> List[Optional[Mapping[str, Any]]]:
+    return [table[id] if id in table else None for id in ids]
+
+
+def write_many(
+    table: MutableMapping[str, Mapping[str, Any]], writes: Sequence[Write]
+) -> None:
+    undo: List[Write] = []
+    try:
+        for id, item in writes:
+            undo.append((id, table[id] if id in table else None))
+            if item is None:
+                del table[id]
+            else:
+                table[id] = item
+    except BaseException:
+        for id, item in reversed(undo):
+            if item is None:
+                table.pop(id, None)
+            else:
+                table[id] = item
+        raise
+
+
+class DictTable(Dict[str, Mapping[str, Any]]):
+    copy_on_read = True
+
+    def __init__(self, cls: type) -> None:
+        super().__init__()
+
+    def get_many(self, ids: Sequence[str]) -> List[Optional[Mapping[str, Any]]]:
+        return get_many(self, ids)
+
+    def write_many(self, writes: Sequence[Write]) -> None:
+        write_many(self, writes)
+
+    async def run(self, method: Callable[..., T], *args: Any) -> T:
+        return method(*args)
+
+    async def sync(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class FrozenTable(DictTable):
+    copy_on_read = False
+
+    def __setitem__(self, id: str, item: Mapping[str, Any]) -> None:
+        super().__setitem__(id, MappingProxyType(dict(item)))
+
+
+class CompactTable(MutableMapping[str, Mapping[str, Any]]):
+    copy_on_read = False
+
+    def __init__(self, cls: type, interned: Sequence[str] = ("category",)) -> None:
+        self.fields = tuple(
+            field.name for field in dataclasses.fields(cls) if field.name != "id"
+        )
+        self.interned = frozenset(interned)
+        self.row = type(f"{cls.__name__}Row", (), {"__slots__": self.fields})
+        self.rows: Dict[bytes, Any] = {}
+
+    def __getitem__(self, id: str) -> Dict[str, Any]:
+        row = self.rows[self._pack_id(id)]
+        item = {"id": id}
+        for field in self.fields:
+            if hasattr(row, field):
+                item[field] = getattr(row, field)
+        return item
+
+    def __setitem__(self, id: str, item: Mapping[str, Any]) -> None:
+        row = self.row()
+        for field in self.fields:
+            if field in item:
+                value = item[field]
+                if field in self.interned and isinstance(value, str):
+                    value = sys.intern(value)
+                setattr(row, field, value)
+        self.rows[self._pack_id(id)] = row
+
+    def __delitem__(self, id: str) -> None:
+        del self.rows[self._pack_id(id)]
+
+    def __contains__(self, id: object) -> bool:
+        try:
+            return self._pack_id(id) in self.rows
+        except KeyError:
+            return False
+
+    def __iter__(self) -> Iterator[str]:
+        for packed_id in self.rows:
+            yield str(uuid.UUID(bytes=packed_id))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def get_many(self, ids: Sequence[str]) -> List[Optional[Mapping[str, Any]]]:
+        return get_many(self, ids)
+
+    def write_many(self, writes: Sequence[Write]) -> None:
+        write_many(self, writes)
+
+    async def run(self, method: Callable[..., T], *args: Any) -> T:
+        return method(*args)
+
+    async def sync(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def _pack_id(self, id: object) -> bytes:
+        try:
+            return uuid.UUID(str(id)).bytes
+        except ValueError:
+            raise KeyError(id)
+
+
+class SqliteTable:
+    copy_on_read = False
+
+    def __init__(self, cls: type, path: str, readers: int = 4) -> None:
+        self.path = path
+        self.fields = tuple(
+            field.name for field in dataclasses.fields(cls) if field.name != "id"
+        )
+        self._connections: List[sqlite3.Connection] = []
+        self._local = threading.local()
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="sqlite-writer")
+        self._readers = ThreadPoolExecutor(readers, thread_name_prefix="sqlite-reader")
+
+        name = f'"{cls.__name__}"'
+        columns = ", ".join(f'"{field}"' for field in self.fields)
+        self._select_all = f"SELECT id, {columns} FROM {name} ORDER BY seq"
+        # A single json_each parameter keeps one prepared statement for any
+        # number of ids.
+        self._select_many = (
+            f"SELECT id, {columns} FROM {name}"
+            " WHERE id IN (SELECT value FROM json_each(?))"
+        )
+        self._upsert = (
+            f"INSERT INTO {name} (id, {columns})"
+            f" VALUES (?, {', '.join('?' for _ in self.fields)})"
+            " ON CONFLICT(id) DO UPDATE SET "
+            + ", ".join(f'"{field}" = excluded."{field}"' for field in self.fields)
+        )
+        self._delete = f"DELETE FROM {name} WHERE id = ?"
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {name}"
+            f" (seq INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, {columns})"
+        )
+
+    def get_many(self, ids: Sequence[str]) -> List[Optional[Mapping[str, Any]]]:
+        rows = self._connection().execute(self._select_many, (json.dumps(ids),))
+        items = {row[0]: self._item(row) for row in rows}
+        return [items.get(id) for id in ids]
+
+    def write_many(self, writes: Sequence[Write]) -> None:
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            start = 0
+            while start < len(writes):
+                deleting = writes[start][1] is None
+                stop = start
+                while stop < len(writes) and (writes[stop][1] is None) == deleting:
+                    stop += 1
+                if deleting:
+                    connection.executemany(
+                        self._delete, [(id,) for id, _ in writes[start:stop]]
+                    )
+                else:
+                    connection.executemany(
+                        self._upsert,
+                        [
+                            (id, *(item.get(field) for field in self.fields))
+                            for id, item in writes[start:stop]
+                            if item is not None
+                        ],
+                    )
+                start = stop
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def items(self) -> Iterator[Tuple[str, Mapping[str, Any]]]:
+        for row in self._connection().execute(self._select_all):
+            yield row[0], self._item(row)
+
+    async def run(self, method: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        if method != self.write_many:
+            return await loop.run_in_executor(self._readers, method, *args)
+        return await finish(loop.run_in_executor(self._writer, method, *args))
+
+    async def sync(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self._writer.shutdown()
+        self._readers.shutdown()
+        for connection in self._connections:
+            connection.close()
+        self._connections.clear()
+
+    def _connection(self) -> sqlite3.Connection:
+        if not hasattr(self._local, "connection"):
+            connection = sqlite3.connect(
+                self.path,
+                isolation_level=None,
+                check_same_thread=False,
+                cached_statements=64,
+            )
+            connection.execute("PRAGMA synchronous = NORMAL")
+            self._local.connection = connection
+            self._connections.append(connection)
+        return self._local.connection
+
+    def _item(self, row: Tuple[Any, ...]) -> Dict[str, Any]:
+        item = {"id": row[0]}
+        for field, value in zip(self.fields, row[1:]):
+            if value is not None:
+                item[field] = value
+        return item
@@ -1,5 +1,5 @@
 import strawberry
-from typing import List
+from typing import List, Optional
 
 
 @strawberry.type
@@ -22,6 +22,24 @@ class PetPage:
     total_pages: int
 
 
+@strawberry.type
+class PetEdge:
+    cursor: str
+    node: Pet
+
+
+@strawberry.type
+class PageInfo:
+    end_cursor: Optional[str]
+    has_next_page: bool
+
+
+@strawberry.type
+class PetConnection:
+    edges: List[PetEdge]
+    page_info: PageInfo
+
+
 @strawberry.type
 class PetsCount:
     count: int
@@ -39,17 +57,20 @@ class Pets:
 
 @strawberry.type
 class PetCreateMessage(Pet):
-    pass
+    seq: Optional[int] = None
+    cursor: Optional[str] = None
 
 
 @strawberry.type
 class PetUpdateMessage(Pet):
-    pass
+    seq: Optional[int] = None
+    cursor: Optional[str] = None
 
 
 @strawberry.type
 class PetDeleteMessage(DeletedPet):
-    pass
+    seq: Optional[int] = None
+    cursor: Optional[str] = None
 
 
 @strawberry.type
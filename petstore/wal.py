@@ -0,0 +1,339 @@
+import asyncio
+import gc
+import marshal
+import mmap
+import os
+import struct
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    cast,
+)
+
+from petstore.tables import DictTable, Write
+
+T = TypeVar("T")
+
+# Every frame is its payload length and CRC32, a CRC32 of those two, and a
+# marshalled list of writes. A frame is only skipped when its checked header
+# says where the next one starts, so replay never looks for frames inside a
+# payload, which holds user data.
+HEADER = struct.Struct("<II")
+FRAME = struct.Struct("<III")
+
+
+class WalTable:
+    def __init__(
+        self,
+        cls: type,
+        path: str,
+        table: Callable[[type], Any] = DictTable,
+        fsync: str = "interval",
+        fsync_interval: float = 1.0,
+        segment_bytes: int = 64 << 20,
+    ) -> None:
+        if fsync not in ("always", "interval", "never"):
+            raise ValueError(f"Unknown fsync policy {fsync!r}")
+        self.path = path
+        self.table = table(cls)
+        self.copy_on_read = self.table.copy_on_read
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.segment_bytes = segment_bytes
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="wal-writer")
+        self._snapshotter = ThreadPoolExecutor(1, thread_name_prefix="wal-snapshot")
+        self._snapshot: Optional[Future] = None
+        self._sync_timer: Optional[threading.Timer] = None
+        self._failure: Optional[BaseException] = None
+        # Frames appended and known durable, for fsync="always" group commit.
+        self._appended = self._synced = 0
+        self._syncing: Optional[asyncio.Future] = None
+
+        os.makedirs(path, exist_ok=True)
+        self._segment = self._load()
+        self._log = self._open_segment(self._segment)
+        self._segment_size = self._log.tell()
+        self._synced_at = (self._segment, self._segment_size)
+
+    def get_many(self, ids: Sequence[str]) -> List[Optional[Mapping[str, Any]]]:
+        return self.table.get_many(ids)
+
+    def write_many(self, writes: Sequence[Write]) -> None:
+        self._write(writes, sync=self.fsync == "always")
+
+    def items(self) -> Iterable[Tuple[str, Mapping[str, Any]]]:
+        return self.table.items()
+
+    async def run(self, method: Callable[..., T], *args: Any) -> T:
+        if method != self.write_many:
+            return method(*args)
+        # Left to sync(), which the caller awaits once other writes can go
+        # ahead, so one fsync covers all of them.
+        [writes] = args
+        self._write(writes, sync=False)
+        return cast(T, None)
+
+    async def sync(self) -> None:
+        if self.fsync != "always":
+            return
+        appended = self._appended
+        while self._synced < appended:
+            self._check()
+            if self._syncing is None:
+                self._syncing = asyncio.ensure_future(self._sync_appended())
+            # Shielded, because the fsync is shared with other writes.
+            await asyncio.shield(self._syncing)
+
+    def close(self) -> None:
+        if self._sync_timer is not None:
+            self._sync_timer.cancel()
+        self._writer.shutdown()
+        self._snapshotter.shutdown()
+        self._close_segment(self._log)
+        self.table.close()
+
+    def snapshot(self) -> None:
+        if self._snapshot is not None:
+            self._snapshot.result()
+        self._rotate()
+        self._write_snapshot(self._segment, list(self.table.items()))
+
+    def _write(self, writes: Sequence[Write], sync: bool) -> None:
+        self._check()
+        undo = self._apply(writes)
+        start = self._segment_size
+        try:
+            self._append(writes)
+            if sync:
+                self._sync(self._log)
+        except BaseException:
+            self._discard(start)
+            self.table.write_many(undo)
+            raise
+        if sync:
+            self._synced = self._appended
+            self._synced_at = (self._segment, self._segment_size)
+        self._written()
+
+    async def _sync_appended(self) -> None:
+        appended = self._appended
+        position = (self._segment, self._segment_size)
+        try:
+            await asyncio.wrap_future(self._writer.submit(self._sync, self._log))
+            self._check()
+        except Exception:
+            # Nothing since the last good fsync is known to be durable, so it
+            # is cut off rather than come back on restart. A cancelled wait,
+            # as at shutdown, leaves the fsync to finish in the writer.
+            segment, size = self._synced_at
+            self._discard(size if segment == self._segment else 0)
+            raise
+        finally:
+            self._syncing = None
+        self._synced = appended
+        self._synced_at = position
+
+    def _apply(self, writes: Sequence[Write]) -> List[Write]:
+        ids = [id for id, _ in writes]
+        undo = list(reversed(list(zip(ids, self.table.get_many(ids)))))
+        self.table.write_many(writes)
+        return undo
+
+    def _check(self) -> None:
+        if self._failure is not None:
+            raise OSError("The write-ahead log failed; restart to recover") from (
+                self._failure
+            )
+
+    def _append(self, writes: Sequence[Write]) -> None:
+        payload = marshal.dumps(
+            [(id, None if item is None else dict(item)) for id, item in writes]
+        )
+        frame = memoryview(self._frame(payload))
+        # Unbuffered, so a failed write leaves nothing behind to be flushed
+        # later and the frame can be cut off again.
+        while frame:
+            written = self._log.write(frame)
+            frame = frame[written:]
+        self._segment_size += FRAME.size + len(payload)
+        self._appended += 1
+
+    def _discard(self, start: int) -> None:
+        # A failed write must not come back on restart, so its frame is cut
+        # off. If even that fails the log no longer matches the table.
+        try:
+            os.ftruncate(self._log.fileno(), start)
+            self._segment_size = start
+        except BaseException as error:
+            self._failure = error
+
+    def _written(self) -> None:
+        if self.fsync == "interval" and self._sync_timer is None:
+            # Synced by a timer rather than by the next write, so a crash loses
+            # at most one interval of writes even once writes stop.
+            self._sync_timer = threading.Timer(self.fsync_interval, self._sync_soon)
+            self._sync_timer.daemon = True
+            self._sync_timer.start()
+        if self._segment_size >= self.segment_bytes and not self._snapshotting():
+            # The snapshot is taken after this batch, so it covers every frame
+            # in the segments before the new one.
+            self._rotate()
+            self._snapshot = self._snapshotter.submit(
+                self._write_snapshot, self._segment, list(self.table.items())
+            )
+
+    def _sync_soon(self) -> None:
+        # Cleared before the sync is queued, so a write landing after it
+        # starts another timer.
+        self._sync_timer = None
+        try:
+            self._writer.submit(self._sync, self._log)
+        except RuntimeError:
+            # Closed meanwhile, which syncs the log itself.
+            pass
+
+    def _snapshotting(self) -> bool:
+        return self._snapshot is not None and not self._snapshot.done()
+
+    def _sync(self, log: BinaryIO) -> None:
+        if log.closed:
+            return
+        try:
+            os.fsync(log.fileno())
+        except BaseException as error:
+            # After a failed fsync the kernel may have dropped the dirty
+            # pages, so nothing written since the last good one is safe.
+            self._failure = error
+            raise
+
+    def _open_segment(self, segment: int) -> BinaryIO:
+        return cast(BinaryIO, open(self._segment_path(segment), "ab", buffering=0))
+
+    def _close_segment(self, log: BinaryIO) -> None:
+        if self.fsync != "never":
+            self._sync(log)
+        log.close()
+
+    def _rotate(self) -> None:
+        log = self._log
+        self._segment += 1
+        self._segment_size = 0
+        self._log = self._open_segment(self._segment)
+        # Queued behind any pending fsync of the old segment.
+        self._writer.submit(self._close_segment, log)
+
+    def _write_snapshot(
+        self, segment: int, items: List[Tuple[str, Mapping[str, Any]]]
+    ) -> None:
+        path = os.path.join(self.path, "snapshot")
+        with open(f"{path}.tmp", "wb") as file:
+            marshal.dump((segment, [(id, dict(item)) for id, item in items]), file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(f"{path}.tmp", path)
+        for old_segment in self._segments():
+            if old_segment < segment:
+                os.remove(self._segment_path(old_segment))
+
+    def _load(self) -> int:
+        # Loaded pets never form cycles, so collecting while millions of them
+        # are allocated only costs time. The collector is left as it was.
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._replay()
+        finally:
+            if enabled:
+                gc.enable()
+
+    def _replay(self) -> int:
+        segment = 0
+        path = os.path.join(self.path, "snapshot")
+        if os.path.exists(path):
+            with open(path, "rb") as file, mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as view:
+                segment, items = marshal.loads(view)
+            for id, item in items:
+                self.table[id] = item
+        segments = [
+            old_segment for old_segment in self._segments() if old_segment >= segment
+        ]
+        for old_segment in segments:
+            for writes in self._read_segment(old_segment):
+                for id, item in writes:
+                    if item is None:
+                        self.table.pop(id, None)
+                    else:
+                        self.table[id] = item
+        return segments[-1] if segments else segment
+
+    def _read_segment(self, segment: int) -> Iterator[List[Write]]:
+        path = self._segment_path(segment)
+        if not os.path.getsize(path):
+            return
+        with open(path, "r+b") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                offset = 0
+                while offset < len(view):
+                    frame = self._frame_at(view, offset)
+                    if frame is None:
+                        break
+                    payload, stop = frame
+                    if payload is None and stop == len(view):
+                        # Nothing follows the damaged frame: a torn tail.
+                        break
+                    if payload is not None:
+                        yield marshal.loads(payload)
+                    # A damaged payload is skipped, so the writes
+                    # acknowledged after it survive.
+                    offset = stop
+                torn = offset < len(view)
+            if torn:
+                file.truncate(offset)
+
+    @staticmethod
+    def _frame(payload: bytes) -> bytes:
+        size_and_crc = (len(payload), zlib.crc32(payload))
+        header_crc = zlib.crc32(HEADER.pack(*size_and_crc))
+        return FRAME.pack(*size_and_crc, header_crc) + payload
+
+    def _frame_at(
+        self, view: mmap.mmap, offset: int
+    ) -> Optional[Tuple[Optional[bytes], int]]:
+        # The payload, None if it is damaged, and where the next frame starts;
+        # None if the header itself cannot be trusted or runs past the end.
+        if offset + FRAME.size > len(view):
+            return None
+        size, crc, header_crc = FRAME.unpack_from(view, offset)
+        header_end = offset + HEADER.size
+        if zlib.crc32(view[offset:header_end]) != header_crc:
+            return None
+        start = offset + FRAME.size
+        stop = start + size
+        if not size or stop > len(view):
+            return None
+        payload = view[start:stop]
+        return (payload if zlib.crc32(payload) == crc else None), stop
+
+    def _segments(self) -> List[int]:
+        return sorted(
+            int(name[4:])
+            for name in os.listdir(self.path)
+            if name.startswith("log-") and name[4:].isdigit()
+        )
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f"log-{segment:08d}")
@@ -1,5 +1,8 @@
 import os
+import sys
+import socket
 import asyncio
+import aiohttp
 import pytest
 import pytest_asyncio
 import websockets
@@ -11,7 +14,6 @@ from types import TracebackType
 from gql import gql, Client
 from gql.transport.aiohttp import AIOHTTPTransport
 from aiohttp.test_utils import TestServer
-from petstore import types
 from petstore.app import create_app, PetsDatabase
 from petstore.database import Database
 from typing import (
@@ -24,6 +26,7 @@ from typing import (
     Callable,
     Awaitable,
     Generator,
+    AsyncGenerator,
     List,
     cast,
 )
@@ -31,7 +34,7 @@ from typing import (
 
 @pytest.fixture
 def database() -> Generator[Database, None, None]:
-    database = Database(types.Pet)
+    database = PetsDatabase.create().pets
     yield database
 
     if os.environ.get("DEBUG"):
@@ -42,7 +45,7 @@ def database() -> Generator[Database, None, None]:
 async def server(
     aiohttp_server: Callable[..., Awaitable[TestServer]],
 ) -> TestServer:
-    return await aiohttp_server(create_app(PetsDatabase(pets=Database(types.Pet))))
+    return await aiohttp_server(create_app(PetsDatabase.create()))
 
 
 @pytest_asyncio.fixture
@@ -57,12 +60,52 @@ async def broken_server(
     return await aiohttp_server(create_app(broken_database))
 
 
+@pytest_asyncio.fixture
+async def spawn_server() -> AsyncGenerator[Callable[..., Awaitable[str]], None]:
+    processes: List[asyncio.subprocess.Process] = []
+
+    async def spawn(args: List[str], env: Optional[Dict[str, str]] = None) -> str:
+        # Runs Python with args and a free port appended, and returns the
+        # GraphQL url once the server answers.
+        with socket.socket() as free_socket:
+            free_socket.bind(("127.0.0.1", 0))
+            port = free_socket.getsockname()[1]
+        processes.append(
+            await asyncio.create_subprocess_exec(
+                sys.executable,
+                *args,
+                str(port),
+                env={**os.environ, **(env or {})},
+                stdout=asyncio.subprocess.DEVNULL,
+            )
+        )
+        url = f"http://127.0.0.1:{port}/graphql"
+        async with aiohttp.ClientSession() as session:
+            for _ in range(200):
+                try:
+                    async with session.get(url, headers={"Accept": "text/html"}):
+                        return url
+                except aiohttp.ClientConnectionError:
+                    await asyncio.sleep(0.05)
+        raise TimeoutError(f"Server on port {port} did not start")
+
+    yield spawn
+
+    for process in processes:
+        process.terminate()
+        await process.wait()
+
+
 @pytest_asyncio.fixture
 async def client(
     server: TestServer,
 ) -> Callable:
     transport = AIOHTTPTransport(url=f"http://localhost:{server.port}/graphql")
     api_client = Client(transport=transport, fetch_schema_from_transport=True)
+    # Fetch the schema up front, so introspection does not hold up the first
+    # query of a test that races a subscription's receive timeout.
+    async with api_client:
+        pass
 
     async def run_api_query(
         raw_query: str, variable_values: Dict[str, Any] = {}
@@ -101,13 +144,9 @@ class SubscriptionMessagesListener:
         pass
 
     async def wait_for_messages(self: Self) -> List[Dict[str, Any]]:
-        await asyncio.sleep(0.3)
-        exception = self._subscription.exception()
-        if exception:
-            raise exception
-        messages = self._subscription.result()
-        self._subscription.cancel()
-        return messages
+        # Waits for the client to stop receiving rather than for a fixed time,
+        # so a late message is not mistaken for a missing one.
+        return await asyncio.wait_for(self._subscription, timeout=10)
 
 
 @pytest_asyncio.fixture
@@ -127,6 +166,7 @@ def subscription_client(
     async def start_api_subscription(
         query: str,
         variable_values: Dict[str, Any] = {},
+        receive_timeout: float = 0.2,
     ) -> List[Dict[str, Any]]:
         messages: List[Dict[str, Any]] = []
 
@@ -152,7 +192,9 @@ def subscription_client(
             while True:
                 message = None
                 try:
-                    message = await asyncio.wait_for(websocket.recv(), timeout=0.2)
+                    message = await asyncio.wait_for(
+                        websocket.recv(), timeout=receive_timeout
+                    )
                 except asyncio.TimeoutError:
                     break
                 message = json.loads(message)
@@ -0,0 +1,63 @@
+import aiohttp
+import json
+import pyarrow as pa
+import pytest
+from aiohttp.test_utils import TestServer
+from typing import Callable
+
+
+@pytest.mark.asyncio
+async def test_exports_pets_as_ndjson(client: Callable, server: TestServer) -> None:
+    created_pets = await client(
+        """
+        mutation CreatePets($input: CreatePetsInput!) {
+            createPets(input: $input) { ... on Pets { pets { id name category } } }
+        }
+        """,
+        {
+            "input": {
+                "pets": [
+                    {"name": "Max", "category": "cat"},
+                    {"name": "Rex", "category": "dog"},
+                ]
+            }
+        },
+    )
+
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"http://localhost:{server.port}/export") as response:
+            assert response.headers["Content-Type"] == "application/x-ndjson"
+            assert response.headers["Transfer-Encoding"] == "chunked"
+            lines = [json.loads(line) async for line in response.content]
+
+    assert [
+        {field: pet[field] for field in ("id", "name", "category")} for pet in lines
+    ] == created_pets["pets"]
+
+
+@pytest.mark.asyncio
+async def test_exports_pets_as_an_arrow_file(
+    client: Callable, server: TestServer
+) -> None:
+    await client(
+        """
+        mutation CreatePet($input: CreatePetInput!) {
+            createPet(input: $input) { ... on Pet { id } }
+        }
+        """,
+        {"input": {"name": "Max", "category": "cat"}},
+    )
+
+    url = f"http://localhost:{server.port}/export"
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url, params={"format": "arrow"}) as response:
+            content_type = response.headers["Content-Type"]
+            table = pa.ipc.open_file(pa.py_buffer(await response.read())).read_all()
+        async with session.get(url, params={"format": "xml"}) as response:
+            unknown_format_status = response.status
+
+    assert content_type == "application/vnd.apache.arrow.file"
+    assert table.select(["name", "category"]).to_pylist() == [
+        {"name": "Max", "category": "cat"}
+    ]
+    assert unknown_format_status == 400
@@ -0,0 +1,89 @@
+import aiohttp
+import json
+import pytest
+from aiohttp.test_utils import TestServer
+from typing import Any, Awaitable, Callable, Dict, List
+from petstore.app import PetsDatabase, create_app
+
+
+@pytest.mark.asyncio
+async def test_imports_pets_from_ndjson_and_csv(server: TestServer) -> None:
+    url = f"http://localhost:{server.port}"
+
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            f"{url}/import?chunk_size=1",
+            data=b'{"name": "Max", "category": "cat"}\n{"name": "Rex"}\n',
+            headers={"Content-Type": "application/x-ndjson"},
+        ) as response:
+            ndjson_report = await response.json()
+        async with session.post(
+            f"{url}/import",
+            data=b"name,category\nBella,dog\n",
+            headers={"Content-Type": "text/csv"},
+        ) as response:
+            csv_report = await response.json()
+        async with session.post(f"{url}/import?format=xml", data=b"") as response:
+            unknown_format_status = response.status
+        async with session.get(f"{url}/export") as response:
+            names = [json.loads(line)["name"] async for line in response.content]
+
+    assert ndjson_report["imported"] == 1
+    assert ndjson_report["errors"] == ["line 2: 'category' must be a str"]
+    assert csv_report["imported"] == 1
+    assert unknown_format_status == 400
+    assert names == ["Max", "Bella"]
+
+
+@pytest.mark.asyncio
+async def test_rejects_an_over_long_line_without_aborting_the_import(
+    server: TestServer,
+) -> None:
+    long_name = "x" * (1 << 17)
+    data = (
+        b'{"name": "Max", "category": "cat"}\n'
+        + json.dumps({"name": long_name, "category": "cat"}).encode()
+        + b'\n{"name": "Rex", "category": "dog"}\n'
+    )
+
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            f"http://localhost:{server.port}/import", data=data
+        ) as response:
+            status = response.status
+            report = await response.json()
+
+    assert status == 200
+    assert (report["imported"], report["rejected"]) == (2, 1)
+    assert report["errors"] == ["line 2: line is longer than 65536 bytes"]
+
+
+@pytest.mark.asyncio
+async def test_failed_import_responds_with_the_partial_report(
+    aiohttp_server: Callable[..., Awaitable[TestServer]],
+) -> None:
+    database = PetsDatabase.create()
+    create_items = database.pets.create_items
+    calls: List[int] = []
+
+    async def fail_second_chunk(items: List[Dict[str, Any]]) -> Any:
+        calls.append(len(items))
+        if len(calls) == 2:
+            raise OSError("disk full")
+        return await create_items(items)
+
+    database.pets.create_items = fail_second_chunk  # type: ignore
+    server = await aiohttp_server(create_app(database))
+
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            f"http://localhost:{server.port}/import?chunk_size=1",
+            data=b'{"name": "Max", "category": "cat"}\n'
+            b'{"name": "Rex", "category": "dog"}\n',
+        ) as response:
+            status = response.status
+            report = await response.json()
+
+    assert status == 500
+    assert report["imported"] == 1
+    assert report["error"] == "import stopped at line 2: disk full"
@@ -0,0 +1,128 @@
+import aiohttp
+import json
+import pytest
+from aiohttp.test_utils import TestServer
+from typing import Any, Dict
+from petstore.documents import PersistedQueries, query_hash
+
+LIST_PETS = """
+query ListPets($input: ListPetsInput!) {
+    listPets(input: $input) { ... on PetPage { items { name } } }
+}
+"""
+
+CREATE_PETS = """
+mutation CreatePets($input: CreatePetsInput!) {
+    createPets(input: $input) { ... on Pets { pets { name } } }
+}
+"""
+
+
+def persisted(query: str) -> Dict[str, Any]:
+    return {"persistedQuery": {"version": 1, "sha256Hash": query_hash(query)}}
+
+
+@pytest.mark.asyncio
+async def test_persisted_query_miss_register_and_hit(server: TestServer) -> None:
+    url = f"http://localhost:{server.port}/graphql"
+    variables = {"input": {"pets": [{"name": "Max", "category": "cat"}]}}
+
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            url, json={"variables": variables, "extensions": persisted(CREATE_PETS)}
+        ) as response:
+            miss = await response.json()
+        async with session.post(
+            url,
+            json={
+                "query": CREATE_PETS,
+                "variables": variables,
+                "extensions": persisted(CREATE_PETS),
+            },
+        ) as response:
+            registered = await response.json()
+        async with session.post(
+            url, json={"variables": variables, "extensions": persisted(CREATE_PETS)}
+        ) as response:
+            hit = await response.json()
+
+    assert miss["errors"] == [
+        {
+            "message": "PersistedQueryNotFound",
+            "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"},
+        }
+    ]
+    expected = {"createPets": {"pets": [{"name": "Max"}]}}
+    assert registered["data"] == hit["data"] == expected
+
+
+@pytest.mark.asyncio
+async def test_persisted_queries_can_be_sent_with_get(server: TestServer) -> None:
+    url = f"http://localhost:{server.port}/graphql"
+    params = {
+        "variables": json.dumps({"input": {}}),
+        "extensions": json.dumps(persisted(LIST_PETS)),
+    }
+
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url, params=params) as response:
+            miss = await response.json()
+        async with session.get(url, params={**params, "query": LIST_PETS}):
+            pass
+        async with session.get(url, params=params) as response:
+            hit = await response.json()
+        mutation_params = {
+            "extensions": json.dumps(persisted(CREATE_PETS)),
+            "query": CREATE_PETS,
+        }
+        async with session.get(url, params=mutation_params) as response:
+            mutation_status = response.status
+
+    assert miss["errors"][0]["extensions"]["code"] == "PERSISTED_QUERY_NOT_FOUND"
+    assert hit["data"] == {"listPets": {"items": []}}
+    assert mutation_status == 400
+
+
+@pytest.mark.asyncio
+async def test_persisted_query_with_wrong_hash_is_rejected(server: TestServer) -> None:
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            f"http://localhost:{server.port}/graphql",
+            json={"query": LIST_PETS, "extensions": persisted(CREATE_PETS)},
+        ) as response:
+            assert response.status == 400
+
+
+@pytest.mark.asyncio
+async def test_malformed_persisted_query_extensions_are_rejected(
+    server: TestServer,
+) -> None:
+    url = f"http://localhost:{server.port}/graphql"
+    statuses = []
+
+    async with aiohttp.ClientSession() as session:
+        for extensions in (
+            [],
+            {"persistedQuery": "x"},
+            {"persistedQuery": {"version": 1, "sha256Hash": ["a"]}},
+        ):
+            async with session.post(url, json={"extensions": extensions}) as response:
+                statuses.append(response.status)
+        for extensions_param in ("[]", "{", json.dumps({"persistedQuery": "x"})):
+            async with session.get(
+                url,
+                params={"extensions": extensions_param},
+                headers={"Accept": "application/json"},
+            ) as response:
+                statuses.append(response.status)
+
+    assert statuses == [400] * 6
+
+
+def test_persisted_queries_are_bounded() -> None:
+    persisted_queries = PersistedQueries(maxsize=1)
+    for query in ("{ a }", "{ b }"):
+        persisted_queries.resolve({"query": query, "extensions": persisted(query)})
+
+    assert persisted_queries.get(query_hash("{ a }")) is None
+    assert persisted_queries.get(query_hash("{ b }")) == "{ b }"
@@ -1,4 +1,9 @@
+import aiohttp
 import pytest
+from aiohttp.test_utils import TestServer
+from typing import Any, Awaitable, Dict, List, Optional
+from petstore.app import PetsDatabase, create_app
+from petstore.database import Database
 from .conftest import Callable
 
 
@@ -143,6 +148,85 @@ async def test_getting_pets_returns_not_found_error(client: Callable) -> None:
     assert not_found_error["message"] == "Not found"
 
 
+@pytest.mark.asyncio
+async def test_batches_pet_lookups_within_a_request(
+    client: Callable, server: TestServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    created_pets = await client(
+        """
+        mutation CreatePets($input: CreatePetsInput!) {
+            createPets(input: $input) { ... on Pets { pets { id name category } } }
+        }
+        """,
+        {"input": {"pets": [{"name": "Max", "category": "cat"}] * 2}},
+    )
+    id_1, id_2 = [pet["id"] for pet in created_pets["pets"]]
+    lookups: List[List[str]] = []
+    find_items = Database.find_items
+
+    async def recording_find_items(
+        self: Database, ids: List[str]
+    ) -> List[Optional[Dict[str, Any]]]:
+        lookups.append(ids)
+        return await find_items(self, ids)
+
+    monkeypatch.setattr(Database, "find_items", recording_find_items)
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            f"http://localhost:{server.port}/graphql",
+            json={
+                "query": f"""
+                {{
+                    a: getPet(id: "{id_1}") {{ ... on Pet {{ id }} }}
+                    b: getPet(id: "{id_2}") {{ ... on Pet {{ id }} }}
+                    c: getPets(ids: ["{id_1}", "{id_2}"]) {{
+                        ... on Pets {{ pets {{ id }} }}
+                    }}
+                    d: getPet(id: "non_existent_pet_id") {{ __typename }}
+                }}
+                """
+            },
+        ) as response:
+            data = (await response.json())["data"]
+
+    assert data == {
+        "a": {"id": id_1},
+        "b": {"id": id_2},
+        "c": {"pets": [{"id": id_1}, {"id": id_2}]},
+        "d": {"__typename": "NotFoundError"},
+    }
+    assert lookups == [[id_1, id_2, "non_existent_pet_id"]]
+
+
+@pytest.mark.asyncio
+async def test_getting_pet_by_an_alias_of_its_id_returns_not_found_error(
+    aiohttp_server: Callable[..., Awaitable[TestServer]]
+) -> None:
+    database = PetsDatabase.create(backend="compact")
+    pet = await database.pets.create_item({"name": "Max", "category": "cat"})
+    server = await aiohttp_server(create_app(database))
+    alias = pet["id"].replace("-", "").upper()  # type: ignore
+
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            f"http://localhost:{server.port}/graphql",
+            json={
+                "query": f"""
+                {{
+                    a: getPet(id: "{alias}") {{ __typename }}
+                    b: getPets(ids: ["{alias}"]) {{ __typename }}
+                }}
+                """
+            },
+        ) as response:
+            data = (await response.json())["data"]
+
+    assert data == {
+        "a": {"__typename": "NotFoundError"},
+        "b": {"__typename": "NotFoundError"},
+    }
+
+
 @pytest.mark.asyncio
 async def test_lists_pets(client: Callable) -> None:
     create_pet = """
@@ -242,6 +326,90 @@ async def test_listing_pets_pages_returns_unexpected_error_when_api_broken(
     assert unexpected_error["status"] == 500
 
 
+@pytest.mark.asyncio
+async def test_lists_pets_connection(client: Callable) -> None:
+    create_pet = """
+    mutation CreatePet($input: CreatePetInput!) {
+        createPet(input: $input) { ... on Pet { id name category } }
+    }
+    """
+    created_pet_1 = await client(
+        create_pet, {"input": {"name": "Max 1", "category": "cat"}}
+    )
+    await client(create_pet, {"input": {"name": "Max 2", "category": "cat"}})
+    await client(create_pet, {"input": {"name": "Max 3", "category": "cat"}})
+    list_pets_connection = """
+    query ListPetsConnection($input: ListPetsConnectionInput!) {
+        listPetsConnection(input: $input) {
+            ... on PetConnection {
+                edges { cursor node { id name category } }
+                pageInfo { endCursor hasNextPage }
+            }
+        }
+    }
+    """
+    connection_1 = await client(list_pets_connection, {"input": {"first": 2}})
+    assert [edge["node"]["name"] for edge in connection_1["edges"]] == [
+        "Max 1",
+        "Max 2",
+    ]
+    assert connection_1["pageInfo"]["hasNextPage"] is True
+    await client(
+        "mutation DeletePet($id: ID!) { deletePet(id: $id) { ... on DeletedPet { id } } }",
+        {"id": created_pet_1["id"]},
+    )
+    connection_2 = await client(
+        list_pets_connection,
+        {"input": {"first": 2, "after": connection_1["pageInfo"]["endCursor"]}},
+    )
+    assert [edge["node"]["name"] for edge in connection_2["edges"]] == ["Max 3"]
+    assert connection_2["pageInfo"]["hasNextPage"] is False
+
+
+@pytest.mark.asyncio
+async def test_listing_pets_connection_with_invalid_cursor_returns_bad_request_error(
+    client: Callable,
+) -> None:
+    bad_request_error = await client(
+        """
+        query ListPetsConnection($input: ListPetsConnectionInput!) {
+            listPetsConnection(input: $input) {
+                ... on BadRequestError { message status }
+            }
+        }
+        """,
+        {"input": {"after": "not a cursor"}},
+    )
+    assert bad_request_error["status"] == 400
+    assert bad_request_error["message"] == "Bad request"
+
+
+@pytest.mark.asyncio
+async def test_searches_pets(client: Callable) -> None:
+    create_pet = """
+    mutation CreatePet($input: CreatePetInput!) {
+        createPet(input: $input) { ... on Pet { id name category } }
+    }
+    """
+    await client(create_pet, {"input": {"name": "Maxine", "category": "cat"}})
+    await client(create_pet, {"input": {"name": "Rex", "category": "dog"}})
+    await client(create_pet, {"input": {"name": "Max", "category": "cat"}})
+    search_pets = """
+    query SearchPets($namePrefix: String, $nameContains: String) {
+        searchPets(namePrefix: $namePrefix, nameContains: $nameContains, first: 5) {
+            ... on Pets { pets { name } }
+            ... on BadRequestError { status }
+        }
+    }
+    """
+    by_prefix = await client(search_pets, {"namePrefix": "ma"})
+    by_substring = await client(search_pets, {"nameContains": "axi"})
+    bad_request_error = await client(search_pets, {})
+    assert by_prefix == {"pets": [{"name": "Max"}, {"name": "Maxine"}]}
+    assert by_substring == {"pets": [{"name": "Maxine"}]}
+    assert bad_request_error == {"status": 400}
+
+
 @pytest.mark.asyncio
 async def test_counts_pets(client: Callable) -> None:
     create_pet = """
@@ -258,6 +426,39 @@ async def test_counts_pets(client: Callable) -> None:
     assert count == {"count": 5}
 
 
+@pytest.mark.asyncio
+async def test_lists_and_counts_pets_by_category(client: Callable) -> None:
+    create_pet = """
+    mutation CreatePet($input: CreatePetInput!) {
+        createPet(input: $input) { ... on Pet { id name category } }
+    }
+    """
+    await client(create_pet, {"input": {"name": "Max 1", "category": "cat"}})
+    await client(create_pet, {"input": {"name": "Rex 1", "category": "dog"}})
+    await client(create_pet, {"input": {"name": "Max 2", "category": "cat"}})
+    cats_page = await client(
+        """
+        query ListPets($input: ListPetsInput!) {
+            listPets(input: $input) { ... on PetPage { totalPages items { name } } }
+        }
+        """,
+        {"input": {"category": "cat"}},
+    )
+    dogs_count = await client(
+        """
+        query PetsCount($category: String) {
+            countPets(category: $category) { ... on PetsCount { count } }
+        }
+        """,
+        {"category": "dog"},
+    )
+    assert cats_page == {
+        "totalPages": 1,
+        "items": [{"name": "Max 1"}, {"name": "Max 2"}],
+    }
+    assert dogs_count == {"count": 1}
+
+
 @pytest.mark.asyncio
 async def test_counting_pets_returns_unexpected_error_when_api_broken(
     broken_client: Callable,
@@ -242,6 +242,51 @@ async def test_subscribing_to_non_existent_pets_by_id_returns_not_found_error(
             await messages.wait_for_messages()
 
 
+@pytest.mark.asyncio
+async def test_subscribes_to_coalesced_pet_by_id_update_messages(
+    client: Callable,
+    subscription_client: Callable,
+    subscription_messages: Callable,
+) -> None:
+    created_pet = await client(
+        """
+        mutation CreatePet($input: CreatePetInput!) {
+            createPet(input: $input) { ... on Pet { id name category } }
+        }
+        """,
+        {"input": {"name": "Max", "category": "cat"}},
+    )
+    subscription = subscription_client(
+        """
+        subscription SubscribeToPetById($id: ID!, $coalesceMs: Int) {
+            subscribeToPetById(id: $id, coalesceMs: $coalesceMs) {
+                __typename
+                ... on PetDeleteMessage { id }
+                ... on PetUpdateMessage { id name category }
+            }
+        }
+        """,
+        variable_values={"id": created_pet["id"], "coalesceMs": 250},
+        # Longer than the window, so the client is still listening when the
+        # merged message arrives.
+        receive_timeout=1.0,
+    )
+    async with subscription_messages(subscription) as messages:
+        patch_pet = """
+        mutation PatchPet($input: PatchPetInput!) {
+            patchPet(input: $input) { ... on Pet { id name category } }
+        }
+        """
+        for name in ["Max 1", "Max 2"]:
+            await client(patch_pet, {"input": {"id": created_pet["id"], "name": name}})
+        patched_pet = await client(
+            patch_pet, {"input": {"id": created_pet["id"], "category": "dog"}}
+        )
+        [update_message] = await messages.wait_for_messages()
+        assert patched_pet == {**created_pet, "name": "Max 2", "category": "dog"}
+        assert update_message == {**patched_pet, "__typename": "PetUpdateMessage"}
+
+
 @pytest.mark.asyncio
 async def test_subscribes_to_pets_list_create_messages(
     client: Callable,
@@ -276,6 +321,38 @@ async def test_subscribes_to_pets_list_create_messages(
         assert create_message_2 == {**created_pet_2, "__typename": "PetCreateMessage"}
 
 
+@pytest.mark.asyncio
+async def test_subscribes_to_pets_list_create_messages_by_category(
+    client: Callable,
+    subscription_client: Callable,
+    subscription_messages: Callable,
+) -> None:
+    subscription = subscription_client(
+        """
+        subscription SubscribeToPetsList($category: String) {
+            subscribeToPetsList(category: $category) {
+                __typename
+                ... on PetDeleteMessage { id }
+                ... on PetCreateMessage { id name category }
+            }
+        }
+        """,
+        variable_values={"category": "dog"},
+    )
+    async with subscription_messages(subscription) as messages:
+        create_pet = """
+        mutation CreatePet($input: CreatePetInput!) {
+            createPet(input: $input) { ... on Pet { id name category } }
+        }
+        """
+        await client(create_pet, {"input": {"name": "Max 1", "category": "cat"}})
+        created_pet = await client(
+            create_pet, {"input": {"name": "Max 2", "category": "dog"}}
+        )
+        [create_message] = await messages.wait_for_messages()
+        assert create_message == {**created_pet, "__typename": "PetCreateMessage"}
+
+
 @pytest.mark.asyncio
 async def test_subscribes_to_pets_list_delete_messages(
     client: Callable,
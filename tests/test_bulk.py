@@ -0,0 +1,150 @@
+import json
+import pytest
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List
+from petstore import errors, types
+from petstore.bulk import ImportFailed, ImportReport, import_items
+from petstore.database import Database
+from petstore.importer import main
+from petstore.tables import SqliteTable
+
+
+async def lines(*values: str) -> AsyncIterator[bytes]:
+    for value in values:
+        yield f"{value}\n".encode()
+
+
+@pytest.mark.asyncio
+async def test_imports_ndjson_in_chunks_and_rejects_invalid_rows(
+    database: Database,
+) -> None:
+    imported: List[int] = []
+
+    report = await import_items(
+        database,
+        lines(
+            '{"name": "Max", "category": "cat"}',
+            '{"name": "Rex"}',
+            "",
+            '{"name": "Bella", "category": "dog"}',
+            '{"name": "Luna", "category": "cat", "id": "1"}',
+            "{",
+            '{"name": "Milo", "category": "dog"}',
+        ),
+        chunk_size=2,
+        progress=lambda report: imported.append(report.imported),
+    )
+
+    assert imported == [2, 3]
+    assert (report.imported, report.rejected) == (3, 3)
+    assert report.errors[:2] == [
+        "line 2: 'category' must be a str",
+        "line 5: unknown field 'id'",
+    ]
+    assert report.errors[2].startswith("line 6: unreadable line")
+    pets = await database.list_items()
+    assert [pet["name"] for pet in pets["items"]] == ["Max", "Bella", "Milo"]  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_imports_csv_with_a_header_row(database: Database) -> None:
+    report = await import_items(
+        database,
+        lines("category,name", 'cat,"Max, Jr."', "dog", "dog,Rex"),
+        format="csv",
+    )
+
+    assert report.errors == ["line 3: expected 2 columns"]
+    pets = await database.list_items()
+    assert [(pet["name"], pet["category"]) for pet in pets["items"]] == [  # type: ignore
+        ("Max, Jr.", "cat"),
+        ("Rex", "dog"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_rejects_an_over_long_line_and_imports_the_rest(
+    database: Database,
+) -> None:
+    async def chunks() -> AsyncIterator[bytes]:
+        yield b'{"name": "Max", "category": "cat"}\n{"name": "'
+        for _ in range(4):
+            yield b"x" * 30
+        yield b'", "category": "cat"}\n{"name": "Rex",'
+        yield b' "category": "dog"}'
+
+    report = await import_items(database, chunks(), max_line_bytes=64)
+
+    assert (report.imported, report.rejected) == (2, 1)
+    assert report.errors == ["line 2: line is longer than 64 bytes"]
+    pets = await database.list_items()
+    assert [pet["name"] for pet in pets["items"]] == ["Max", "Rex"]  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_failing_chunk_raises_with_the_partial_report(
+    database: Database, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    create_items = database.create_items
+    calls: List[int] = []
+
+    async def fail_second_chunk(items: List[Dict[str, Any]]) -> Any:
+        calls.append(len(items))
+        if len(calls) == 2:
+            return errors.BadRequestError()
+        return await create_items(items)
+
+    monkeypatch.setattr(database, "create_items", fail_second_chunk)
+
+    with pytest.raises(ImportFailed) as failure:
+        await import_items(
+            database,
+            lines(
+                '{"name": "Max", "category": "cat"}',
+                '{"name": "Rex", "category": "dog"}',
+                "{",
+                '{"name": "Bella", "category": "dog"}',
+                '{"name": "Milo", "category": "dog"}',
+                '{"name": "Luna", "category": "cat"}',
+            ),
+            chunk_size=2,
+        )
+
+    assert calls == [2, 2]
+    assert failure.value.status_code == 400
+    report = failure.value.report.as_dict()
+    assert (report["imported"], report["rejected"]) == (2, 1)
+    assert report["error"] == "import stopped at line 4: Bad request"
+
+
+@pytest.mark.asyncio
+async def test_importing_with_an_unknown_format_returns_bad_request_error(
+    database: Database,
+) -> None:
+    for options in ({"format": "xml"}, {"chunk_size": 0}):
+        with pytest.raises(errors.BadRequestError):
+            await import_items(database, lines(), **options)  # type: ignore
+
+
+def test_report_keeps_a_bounded_number_of_errors() -> None:
+    report = ImportReport()
+    for line in range(1, 1000):
+        report.reject(line, "expected an object")
+
+    assert report.rejected == 999
+    assert len(report.errors) == 100
+
+
+def test_import_command_loads_a_file_into_the_store(
+    tmp_path: Path, capsys: pytest.CaptureFixture
+) -> None:
+    path = tmp_path / "pets.csv"
+    path.write_text("name,category\nMax,cat\nRex,dog\n")
+    database_path = str(tmp_path / "pets.db")
+
+    main([str(path), "--backend", "sqlite", "--database", database_path])
+
+    assert json.loads(capsys.readouterr().out)["imported"] == 2
+    table = SqliteTable(types.Pet, path=database_path)
+    assert [item["name"] for _, item in table.items()] == ["Max", "Rex"]
+    table.close()
@@ -0,0 +1,95 @@
+import pytest
+from graphql import ExecutionResult
+from typing import Any, Dict, cast
+from petstore.app import PetsDatabase, create_context
+from petstore.cache import ResponseCache, collection_tag, item_tag
+from petstore.schema import schema
+
+GET_PET = "query GetPet($id: ID!) { getPet(id: $id) { ... on Pet { name } } }"
+
+COUNT_PETS = "{ countPets { ... on PetsCount { count } } }"
+
+
+def result(name: str) -> ExecutionResult:
+    return ExecutionResult(data={"name": name})
+
+
+def test_response_cache_invalidates_responses_by_tag() -> None:
+    cache = ResponseCache()
+    cache.put_response("pet 1", result("Max"), {item_tag("Pet", "1")})
+    cache.put_response("pet 2", result("Rex"), {item_tag("Pet", "2")})
+    cache.put_response("pets", result("Max, Rex"), {collection_tag("Pet")})
+
+    cache.invalidate(("Pet", "update", [{"id": "1"}], None, ("epoch", 1)))
+
+    assert cache.get_response("pet 1") is None
+    assert cache.get_response("pet 2") == result("Rex")
+    assert cache.get_response("pets") is None
+    assert cache.stats() == {
+        "size": 1,
+        "hits": 1,
+        "misses": 2,
+        "hit_rate": 1 / 3,
+        "invalidations": 1,
+    }
+
+
+def test_response_cache_expires_and_evicts_responses() -> None:
+    expired = ResponseCache(ttl=0)
+    expired.put_response("pet", result("Max"), {item_tag("Pet", "1")})
+    bounded = ResponseCache(maxsize=1)
+    bounded.put_response("pet 1", result("Max"), {item_tag("Pet", "1")})
+    bounded.put_response("pet 2", result("Rex"), {item_tag("Pet", "2")})
+
+    assert expired.get_response("pet") is None
+    assert bounded.get_response("pet 1") is None
+    assert bounded.get_response("pet 2") == result("Rex")
+    assert bounded._tagged == {item_tag("Pet", "2"): {"pet 2"}}
+
+
+@pytest.mark.asyncio
+async def test_read_queries_are_cached_until_a_write_touches_them() -> None:
+    database = PetsDatabase.create(response_cache=ResponseCache())
+    cache = cast(ResponseCache, database.response_cache)
+    max, rex = [
+        cast(
+            Dict[str, Any],
+            await database.pets.create_item({"name": name, "category": "cat"}),
+        )
+        for name in ("Max", "Rex")
+    ]
+
+    async def execute(query: str, **variables: Any) -> Any:
+        response = await schema.execute(
+            query, variable_values=variables, context_value=create_context(database)
+        )
+        assert response.errors is None
+        return response.data
+
+    assert await execute(GET_PET, id=max["id"]) == {"getPet": {"name": "Max"}}
+    assert await execute(COUNT_PETS) == {"countPets": {"count": 2}}
+    await database.pets.patch_item({"id": rex["id"], "name": "Rexy"})
+    assert await execute(GET_PET, id=max["id"]) == {"getPet": {"name": "Max"}}
+    assert cache.hits == 1
+
+    await database.pets.patch_item({"id": max["id"], "name": "Maxy"})
+    assert await execute(GET_PET, id=max["id"]) == {"getPet": {"name": "Maxy"}}
+    await database.pets.create_item({"name": "Bella", "category": "cat"})
+    assert await execute(COUNT_PETS) == {"countPets": {"count": 3}}
+    assert cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_unexpected_errors_are_not_cached() -> None:
+    database = PetsDatabase.create(response_cache=ResponseCache())
+    pet = cast(Dict[str, Any], await database.pets.create_item({"name": "Max"}))
+
+    for _ in range(2):
+        response = await schema.execute(
+            GET_PET,
+            variable_values={"id": pet["id"]},
+            context_value=create_context(database),
+        )
+        assert response.data == {"getPet": {}}
+
+    assert cast(ResponseCache, database.response_cache).stats()["size"] == 0
@@ -0,0 +1,54 @@
+import pyarrow as pa
+import pytest
+from pathlib import Path
+from petstore.columnar import ArrowFileWriter, export_arrow
+from petstore.database import Database
+
+FIELDS = ["id", "name", "category"]
+
+
+@pytest.mark.asyncio
+async def test_exports_the_store_as_an_arrow_file(
+    database: Database, tmp_path: Path
+) -> None:
+    await database.create_items(
+        [
+            {"name": "Max", "category": "cat"},
+            {"name": "Rex", "category": "dog"},
+            {"name": "Bella", "category": "cat"},
+            {"name": "Luna"},
+        ]
+    )
+    path = tmp_path / "pets.arrow"
+    with open(path, "wb") as file:
+        async for chunk in export_arrow(
+            database, FIELDS, dictionary=["category"], row_group_size=3
+        ):
+            file.write(chunk)
+
+    with pa.memory_map(str(path)) as source:
+        reader = pa.ipc.open_file(source)
+        table = reader.read_all()
+        table.validate(full=True)
+        categories = table.column("category")
+
+        assert reader.num_record_batches == 2
+        assert table.column("name").to_pylist() == ["Max", "Rex", "Bella", "Luna"]
+        assert categories.to_pylist() == ["cat", "dog", "cat", None]
+        assert categories.type == pa.dictionary(pa.int32(), pa.string())
+        assert categories.chunk(0).dictionary.to_pylist() == ["cat", "dog"]
+        assert list(categories.chunk(0).indices.to_numpy(zero_copy_only=True)) == [
+            0,
+            1,
+            0,
+        ]
+
+
+def test_writes_an_empty_arrow_file() -> None:
+    writer = ArrowFileWriter(FIELDS, dictionary=["category"])
+
+    data = writer.start() + writer.finish()
+
+    table = pa.ipc.open_file(pa.py_buffer(data)).read_all()
+    assert table.num_rows == 0
+    assert table.column_names == FIELDS
@@ -1,8 +1,14 @@
 import asyncio
 import pytest
-from typing import Dict, Any, List, cast
-from petstore import errors
-from petstore.database import Database
+import random
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Mapping, Tuple, cast
+from petstore import errors, types
+from petstore.database import Change, Database
+from petstore.indexes import PrefixIndex
+from petstore.tables import DictTable, FrozenTable, SqliteTable, Table
+from petstore.wal import WalTable
 
 
 def cast_to_item(a: Any) -> Dict[str, Any]:
@@ -21,6 +27,21 @@ def cast_to_page(a: Any) -> Dict[str, Any]:
     return cast(Dict[str, Any], a)
 
 
+def event(database: Database, type: str, data: Any, seq: int) -> Dict[str, Any]:
+    return {
+        "type": type,
+        "data": data,
+        "seq": seq,
+        "cursor": database._encode_event_cursor(seq),
+    }
+
+
+async def fan_out() -> None:
+    # Subscribers are woken on the loop iteration after an event is published.
+    for _ in range(2):
+        await asyncio.sleep(0)
+
+
 @pytest.mark.asyncio
 async def test_creates_and_gets_pet(database: Database) -> None:
     created_pet = cast_to_item(await database.create_item({"name": "Max"}))
@@ -49,6 +70,15 @@ async def test_getting_non_existent_pet_returns_not_found_error(
     assert isinstance(not_found_error, errors.NotFoundError)
 
 
+@pytest.mark.asyncio
+async def test_finds_pets_with_none_for_missing_ids(database: Database) -> None:
+    created_pet = cast_to_item(await database.create_item({"name": "Max"}))
+
+    assert await database.find_items(
+        [created_pet["id"], "non_existent_pet_id", created_pet["id"]]
+    ) == [created_pet, None, created_pet]
+
+
 @pytest.mark.asyncio
 async def test_creates_and_gets_pets(database: Database) -> None:
     created_pets = cast_to_items(
@@ -81,6 +111,34 @@ async def test_creating_pets_with_ids_returns_bad_request_error(
     assert isinstance(bad_request_error, errors.BadRequestError)
 
 
+@pytest.mark.asyncio
+async def test_frozen_table_shares_immutable_pets_between_reads() -> None:
+    database = Database(types.Pet, table=FrozenTable)
+    created_pet = cast_to_item(await database.create_item({"name": "Max"}))
+
+    fetched_pet_1 = cast_to_item(await database.get_item(created_pet["id"]))
+    fetched_pet_2 = cast_to_item(await database.get_item(created_pet["id"]))
+
+    assert fetched_pet_1 is fetched_pet_2
+    with pytest.raises(TypeError):
+        fetched_pet_1["name"] = "Max 2"
+
+
+@pytest.mark.asyncio
+async def test_frozen_table_replaces_pets_on_write() -> None:
+    database = Database(types.Pet, table=FrozenTable)
+    created_pet = cast_to_item(await database.create_item({"name": "Max"}))
+    fetched_pet = cast_to_item(await database.get_item(created_pet["id"]))
+
+    patched_pet = cast_to_item(
+        await database.patch_item({"id": created_pet["id"], "name": "Max 2"})
+    )
+
+    assert fetched_pet["name"] == "Max"
+    assert patched_pet["name"] == "Max 2"
+    assert await database.get_item(created_pet["id"]) == patched_pet
+
+
 @pytest.mark.asyncio
 async def test_getting_non_existent_pets_returns_not_found_error(
     database: Database,
@@ -382,7 +440,7 @@ async def test_lists_pets(database: Database) -> None:
     cast_to_item(await database.create_item({"name": "Max 4"}))
     cast_to_item(await database.create_item({"name": "Max 5"}))
 
-    pets_page_default = await database.list_items()
+    pets_page_default = cast_to_page(await database.list_items())
 
     assert pets_page_default["page"] == 1
     assert pets_page_default["size"] == 20
@@ -394,7 +452,7 @@ async def test_lists_pets(database: Database) -> None:
     assert pets_page_default["items"][3]["name"] == "Max 4"
     assert pets_page_default["items"][4]["name"] == "Max 5"
 
-    pets_page_1 = await database.list_items(size=3, page=1)
+    pets_page_1 = cast_to_page(await database.list_items(size=3, page=1))
 
     assert pets_page_1["page"] == 1
     assert pets_page_1["size"] == 3
@@ -404,7 +462,7 @@ async def test_lists_pets(database: Database) -> None:
     assert pets_page_1["items"][1]["name"] == "Max 2"
     assert pets_page_1["items"][2]["name"] == "Max 3"
 
-    pets_page_2 = await database.list_items(size=3, page=2)
+    pets_page_2 = cast_to_page(await database.list_items(size=3, page=2))
 
     assert pets_page_2["page"] == 2
     assert pets_page_2["size"] == 3
@@ -414,6 +472,56 @@ async def test_lists_pets(database: Database) -> None:
     assert pets_page_2["items"][1]["name"] == "Max 5"
 
 
+@pytest.mark.asyncio
+async def test_lists_pets_after_deletes(database: Database) -> None:
+    created_pets = cast_to_items(
+        await database.create_items([{"name": f"Max {i}"} for i in range(10)])
+    )
+    for created_pet in created_pets[::2]:
+        await database.delete_item(created_pet["id"])
+
+    pets_page_2 = cast_to_page(await database.list_items(size=2, page=2))
+
+    assert pets_page_2["total_pages"] == 3
+    assert [pet["name"] for pet in pets_page_2["items"]] == ["Max 5", "Max 7"]
+
+
+@pytest.mark.asyncio
+async def test_lists_pets_after_cursor_while_pets_are_created_and_deleted(
+    database: Database,
+) -> None:
+    created_pets = cast_to_items(
+        await database.create_items([{"name": f"Max {i}"} for i in range(4)])
+    )
+
+    connection_1 = cast_to_page(await database.list_items_after(first=2))
+    await database.delete_item(created_pets[0]["id"])
+    await database.delete_item(created_pets[2]["id"])
+    await database.create_item({"name": "Max 4"})
+    connection_2 = cast_to_page(
+        await database.list_items_after(after=connection_1["end_cursor"], first=2)
+    )
+
+    assert [edge["node"]["name"] for edge in connection_1["edges"]] == [
+        "Max 0",
+        "Max 1",
+    ]
+    assert connection_1["has_next_page"] is True
+    assert [edge["node"]["name"] for edge in connection_2["edges"]] == [
+        "Max 3",
+        "Max 4",
+    ]
+    assert connection_2["has_next_page"] is False
+
+
+@pytest.mark.asyncio
+async def test_listing_pets_after_invalid_cursor_returns_bad_request_error(
+    database: Database,
+) -> None:
+    bad_request_error = await database.list_items_after(after="not a cursor")
+    assert isinstance(bad_request_error, errors.BadRequestError)
+
+
 @pytest.mark.asyncio
 async def test_counts_pets(database: Database) -> None:
     cast_to_item(await database.create_item({"name": "Max 1"}))
@@ -426,6 +534,96 @@ async def test_counts_pets(database: Database) -> None:
     assert count == 5
 
 
+@pytest.mark.asyncio
+async def test_lists_and_counts_pets_by_category(database: Database) -> None:
+    [cat_1, dog_1, cat_2, dog_2] = cast_to_items(
+        await database.create_items(
+            [
+                {"name": "Max 1", "category": "cat"},
+                {"name": "Rex 1", "category": "dog"},
+                {"name": "Max 2", "category": "cat"},
+                {"name": "Rex 2", "category": "dog"},
+            ]
+        )
+    )
+    await database.patch_item({"id": dog_1["id"], "category": "cat"})
+    await database.update_item({**cat_1, "category": "fish"})
+    await database.delete_item(cat_2["id"])
+
+    cats_page = cast_to_page(await database.list_items(category="cat"))
+
+    assert [pet["name"] for pet in cats_page["items"]] == ["Rex 1"]
+    assert cats_page["total_pages"] == 1
+    assert await database.count_items(category="cat") == 1
+    assert await database.count_items(category="dog") == 1
+    assert await database.count_items(category="fish") == 1
+    assert await database.count_items(category="bird") == 0
+    assert set(database.indexes["category"]) == {"cat", "dog", "fish"}
+
+
+@pytest.mark.asyncio
+async def test_filtering_pets_by_unindexed_field_returns_bad_request_error(
+    database: Database,
+) -> None:
+    assert isinstance(await database.list_items(name="Max"), errors.BadRequestError)
+    assert isinstance(await database.count_items(name="Max"), errors.BadRequestError)
+
+
+@pytest.mark.asyncio
+async def test_searches_pets_by_name(database: Database) -> None:
+    [max_1, rex, _] = cast_to_items(
+        await database.create_items(
+            [{"name": "Max 1"}, {"name": "Rex"}, {"name": "Maxine"}]
+        )
+    )
+    await database.patch_item({"id": rex["id"], "name": "Maximilian"})
+    await database.delete_item(max_1["id"])
+
+    by_prefix = cast_to_items(await database.search_items("name", prefix="max"))
+    by_substring = cast_to_items(await database.search_items("name", contains="AXI"))
+
+    assert [pet["name"] for pet in by_prefix] == ["Maximilian", "Maxine"]
+    assert [pet["name"] for pet in by_substring] == ["Maxine", "Maximilian"]
+
+
+@pytest.mark.asyncio
+async def test_searching_pets_without_a_usable_query_returns_bad_request_error(
+    database: Database,
+) -> None:
+    for search in [
+        database.search_items("name"),
+        database.search_items("name", prefix="M", contains="Max"),
+        database.search_items("name", contains="Ma"),
+        database.search_items("category", prefix="c"),
+    ]:
+        assert isinstance(await search, errors.BadRequestError)
+
+
+@pytest.mark.asyncio
+async def test_exports_pets_in_chunks_from_a_snapshot(database: Database) -> None:
+    created_pets = cast_to_items(
+        await database.create_items([{"name": f"Max {i}"} for i in range(5)])
+    )
+
+    chunks: List[List[Dict[str, Any]]] = []
+    async for pets in database.export_items(chunk_size=2):
+        if not chunks:
+            await database.patch_item({"id": created_pets[2]["id"], "name": "Rex"})
+            await database.delete_item(created_pets[3]["id"])
+            await database.create_item({"name": "Bella"})
+        chunks.append(pets)
+
+    assert chunks == [created_pets[:2], created_pets[2:4], created_pets[4:]]
+    assert database.exports == []
+    assert [pet["name"] for pet in (await anext(database.export_items()))] == [
+        "Max 0",
+        "Max 1",
+        "Rex",
+        "Max 4",
+        "Bella",
+    ]
+
+
 @pytest.mark.asyncio
 async def test_subscribes_to_pet_by_id_update_messages(database: Database) -> None:
     created_pet = cast_to_item(await database.create_item({"name": "Max"}))
@@ -441,7 +639,7 @@ async def test_subscribes_to_pet_by_id_update_messages(database: Database) -> No
     await asyncio.sleep(0)
     updated_item_1 = await database.update_item({**created_pet, "name": "Max 2"})
     updated_item_2 = await database.update_item({**created_pet, "name": "Max 3"})
-    await asyncio.sleep(0)
+    await fan_out()
 
     collecting_messages.cancel()
 
@@ -466,7 +664,7 @@ async def test_subscribes_to_pet_by_id_delete_messages(database: Database) -> No
 
     await asyncio.sleep(0)
     deleted_item_1 = await database.delete_item(created_pet["id"])
-    await asyncio.sleep(0)
+    await fan_out()
 
     collecting_messages.cancel()
 
@@ -506,7 +704,7 @@ async def test_subscribes_to_pets_by_id_update_messages(
     updated_item_1 = await database.update_item({**created_pet_1, "name": "Maximus 1"})
     updated_item_2 = await database.update_item({**created_pet_2, "name": "Maximus 2"})
     await database.update_item({**created_pet_3, "name": "Maximus 3"})
-    await asyncio.sleep(0)
+    await fan_out()
 
     collecting_messages.cancel()
 
@@ -539,7 +737,7 @@ async def test_subscribes_to_pets_by_id_delete_messages(
     deleted_item_1 = await database.delete_item(created_pet_1["id"])
     await database.delete_item(created_pet_2["id"])
     deleted_item_3 = await database.delete_item(created_pet_3["id"])
-    await asyncio.sleep(0)
+    await fan_out()
 
     collecting_messages.cancel()
 
@@ -574,7 +772,7 @@ async def test_subscribes_to_pets_list_create_messages(
     await asyncio.sleep(0)
     created_pet_1 = cast_to_item(await database.create_item({"name": "Max 1"}))
     created_pet_2 = cast_to_item(await database.create_item({"name": "Max 2"}))
-    await asyncio.sleep(0)
+    await fan_out()
 
     collecting_messages.cancel()
 
@@ -603,7 +801,7 @@ async def test_subscribes_to_pets_list_delete_messages(
     await asyncio.sleep(0)
     deleted_pet_1 = cast_to_item(await database.delete_item(created_pet_1["id"]))
     deleted_pet_2 = cast_to_item(await database.delete_item(created_pet_2["id"]))
-    await asyncio.sleep(0)
+    await fan_out()
 
     collecting_messages.cancel()
 
@@ -612,3 +810,430 @@ async def test_subscribes_to_pets_list_delete_messages(
     assert update_message_1["data"] == deleted_pet_1
     assert update_message_2["type"] == "delete"
     assert update_message_2["data"] == deleted_pet_2
+
+
+@pytest.mark.asyncio
+async def test_subscribes_to_pets_list_batch_messages(
+    database: Database,
+) -> None:
+    messages = []
+
+    async def collect_messages() -> None:
+        async for message in database.subscribe_to_list():
+            messages.append(message)
+
+    collecting_messages = asyncio.create_task(collect_messages())
+
+    await asyncio.sleep(0)
+    created_pets = cast_to_items(
+        await database.create_items([{"name": f"Max {i}"} for i in range(3)])
+    )
+    deleted_pets = await database.delete_items([pet["id"] for pet in created_pets])
+    await fan_out()
+
+    collecting_messages.cancel()
+
+    assert messages == [
+        *[
+            event(database, "create", pet, seq)
+            for seq, pet in enumerate(created_pets, 1)
+        ],
+        *[
+            event(database, "delete", pet, seq)
+            for seq, pet in enumerate(cast_to_items(deleted_pets), 4)
+        ],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_subscribes_to_coalesced_pets_by_id_update_messages(
+    database: Database,
+) -> None:
+    created_pets = cast_to_items(
+        await database.create_items([{"name": "Max 1"}, {"name": "Max 2"}])
+    )
+
+    messages = []
+
+    async def collect_messages(item_ids: List[str]) -> None:
+        async for message in database.subscribe_to_items_by_id(
+            item_ids, coalesce_ms=10
+        ):
+            messages.append(message)
+
+    collecting_messages = asyncio.create_task(
+        collect_messages([pet["id"] for pet in created_pets])
+    )
+
+    await asyncio.sleep(0)
+    for i in range(3):
+        for pet in created_pets:
+            await database.patch_item({"id": pet["id"], "name": f"{pet['name']}.{i}"})
+    deleted_pet = await database.delete_item(created_pets[0]["id"])
+    await asyncio.sleep(0.05)
+
+    collecting_messages.cancel()
+
+    assert messages == [
+        event(database, "update", {**created_pets[1], "name": "Max 2.2"}, 8),
+        event(database, "delete", deleted_pet, 9),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_subscribing_with_negative_coalesce_window_returns_bad_request_error(
+    database: Database,
+) -> None:
+    with pytest.raises(Exception, match="Bad request"):
+        async for message in database.subscribe_to_list(coalesce_ms=-1):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_subscribing_since_a_sequence_replays_missed_messages(
+    database: Database,
+) -> None:
+    created_pets = cast_to_items(
+        await database.create_items([{"name": "Max 1"}, {"name": "Max 2"}])
+    )
+    patched_pet = await database.patch_item(
+        {"id": created_pets[1]["id"], "name": "Rex"}
+    )
+
+    messages = []
+
+    async def collect_messages() -> None:
+        async for message in database.subscribe_to_items_by_id(
+            [created_pets[1]["id"]], since=database._encode_event_cursor(1)
+        ):
+            messages.append(message)
+
+    collecting_messages = asyncio.create_task(collect_messages())
+
+    await asyncio.sleep(0)
+    deleted_pet = await database.delete_item(created_pets[1]["id"])
+    await fan_out()
+
+    collecting_messages.cancel()
+
+    assert messages == [
+        event(database, "create", created_pets[1], 2),
+        event(database, "update", patched_pet, 3),
+        event(database, "delete", deleted_pet, 4),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_subscribing_since_an_unknown_sequence_returns_gone_error() -> None:
+    database = Database(types.Pet, replay_size=1)
+    other_database = Database(types.Pet)
+    for numbered_database in (database, other_database):
+        await numbered_database.create_items([{"name": "Max 1"}, {"name": "Max 2"}])
+
+    for since in (
+        database._encode_event_cursor(0),
+        database._encode_event_cursor(3),
+        other_database._encode_event_cursor(2),
+    ):
+        with pytest.raises(Exception, match="Events are no longer available"):
+            async for message in database.subscribe_to_list(since=since):
+                pass
+    for since in (database._encode_event_cursor(-1), "not a cursor"):
+        with pytest.raises(Exception, match="Bad request"):
+            async for message in database.subscribe_to_list(since=since):
+                pass
+
+
+@pytest.mark.asyncio
+async def test_subscribes_to_filtered_pets_list_messages(
+    database: Database,
+) -> None:
+    messages: Dict[str, List[Dict[str, Any]]] = {"cats": [], "maxes": []}
+
+    async def collect_messages(name: str, **filters: Any) -> None:
+        async for message in database.subscribe_to_list(**filters):
+            messages[name].append(message)
+
+    collecting_messages = [
+        asyncio.create_task(collect_messages("cats", category="cat")),
+        asyncio.create_task(collect_messages("maxes", name_prefix="MAX")),
+    ]
+
+    await asyncio.sleep(0)
+    created_pets = cast_to_items(
+        await database.create_items(
+            [
+                {"name": "Maxine", "category": "cat"},
+                {"name": "Rex", "category": "cat"},
+                {"name": "Max", "category": "dog"},
+                {"name": "Ma", "category": "dog"},
+            ]
+        )
+    )
+    deleted_pets = cast_to_items(
+        await database.delete_items([pet["id"] for pet in created_pets])
+    )
+    await fan_out()
+
+    for collecting in collecting_messages:
+        collecting.cancel()
+
+    assert messages == {
+        "cats": [
+            event(database, "create", created_pets[0], 1),
+            event(database, "create", created_pets[1], 2),
+            event(database, "delete", deleted_pets[0], 5),
+            event(database, "delete", deleted_pets[1], 6),
+        ],
+        "maxes": [
+            event(database, "create", created_pets[0], 1),
+            event(database, "create", created_pets[2], 3),
+            event(database, "delete", deleted_pets[0], 5),
+            event(database, "delete", deleted_pets[2], 7),
+        ],
+    }
+
+
+@pytest.mark.asyncio
+async def test_routes_long_names_only_on_subscribed_prefix_lengths(
+    database: Database,
+) -> None:
+    messages: List[Dict[str, Any]] = []
+    name = "Max" + "x" * 100_000
+
+    async def collect_messages() -> None:
+        async for message in database.subscribe_to_list(name_prefix="MAXX"):
+            messages.append(message)
+
+    assert database._event_keys({"id": "1"}, {"name": name}) == ["item/1"]
+    collecting = asyncio.create_task(collect_messages())
+    await asyncio.sleep(0)
+    created_pet = cast_to_item(await database.create_item({"name": name}))
+    await fan_out()
+    keys = database._event_keys(created_pet, created_pet)
+    collecting.cancel()
+    await asyncio.sleep(0)
+
+    assert keys == [
+        f"item/{created_pet['id']}",
+        "list/Pet",
+        "list/Pet?name_prefix=maxx",
+    ]
+    assert messages == [event(database, "create", created_pet, 1)]
+    assert database.prefix_lengths == {"name": {}}
+    assert database.list_subscribers == 0
+
+
+@pytest.mark.asyncio
+async def test_subscribing_to_pets_list_with_unusable_filters_returns_bad_request_error(
+    database: Database,
+) -> None:
+    unusable_filters: List[Dict[str, Any]] = [
+        {"name": "Max"},
+        {"category_prefix": "c"},
+        {"name_prefix": ""},
+        {"category": "cat", "name_prefix": "M"},
+    ]
+    for filters in unusable_filters:
+        with pytest.raises(Exception, match="Bad request"):
+            async for message in database.subscribe_to_list(**filters):
+                pass
+
+
+@pytest.mark.asyncio
+async def test_unsubscribes_from_all_pets_by_id(database: Database) -> None:
+    created_pets = cast_to_items(
+        await database.create_items([{"name": "Max 1"}, {"name": "Max 2"}])
+    )
+
+    async def collect_messages(item_ids: List[str]) -> None:
+        async for message in database.subscribe_to_items_by_id(item_ids):
+            pass
+
+    collecting_messages = asyncio.create_task(
+        collect_messages([pet["id"] for pet in created_pets])
+    )
+    await asyncio.sleep(0)
+    collecting_messages.cancel()
+    await asyncio.sleep(0)
+
+    assert database.subscribers == {}
+
+
+@pytest.mark.asyncio
+async def test_bounds_events_queued_for_slow_subscribers() -> None:
+    database = Database(types.Pet, queue_size=2)
+    created_pet = cast_to_item(await database.create_item({"name": "Max"}))
+
+    slow_subscription = database.subscribe_to_item_by_id(created_pet["id"])
+    dropping_subscription = database.subscribe_to_list(overflow="disconnect")
+    waiting_for_update = asyncio.ensure_future(anext(slow_subscription))
+    waiting_for_create = asyncio.ensure_future(anext(dropping_subscription))
+    await asyncio.sleep(0)
+
+    await database.create_items([{"name": f"Max {i}"} for i in range(3)])
+    for i in range(5):
+        await database.update_item({**created_pet, "name": f"Max {i}"})
+
+    assert database.subscription_stats() == {
+        "subscribers": 2,
+        "queued_events": 2,
+        "max_queue_depth": 2,
+        "dropped_events": 6,
+        "disconnected_subscribers": 1,
+    }
+    waiting_for_update.cancel()
+    waiting_for_create.cancel()
+
+
+@pytest.mark.asyncio
+async def test_rolls_back_batch_when_a_write_fails() -> None:
+    class FailingTable(DictTable):
+        def __setitem__(self, id: str, item: Mapping[str, Any]) -> None:
+            if item.get("name") == "Boom":
+                raise RuntimeError("Boom")
+            super().__setitem__(id, item)
+
+    database = Database(types.Pet, table=FailingTable, indexes=["category"])
+    [pet_1, pet_2] = cast_to_items(
+        await database.create_items(
+            [{"name": "Max 1", "category": "cat"}, {"name": "Max 2", "category": "cat"}]
+        )
+    )
+
+    with pytest.raises(RuntimeError):
+        await database.update_items(
+            [
+                {**pet_1, "category": "dog"},
+                {**pet_2, "name": "Boom", "category": "dog"},
+            ]
+        )
+    with pytest.raises(RuntimeError):
+        await database.create_items([{"name": "Max 3"}, {"name": "Boom"}])
+
+    assert await database.get_items([pet_1["id"], pet_2["id"]]) == [pet_1, pet_2]
+    assert await database.count_items() == 2
+    assert await database.count_items(category="cat") == 2
+    assert await database.count_items(category="dog") == 0
+
+
+@pytest.mark.asyncio
+async def test_rolls_back_batch_when_indexing_fails() -> None:
+    class FailingIndex(PrefixIndex):
+        def add(self, key: str, value: str) -> None:
+            if value == "Boom":
+                raise RuntimeError("Boom")
+            super().add(key, value)
+
+    database = Database(types.Pet, indexes=["category"], search=["name"])
+    database.prefix_indexes["name"] = FailingIndex()
+    [pet_1, pet_2] = cast_to_items(
+        await database.create_items(
+            [{"name": "Max 1", "category": "cat"}, {"name": "Max 2", "category": "cat"}]
+        )
+    )
+
+    with pytest.raises(RuntimeError):
+        await database.update_items(
+            [
+                {**pet_1, "category": "dog"},
+                {**pet_2, "name": "Boom", "category": "dog"},
+            ]
+        )
+
+    assert await database.get_items([pet_1["id"], pet_2["id"]]) == [pet_1, pet_2]
+    assert await database.count_items(category="cat") == 2
+    assert await database.count_items(category="dog") == 0
+    assert await database.search_items("name", prefix="Max") == [pet_1, pet_2]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "table", [SqliteTable, partial(WalTable, fsync="always")], ids=["sqlite", "wal"]
+)
+async def test_cancelled_mutation_is_indexed_and_announced_once_written(
+    table: Callable[..., Table], tmp_path: Path
+) -> None:
+    database = Database(
+        types.Pet, table=partial(table, path=str(tmp_path / "petstore"))
+    )
+    messages: List[Dict[str, Any]] = []
+
+    async def collect_messages() -> None:
+        async for message in database.subscribe_to_list():
+            messages.append(message)
+
+    collecting = asyncio.create_task(collect_messages())
+    await asyncio.sleep(0)
+    creating = asyncio.create_task(database.create_item({"name": "Max"}))
+    await asyncio.sleep(0)
+    creating.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await creating
+    await fan_out()
+    collecting.cancel()
+
+    [(id, pet)] = list(database._table().items())
+    assert await database.count_items() == 1
+    assert await database.get_item(id) == {**pet, "id": id}
+    assert [message["data"]["id"] for message in messages] == [id]
+    await database.close()
+
+
+@pytest.mark.asyncio
+async def test_batch_mutations_stay_atomic_under_concurrency() -> None:
+    class YieldingDatabase(Database):
+        commits = 0
+
+        async def _commit(self, changes: List[Change], *args: Any) -> None:
+            await asyncio.sleep(0)
+            await super()._commit(changes, *args)
+            self.commits += 1
+
+    database = YieldingDatabase(types.Pet, indexes=["category"], search=["name"])
+    pets = cast_to_items(
+        await database.create_items(
+            [{"name": f"Max {i}", "category": "cat"} for i in range(50)]
+        )
+    )
+    ids = [pet["id"] for pet in pets]
+    rng = random.Random(0)
+    outcomes: List[Tuple[str, List[str], Any]] = []
+
+    async def mutate(worker: int) -> None:
+        for step in range(20):
+            batch = rng.sample(ids, 5)
+            tag = f"{worker}-{step}"
+            action = rng.choice(["update", "patch", "delete"])
+            if action == "update":
+                result: Any = await database.update_items(
+                    [{"id": id, "name": tag, "category": tag} for id in batch]
+                )
+            elif action == "patch":
+                result = await database.patch_items(
+                    [{"id": id, "name": tag, "category": None} for id in batch]
+                )
+            else:
+                result = await database.delete_items(batch)
+            outcomes.append((action, batch, result))
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*[mutate(worker) for worker in range(20)])
+
+    table = database.store[types.Pet.__name__]
+    for action, batch, result in outcomes:
+        if isinstance(result, errors.NotFoundError):
+            continue
+        assert len(result) == len(batch)
+        if action != "delete":
+            assert len({pet["name"] for pet in result}) == 1
+    assert list(database.order[types.Pet.__name__]) == list(table)
+    assert sum(len(index) for index in database.indexes["category"].values()) == len(
+        table
+    )
+    assert all(
+        database.indexes["category"][pet["category"]].seq(id)
+        for id, pet in table.items()
+    )
+    assert len(database.prefix_indexes["name"]) == len(table)
+    assert database.commits > 1
@@ -0,0 +1,54 @@
+import pytest
+import strawberry
+from petstore.app import PetsDatabase, create_context
+from petstore.documents import DocumentCache, query_hash
+from petstore.schema.query import Query
+
+
+@strawberry.type
+class Hello:
+    @strawberry.field
+    def hello(self) -> str:
+        return "world"
+
+
+def test_document_cache_evicts_least_recently_used_documents() -> None:
+    cache = DocumentCache(maxsize=2)
+    for key in "abc":
+        if key == "c":
+            cache.get("a")
+        cache.put(key, (None, []))  # type: ignore
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats() == {"size": 2, "hits": 2, "misses": 1}
+
+
+@pytest.mark.asyncio
+async def test_schema_parses_and_validates_each_query_once() -> None:
+    cache = DocumentCache()
+    schema = strawberry.Schema(query=Hello, extensions=[cache])
+
+    for _ in range(3):
+        result = await schema.execute("{ hello }")
+        assert result.data == {"hello": "world"}
+
+    assert cache.stats() == {"size": 1, "hits": 2, "misses": 1}
+    assert cache.get(query_hash("{ hello }")) is not None
+
+
+@pytest.mark.asyncio
+async def test_cached_schema_still_reports_invalid_queries() -> None:
+    cache = DocumentCache()
+    schema = strawberry.Schema(query=Query, extensions=[cache])
+    context = create_context(PetsDatabase.create())
+
+    for _ in range(2):
+        invalid = await schema.execute(
+            "{ getPet { __typename } }", context_value=context
+        )
+        unparsable = await schema.execute("{ getPet(", context_value=context)
+        assert invalid.errors and "'id'" in invalid.errors[0].message
+        assert unparsable.errors and "Syntax Error" in unparsable.errors[0].message
+
+    assert cache.stats()["size"] == 1
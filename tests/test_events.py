@@ -0,0 +1,246 @@
+import aiohttp
+import asyncio
+import json
+import pytest
+import pytest_asyncio
+import websockets
+from pathlib import Path
+from typing import Any, AsyncGenerator, Callable, Dict, cast
+from functools import partial
+from petstore import errors, types
+from petstore.app import create_app
+from petstore.database import Database
+from petstore.events import EventHub, SocketBus
+from petstore.tables import SqliteTable
+
+WORKER = """
+import sys
+from aiohttp import web
+from petstore.app import create_app
+
+web.run_app(create_app(), host="127.0.0.1", port=int(sys.argv[1]), print=None)
+"""
+
+
+@pytest_asyncio.fixture
+async def hub(tmp_path: Path) -> AsyncGenerator[str, None]:
+    path = str(tmp_path / "hub.sock")
+    event_hub = EventHub(path)
+    await event_hub.start()
+    yield path
+    await event_hub.close()
+
+
+@pytest.fixture
+def workers(spawn_server: Callable, hub: str, tmp_path: Path) -> Callable:
+    env = {
+        "PETSTORE_EVENT_HUB": hub,
+        "PETSTORE_BACKEND": "sqlite",
+        "PETSTORE_DATABASE": str(tmp_path / "pets.db"),
+    }
+    return partial(spawn_server, ["-c", WORKER], env)
+
+
+@pytest.mark.asyncio
+async def test_socket_bus_delivers_events_between_databases(hub: str) -> None:
+    buses = [SocketBus(hub), SocketBus(hub)]
+    for bus in buses:
+        await bus.start()
+    database_a, database_b = [Database(types.Pet, bus=bus) for bus in buses]
+
+    subscription = database_b.subscribe_to_list()
+    receiving = asyncio.ensure_future(anext(subscription))
+    await asyncio.sleep(0.01)
+    created_pet = await database_a.create_item({"name": "Max"})
+
+    assert await asyncio.wait_for(receiving, 5) == {
+        "type": "create",
+        "data": created_pet,
+        "seq": 1,
+        "cursor": database_b._encode_event_cursor(1),
+    }
+    for bus in buses:
+        await bus.close()
+
+
+@pytest.mark.asyncio
+async def test_databases_sharing_a_table_keep_their_indexes_in_sync(
+    hub: str, tmp_path: Path
+) -> None:
+    buses = [SocketBus(hub), SocketBus(hub)]
+    for bus in buses:
+        await bus.start()
+    database_a, database_b = [
+        Database(
+            types.Pet,
+            table=partial(SqliteTable, path=str(tmp_path / "pets.db")),
+            indexes=["category"],
+            search=["name"],
+            bus=bus,
+        )
+        for bus in buses
+    ]
+    listing = database_b.subscribe_to_list()
+    receiving = asyncio.ensure_future(anext(listing))
+    await asyncio.sleep(0.01)
+
+    created_pet = cast(
+        Dict[str, Any],
+        await database_a.create_item({"name": "Max", "category": "cat"}),
+    )
+    await asyncio.wait_for(receiving, 5)
+    subscription = database_b.subscribe_to_item_by_id(created_pet["id"])
+    receiving = asyncio.ensure_future(anext(subscription))
+    await asyncio.sleep(0.01)
+    patched_pet = await database_a.patch_item(
+        {"id": created_pet["id"], "name": "Rex", "category": "dog"}
+    )
+
+    assert (await asyncio.wait_for(receiving, 5))["data"] == patched_pet
+    assert await database_b.get_item(created_pet["id"]) == patched_pet
+    assert await database_b.count_items(category="cat") == 0
+    assert await database_b.count_items(category="dog") == 1
+    assert await database_b.search_items("name", prefix="R") == [patched_pet]
+
+    receiving = asyncio.ensure_future(anext(subscription))
+    await database_a.delete_item(created_pet["id"])
+    await asyncio.wait_for(receiving, 5)
+
+    assert isinstance(
+        await database_b.get_item(created_pet["id"]), errors.NotFoundError
+    )
+    assert await database_b.count_items() == 0
+    await listing.aclose()
+    for database, bus in zip([database_a, database_b], buses):
+        await bus.close()
+        await database.close()
+
+
+def test_event_hub_needs_workers_sharing_a_sqlite_table(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("PETSTORE_EVENT_HUB", "hub.sock")
+    with pytest.raises(ValueError, match="sqlite"):
+        create_app()
+    monkeypatch.setenv("PETSTORE_BACKEND", "sqlite")
+    monkeypatch.setenv("PETSTORE_STORE", "store.sock")
+    with pytest.raises(ValueError, match="PETSTORE_STORE"):
+        create_app()
+
+
+@pytest.mark.asyncio
+async def test_subscriptions_receive_mutations_from_other_workers(
+    workers: Callable,
+) -> None:
+    worker_a, worker_b = await asyncio.gather(workers(), workers())
+
+    async with websockets.connect(  # type: ignore
+        worker_b.replace("http", "ws"), subprotocols=["graphql-transport-ws"]
+    ) as websocket:
+        await websocket.send(json.dumps({"type": "connection_init", "payload": {}}))
+        await websocket.recv()
+        await websocket.send(
+            json.dumps(
+                {
+                    "id": "1",
+                    "type": "subscribe",
+                    "payload": {
+                        "query": """
+                        subscription {
+                            subscribeToPetsList {
+                                ... on PetCreateMessage { id name category }
+                            }
+                        }
+                        """
+                    },
+                }
+            )
+        )
+        await asyncio.sleep(0.2)
+
+        async with aiohttp.ClientSession() as session:
+            async with session.post(
+                worker_a,
+                json={
+                    "query": """
+                    mutation {
+                        createPet(input: {name: "Max", category: "cat"}) {
+                            ... on Pet { id name category }
+                        }
+                    }
+                    """
+                },
+            ) as response:
+                created_pet = (await response.json())["data"]["createPet"]
+
+        message = json.loads(await asyncio.wait_for(websocket.recv(), 5))
+
+    assert cast(Dict[str, Any], message)["payload"]["data"] == {
+        "subscribeToPetsList": created_pet
+    }
+
+
+@pytest.mark.asyncio
+async def test_pet_subscriptions_receive_patches_from_other_workers(
+    workers: Callable,
+) -> None:
+    worker_a, worker_b = await asyncio.gather(workers(), workers())
+
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            worker_a,
+            json={
+                "query": """
+                mutation {
+                    createPet(input: {name: "Max", category: "cat"}) {
+                        ... on Pet { id }
+                    }
+                }
+                """
+            },
+        ) as response:
+            pet_id = (await response.json())["data"]["createPet"]["id"]
+        await asyncio.sleep(0.2)
+
+        async with websockets.connect(  # type: ignore
+            worker_b.replace("http", "ws"), subprotocols=["graphql-transport-ws"]
+        ) as websocket:
+            await websocket.send(json.dumps({"type": "connection_init", "payload": {}}))
+            await websocket.recv()
+            await websocket.send(
+                json.dumps(
+                    {
+                        "id": "1",
+                        "type": "subscribe",
+                        "payload": {
+                            "query": """
+                            subscription ($id: ID!) {
+                                subscribeToPetById(id: $id) {
+                                    ... on PetUpdateMessage { id name category }
+                                }
+                            }
+                            """,
+                            "variables": {"id": pet_id},
+                        },
+                    }
+                )
+            )
+            await asyncio.sleep(0.2)
+            async with session.post(
+                worker_a,
+                json={
+                    "query": """
+                    mutation ($input: PatchPetInput!) {
+                        patchPet(input: $input) { ... on Pet { id name category } }
+                    }
+                    """,
+                    "variables": {"input": {"id": pet_id, "name": "Rex"}},
+                },
+            ) as response:
+                patched_pet = (await response.json())["data"]["patchPet"]
+
+            message = json.loads(await asyncio.wait_for(websocket.recv(), 5))
+
+    assert cast(Dict[str, Any], message)["payload"]["data"] == {
+        "subscribeToPetById": patched_pet
+    }
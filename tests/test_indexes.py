@@ -0,0 +1,107 @@
+import random
+from petstore.indexes import OrderedIndex, PrefixIndex, TrigramIndex
+
+
+def test_ordered_index_slices_match_insertion_order() -> None:
+    index = OrderedIndex()
+    reference = [str(number) for number in range(500)]
+    for key in reference:
+        index.add(key)
+
+    for key in random.Random(0).sample(reference, 400):
+        index.remove(key)
+        reference.remove(key)
+
+    assert len(index) == len(reference)
+    assert list(index) == reference
+    for start in range(0, len(reference) + 10, 7):
+        stop = start + 20
+        assert index.slice(start, stop) == reference[start:stop]
+
+
+def test_ordered_index_ignores_unknown_and_duplicate_keys() -> None:
+    index = OrderedIndex()
+    index.add("a")
+    index.add("a")
+    index.remove("b")
+
+    assert list(index) == ["a"]
+    assert index.slice(-5, 5) == ["a"]
+
+
+def test_ordered_index_extends_like_repeated_adds() -> None:
+    index = OrderedIndex()
+    reference = OrderedIndex()
+    for key in ["a", "b", "c"]:
+        index.add(key)
+        reference.add(key)
+    index.remove("b")
+    reference.remove("b")
+
+    index.extend(["d", "a", "e", "d", *map(str, range(100))])
+    for key in ["d", "a", "e", "d", *map(str, range(100))]:
+        reference.add(key)
+
+    assert list(index) == list(reference)
+    assert index.after(reference.seq("e"), 3) == reference.after(reference.seq("e"), 3)
+    for start in range(0, 110, 9):
+        assert index.slice(start, start + 5) == reference.slice(start, start + 5)
+
+
+def test_ordered_index_seeks_after_seq_across_compaction() -> None:
+    index = OrderedIndex()
+    for number in range(200):
+        index.add(str(number))
+    cursor = index.seq("150")
+
+    for number in range(0, 190):
+        if number != 150:
+            index.remove(str(number))
+
+    assert [key for _, key in index.after(cursor, 3)] == ["190", "191", "192"]
+    assert [key for _, key in index.after(0, 2)] == ["150", "190"]
+
+
+def test_prefix_index_searches_case_insensitively_in_value_order() -> None:
+    index = PrefixIndex(load=2)
+    names = {
+        "1": "Maximus",
+        "2": "max",
+        "3": "Rex",
+        "4": "Maxine",
+        "5": "Bella",
+        "6": "Maple",
+        "7": "Mat",
+    }
+    for key, name in names.items():
+        index.add(key, name)
+    index.add("3", "Mars")
+    index.remove("5")
+
+    assert index.search("MA", 10) == ["6", "3", "7", "2", "1", "4"]
+    assert index.search("maxi", 1) == ["1"]
+    assert index.search("z", 10) == []
+    assert len(index) == 6
+
+
+def test_trigram_index_searches_substrings() -> None:
+    index = TrigramIndex()
+    index.add("1", "Sir Fluffington")
+    index.add("2", "Fluffy")
+    index.add("3", "Rex")
+    index.add("3", "Ruffles")
+    index.remove("2")
+
+    assert index.search("UFF", 10) == ["1", "3"]
+    assert index.search("fluff", 10) == ["1"]
+    assert index.search("ex", 10) == []
+
+
+def test_trigram_index_stops_at_the_limit_in_indexing_order() -> None:
+    index = TrigramIndex()
+    for key in range(1000):
+        index.add(str(key), f"Max {key}")
+    index.add("0", "Maxine")
+
+    assert index.search("max", 3) == ["1", "2", "3"]
+    assert index.search("max 99", 3) == ["99", "990", "991"]
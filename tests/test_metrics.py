@@ -0,0 +1,129 @@
+import aiohttp
+import asyncio
+import os
+import pytest
+from aiohttp.test_utils import TestServer
+from typing import Any, AsyncGenerator, Callable
+from petstore import errors, metrics, types
+from petstore.database import Database
+from petstore.documents import LruCache
+
+
+@pytest.mark.asyncio
+async def test_measures_resolver_latency_and_errors() -> None:
+    @metrics.measured
+    async def resolve_for_metrics(found: Any) -> Any:
+        if found is None:
+            raise ValueError()
+        return types.PetsCount(count=1) if found else types.NotFoundError()
+
+    await resolve_for_metrics(True)
+    await resolve_for_metrics(False)
+    with pytest.raises(ValueError):
+        await resolve_for_metrics(None)
+
+    histogram = metrics.resolver_durations["resolve_for_metrics"]
+    assert sum(histogram.counts) == 3
+    assert histogram.sum > 0
+    assert metrics.resolver_errors["resolve_for_metrics", "NotFoundError"] == 1
+    assert metrics.resolver_errors["resolve_for_metrics", "ValueError"] == 1
+
+
+@pytest.mark.asyncio
+async def test_counts_subscription_messages_and_errors() -> None:
+    closed = []
+
+    @metrics.measured
+    async def subscribe_for_metrics(fail: bool) -> AsyncGenerator[int, None]:
+        try:
+            yield 1
+            yield 2
+            if fail:
+                raise errors.GoneError()
+        finally:
+            closed.append(fail)
+
+    assert [message async for message in subscribe_for_metrics(False)] == [1, 2]
+    with pytest.raises(errors.GoneError):
+        async for _ in subscribe_for_metrics(True):
+            pass
+    unfinished = subscribe_for_metrics(False)
+    await anext(unfinished)
+    await unfinished.aclose()
+
+    assert metrics.subscription_messages["subscribe_for_metrics"] == 5
+    assert metrics.resolver_errors["subscribe_for_metrics", "GoneError"] == 1
+    assert closed == [False, True, False]
+
+
+@pytest.mark.asyncio
+async def test_renders_store_and_subscriber_metrics(database: Database) -> None:
+    subscription = database.subscribe_to_list(category='cat "1"')
+    receiving = asyncio.ensure_future(anext(subscription))
+    await asyncio.sleep(0)
+    pets = await database.create_items(
+        [{"name": name, "category": 'cat "1"'} for name in ("Max", "Rex")]
+    )
+    watching = [
+        database.subscribe_to_item_by_id(pet["id"]) for pet in pets  # type: ignore
+    ]
+    watched = [asyncio.ensure_future(anext(watch)) for watch in watching]
+    await asyncio.sleep(0)
+    cache: LruCache[str] = LruCache()
+    cache.get("missing")
+
+    text = await metrics.render(database, {"documents": cache})
+    await receiving
+    await subscription.aclose()
+    for waiting, watch in zip(watched, watching):
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        await watch.aclose()
+
+    lines = text.splitlines()
+    worker = f'worker="{os.getpid()}"'
+    key = 'key="list/Pet?category=cat \\"1\\""'
+    assert f'petstore_store_items{{{worker},collection="Pet"}} 2' in lines
+    assert (
+        f'petstore_events_total{{{worker},collection="Pet",type="create"}} 2' in lines
+    )
+    assert f"petstore_subscribers{{{worker},{key}}} 1" in lines
+    assert f"petstore_subscriber_queued_events{{{worker},{key}}} 2" in lines
+    assert f'petstore_subscribers{{{worker},key="item/*"}} 2' in lines
+    assert f'petstore_subscriber_queued_events{{{worker},key="item/*"}} 0' in lines
+    assert f'petstore_cache_misses_total{{{worker},cache="documents"}} 1' in lines
+    assert "# TYPE petstore_resolver_duration_seconds histogram" in lines
+
+
+@pytest.mark.asyncio
+async def test_serves_metrics(client: Callable, server: TestServer) -> None:
+    await client(
+        """
+        query GetPet($id: ID!) { getPet(id: $id) { ... on NotFoundError { status } } }
+        """,
+        {"id": "non_existent_pet_id"},
+    )
+
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"http://localhost:{server.port}/metrics") as response:
+            content_type = response.headers["Content-Type"]
+            lines = (await response.text()).splitlines()
+
+    worker = f'worker="{os.getpid()}"'
+    assert content_type.startswith("text/plain; version=0.0.4")
+    assert any(
+        line.startswith(
+            f"petstore_resolver_duration_seconds_bucket{{{worker},"
+            'resolver="get_pet",le="+Inf"}'
+        )
+        for line in lines
+    )
+    assert any(
+        line.startswith(
+            f"petstore_resolver_errors_total{{{worker},"
+            'resolver="get_pet",error="NotFoundError"}'
+        )
+        for line in lines
+    )
+    assert f'petstore_store_items{{{worker},collection="Pet"}} 0' in lines
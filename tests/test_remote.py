@@ -0,0 +1,209 @@
+import aiohttp
+import asyncio
+import pytest
+import pytest_asyncio
+import re
+from pathlib import Path
+from typing import Any, AsyncGenerator, Callable, Dict, List, cast
+from petstore import errors, types
+from petstore.database import Database
+from petstore.remote import RemoteDatabase, StoreServer
+
+
+def cast_to_item(a: Any) -> Dict[str, Any]:
+    return cast(Dict[str, Any], a)
+
+
+@pytest_asyncio.fixture
+async def store(tmp_path: Path) -> AsyncGenerator[str, None]:
+    path = str(tmp_path / "store.sock")
+    server = StoreServer(
+        Database(types.Pet, indexes=["category"], search=["name"]), path
+    )
+    await server.start()
+    yield path
+    await server.close()
+
+
+def remote_database(store: str) -> RemoteDatabase:
+    return RemoteDatabase(types.Pet, store, indexes=["category"], search=["name"])
+
+
+@pytest.mark.asyncio
+async def test_remote_database_reads_and_writes_the_store(store: str) -> None:
+    database = remote_database(store)
+
+    created_pet = cast_to_item(
+        await database.create_item({"name": "Max", "category": "cat"})
+    )
+    patched_pet = await database.patch_item({"id": created_pet["id"], "age": 3})
+    fetched_pet = await database.get_item(created_pet["id"])
+
+    assert patched_pet == fetched_pet == {**created_pet, "age": 3}
+    assert await remote_database(store).count_items(category="cat") == 1
+    page = cast_to_item(await database.list_items(category="cat"))
+    assert page["items"] == [fetched_pet]
+    assert await database.search_items("name", prefix="ma") == [fetched_pet]
+    assert await database.delete_item(created_pet["id"]) == {"id": created_pet["id"]}
+    await database.close()
+
+
+@pytest.mark.asyncio
+async def test_remote_database_exports_the_store_in_chunks(store: str) -> None:
+    database = remote_database(store)
+    created_pets = cast(
+        List[Dict[str, Any]],
+        await database.create_items([{"name": f"Max {i}"} for i in range(3)]),
+    )
+
+    chunks = [pets async for pets in database.export_items(chunk_size=2)]
+    unfinished = database.export_items(chunk_size=2)
+    await anext(unfinished)
+    await unfinished.aclose()
+
+    assert chunks == [created_pets[:2], created_pets[2:]]
+    assert await database.count_items() == 3
+    await database.close()
+
+
+@pytest.mark.asyncio
+async def test_remote_database_returns_store_errors(store: str) -> None:
+    database = remote_database(store)
+
+    assert isinstance(await database.get_item("missing"), errors.NotFoundError)
+    assert isinstance(
+        await database.create_item({"id": "1", "name": "Max"}), errors.BadRequestError
+    )
+    with pytest.raises(errors.NotFoundError):
+        await anext(database.subscribe_to_item_by_id("missing"))
+    await database.close()
+
+
+@pytest.mark.asyncio
+async def test_remote_subscriptions_receive_changes_from_other_clients(
+    store: str,
+) -> None:
+    database_a, database_b = remote_database(store), remote_database(store)
+
+    subscription = database_b.subscribe_to_list(category="cat")
+    receiving = asyncio.ensure_future(anext(subscription))
+    await asyncio.sleep(0.01)
+    await database_a.create_item({"name": "Rex", "category": "dog"})
+    created_pet = await database_a.create_item({"name": "Max", "category": "cat"})
+
+    assert await asyncio.wait_for(receiving, 5) == {
+        "type": "create",
+        "data": created_pet,
+        "seq": 2,
+        "cursor": database_b._encode_event_cursor(2),
+    }
+    await subscription.aclose()
+    for database in (database_a, database_b):
+        await database.close()
+
+
+@pytest.mark.asyncio
+async def test_store_server_cuts_off_workers_that_stop_reading(
+    tmp_path: Path,
+) -> None:
+    path = str(tmp_path / "store.sock")
+    server = StoreServer(Database(types.Pet), path, max_buffer=1 << 16)
+    await server.start()
+    stalled_reader, stalled_writer = await asyncio.open_unix_connection(path)
+    database = remote_database(path)
+
+    for i in range(50):
+        await database.create_item({"name": f"Max {i} " + "x" * (1 << 16)})
+
+    assert await asyncio.wait_for(stalled_reader.read(), 5)
+    assert stalled_reader.at_eof()
+    assert await database.count_items() == 50
+    stalled_writer.close()
+    await database.close()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_remote_subscriptions_resume_from_cursors_of_other_clients(
+    store: str, tmp_path: Path
+) -> None:
+    database_a, database_b = remote_database(store), remote_database(store)
+    other_store = StoreServer(Database(types.Pet), str(tmp_path / "other.sock"))
+    await other_store.start()
+    other_database = remote_database(other_store.path)
+    await database_b.count_items()
+
+    subscription = database_a.subscribe_to_list()
+    receiving = asyncio.ensure_future(anext(subscription))
+    await asyncio.sleep(0.01)
+    await database_a.create_items([{"name": f"Max {i}"} for i in range(3)])
+    first_message = await asyncio.wait_for(receiving, 5)
+    later_messages = [await asyncio.wait_for(anext(subscription), 5) for _ in range(2)]
+    await other_database.create_items([{"name": f"Rex {i}"} for i in range(3)])
+
+    resumed = database_b.subscribe_to_list(since=first_message["cursor"])
+    assert [
+        await asyncio.wait_for(anext(resumed), 5) for _ in range(2)
+    ] == later_messages
+    with pytest.raises(errors.GoneError):
+        await anext(other_database.subscribe_to_list(since=first_message["cursor"]))
+    for generator in (subscription, resumed):
+        await generator.aclose()
+    for database in (database_a, database_b, other_database):
+        await database.close()
+    await other_store.close()
+
+
+@pytest.mark.asyncio
+async def test_launcher_serves_one_store_from_several_workers(
+    spawn_server: Callable, tmp_path: Path
+) -> None:
+    url = await spawn_server(
+        [
+            "-m",
+            "petstore.launcher",
+            "--workers",
+            "2",
+            "--socket",
+            str(tmp_path / "store.sock"),
+            "--response-cache-ttl",
+            "60",
+            "--port",
+        ]
+    )
+    query = "{ listPets(input: {}) { ... on PetPage { items { name } } } }"
+
+    async def list_pets_from_fresh_connections() -> List[Any]:
+        # Fresh connections may land on either worker.
+        pets = []
+        for _ in range(8):
+            async with aiohttp.ClientSession() as fresh_session:
+                async with fresh_session.post(url, json={"query": query}) as response:
+                    pets.append((await response.json())["data"])
+        return pets
+
+    async with aiohttp.ClientSession() as session:
+        assert (
+            await list_pets_from_fresh_connections()
+            == [{"listPets": {"items": []}}] * 8
+        )
+        mutation = (
+            'mutation { createPet(input: {name: "Max", category: "cat"}) {'
+            " __typename } }"
+        )
+        async with session.post(url, json={"query": mutation}):
+            pass
+        await asyncio.sleep(0.1)
+        # Cached by whichever worker answered before, and invalidated by
+        # the write made through the other one.
+        assert (
+            await list_pets_from_fresh_connections()
+            == [{"listPets": {"items": [{"name": "Max"}]}}] * 8
+        )
+        async with session.get(url.replace("graphql", "metrics")) as response:
+            metrics = await response.text()
+        assert re.search(
+            r'^petstore_cache_hits_total\{worker="\d+",cache="responses"\}',
+            metrics,
+            re.MULTILINE,
+        )
@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from typing import Any, Dict, List
+from petstore import errors
+from petstore.subscribers import Channel, Entry, Subscriber
+
+
+def events(*ids: str) -> List[Dict[str, Any]]:
+    return [{"type": "update", "data": {"id": id}} for id in ids]
+
+
+def entries(*ids: str) -> List[Entry]:
+    return list(enumerate(events(*ids)))
+
+
+@pytest.mark.asyncio
+async def test_channel_delivers_each_event_once_to_every_subscriber() -> None:
+    channel = Channel()
+    subscribers = [Subscriber([channel]) for _ in range(3)]
+
+    channel.publish(entries("1", "2"))
+
+    for subscriber in subscribers:
+        assert await subscriber.get() == events("1", "2")
+    assert len(channel.read(0)) == 2
+
+
+@pytest.mark.asyncio
+async def test_subscriber_merges_channels_in_publish_order() -> None:
+    channel_1, channel_2 = Channel(), Channel()
+    subscriber = Subscriber([channel_1, channel_2])
+
+    channel_2.publish([(1, {"data": {"id": "1"}})])
+    channel_1.publish([(2, {"data": {"id": "2"}})])
+    channel_2.publish([(3, {"data": {"id": "3"}})])
+
+    assert await subscriber.get() == [{"data": {"id": id}} for id in "123"]
+
+
+@pytest.mark.asyncio
+async def test_subscriber_skips_events_overwritten_in_the_ring() -> None:
+    channel = Channel(capacity=3)
+    subscriber = Subscriber([channel])
+
+    channel.publish(entries("1", "2", "3", "4", "5"))
+
+    assert subscriber.backlog() == (3, 2)
+    assert await subscriber.get() == events("3", "4", "5")
+    assert subscriber.dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_subscriber_coalesces_events_by_item_id_when_behind() -> None:
+    channel = Channel(capacity=4)
+    subscriber = Subscriber([channel], overflow="coalesce")
+
+    channel.publish(entries("1", "2", "1", "3", "1"))
+
+    assert await subscriber.get() == events("2", "3", "1")
+    assert subscriber.dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_subscriber_disconnects_when_behind() -> None:
+    channel = Channel(capacity=1)
+    subscriber = Subscriber([channel], overflow="disconnect")
+
+    channel.publish(entries("1", "2"))
+
+    assert subscriber.backlog() == (0, 2)
+    with pytest.raises(errors.SlowConsumerError):
+        await subscriber.get()
+    assert subscriber.disconnected
+    assert subscriber.dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_subscriber_waits_for_events_published_later() -> None:
+    channel = Channel()
+    subscriber = Subscriber([channel])
+
+    getting = asyncio.create_task(subscriber.get())
+    await asyncio.sleep(0)
+    channel.publish(entries("1"))
+
+    assert await getting == events("1")
+    assert channel.waiters == set()
+
+
+def test_subscriber_rejects_unknown_overflow_policy() -> None:
+    with pytest.raises(ValueError):
+        Subscriber([Channel()], overflow="block")  # type: ignore
@@ -0,0 +1,358 @@
+import asyncio
+import errno
+import gc
+import marshal
+import os
+import pytest
+import threading
+import time
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, cast
+from petstore import errors, types
+from petstore.app import PetsDatabase
+from petstore.database import Database
+from petstore.tables import CompactTable, DictTable, FrozenTable, SqliteTable, Table
+from petstore.wal import WalTable
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "table", [DictTable, FrozenTable, CompactTable, SqliteTable, WalTable]
+)
+async def test_tables_store_pets(table: Callable[..., Table], tmp_path: Path) -> None:
+    if table in (SqliteTable, WalTable):
+        table = partial(table, path=str(tmp_path / "petstore"))
+    database = Database(types.Pet, table=table)
+    created_pet = cast(
+        Dict[str, Any], await database.create_item({"name": "Max", "category": "cat"})
+    )
+    await database.patch_item({"id": created_pet["id"], "name": "Max 2"})
+
+    fetched_pet = await database.get_item(created_pet["id"])
+    pets_page = cast(Dict[str, Any], await database.list_items())
+    deleted_pet = await database.delete_item(created_pet["id"])
+
+    assert fetched_pet == {"id": created_pet["id"], "name": "Max 2", "category": "cat"}
+    assert pets_page["items"] == [fetched_pet]
+    assert deleted_pet == {"id": created_pet["id"]}
+    assert isinstance(await database.get_item(created_pet["id"]), errors.NotFoundError)
+
+
+def test_compact_table_packs_ids_and_interns_categories() -> None:
+    table = CompactTable(types.Pet)
+    category = sys.intern("cat")
+    table["9f1c4a52-7d0e-4c1a-8b52-3f7c2a1d9e10"] = {
+        "name": "Max",
+        "category": "".join(["c", "a", "t"]),
+    }
+
+    [packed_id] = table.rows
+    assert len(packed_id) == 16
+    assert table.rows[packed_id].category is category
+    assert list(table) == ["9f1c4a52-7d0e-4c1a-8b52-3f7c2a1d9e10"]
+    assert "non_existent_pet_id" not in table
+
+
+@pytest.mark.asyncio
+async def test_sqlite_table_reloads_pets_and_indexes(tmp_path: Path) -> None:
+    path = str(tmp_path / "petstore.db")
+    database = PetsDatabase.create(backend="sqlite", path=path).pets
+    created_pets = cast(
+        List[Dict[str, Any]],
+        await database.create_items(
+            [
+                {"name": "Max", "category": "cat"},
+                {"name": "Maxine", "category": "dog"},
+                {"name": "Rex", "category": "cat"},
+            ]
+        ),
+    )
+    await database.delete_item(created_pets[1]["id"])
+    await database.close()
+
+    database = PetsDatabase.create(backend="sqlite", path=path).pets
+    cats_page = cast(Dict[str, Any], await database.list_items(category="cat"))
+    found_pets = cast(List[Dict[str, Any]], await database.search_items("name", "max"))
+    await database.close()
+
+    assert cats_page["items"] == [created_pets[0], created_pets[2]]
+    assert found_pets == [created_pets[0]]
+
+
+@pytest.mark.asyncio
+async def test_sqlite_table_rolls_back_failed_batches(tmp_path: Path) -> None:
+    table = SqliteTable(types.Pet, path=str(tmp_path / "petstore.db"))
+    table.write_many([("1", {"name": "Max"})])
+
+    with pytest.raises(Exception):
+        table.write_many([("1", None), ("2", {"name": object()})])
+
+    assert table.get_many(["1", "2"]) == [{"id": "1", "name": "Max"}, None]
+    table.close()
+
+
+@pytest.mark.asyncio
+async def test_wal_table_replays_snapshot_and_log(tmp_path: Path) -> None:
+    path = str(tmp_path / "petstore")
+    database = Database(types.Pet, table=partial(WalTable, path=path))
+    created_pets = cast(
+        List[Dict[str, Any]],
+        await database.create_items(
+            [{"name": "Max", "category": "cat"}, {"name": "Rex", "category": "dog"}]
+        ),
+    )
+    cast(WalTable, database._table()).snapshot()
+    await database.patch_item({"id": created_pets[0]["id"], "name": "Max 2"})
+    await database.delete_item(created_pets[1]["id"])
+    await database.close()
+
+    database = Database(types.Pet, table=partial(WalTable, path=path))
+    pets_page = cast(Dict[str, Any], await database.list_items())
+    await database.close()
+
+    assert pets_page["items"] == [{**created_pets[0], "name": "Max 2"}]
+    assert sorted(os.listdir(path)) == ["log-00000001", "snapshot"]
+
+
+@pytest.mark.asyncio
+async def test_wal_table_snapshots_full_segments(tmp_path: Path) -> None:
+    path = str(tmp_path / "petstore")
+    database = Database(
+        types.Pet, table=partial(WalTable, path=path, segment_bytes=256)
+    )
+    for i in range(20):
+        await database.create_item({"name": f"Max {i}"})
+    await database.close()
+
+    database = Database(types.Pet, table=partial(WalTable, path=path))
+    pets_page = cast(Dict[str, Any], await database.list_items(size=100))
+    await database.close()
+
+    assert [pet["name"] for pet in pets_page["items"]] == [
+        f"Max {i}" for i in range(20)
+    ]
+    assert len(os.listdir(path)) < 20
+
+
+def test_wal_table_drops_torn_frames(tmp_path: Path) -> None:
+    path = str(tmp_path / "petstore")
+    table = WalTable(types.Pet, path=path)
+    table.write_many([("1", {"name": "Max"})])
+    table.write_many([("2", {"name": "Rex"})])
+    table.close()
+    with open(os.path.join(path, "log-00000000"), "r+b") as log:
+        log.truncate(os.path.getsize(log.name) - 1)
+
+    table = WalTable(types.Pet, path=path)
+    table.write_many([("3", {"name": "Bella"})])
+    table.close()
+    table = WalTable(types.Pet, path=path)
+
+    assert list(table.items()) == [("1", {"name": "Max"}), ("3", {"name": "Bella"})]
+    table.close()
+
+
+def test_wal_table_cuts_off_frames_of_failed_writes(tmp_path: Path) -> None:
+    path = str(tmp_path / "petstore")
+    table = WalTable(types.Pet, path=path)
+    table.write_many([("1", {"name": "Max"})])
+    log = table._log
+
+    class FullLog:
+        def __getattr__(self, name: str) -> Any:
+            return getattr(log, name)
+
+        def write(self, data: bytes) -> int:
+            log.write(bytes(data[:5]))
+            raise OSError(errno.ENOSPC, "No space left on device")
+
+    table._log = cast(BinaryIO, FullLog())
+    with pytest.raises(OSError):
+        table.write_many([("2", {"name": "Rex"})])
+    table._log = log
+    table.write_many([("3", {"name": "Bella"})])
+    table.close()
+    table = WalTable(types.Pet, path=path)
+
+    assert list(table.items()) == [("1", {"name": "Max"}), ("3", {"name": "Bella"})]
+    table.close()
+
+
+@pytest.mark.asyncio
+async def test_wal_table_refuses_writes_after_a_failed_fsync(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = str(tmp_path / "petstore")
+    table = WalTable(types.Pet, path=path, fsync="always")
+    await table.run(table.write_many, [("1", {"name": "Max"})])
+    await table.sync()
+
+    def failing_fsync(fd: int) -> None:
+        raise OSError(errno.EIO, "Input/output error")
+
+    monkeypatch.setattr(os, "fsync", failing_fsync)
+    for id in ("2", "3"):
+        with pytest.raises(OSError):
+            await table.run(table.write_many, [(id, {"name": "Rex"})])
+            await table.sync()
+    monkeypatch.undo()
+    table.close()
+    table = WalTable(types.Pet, path=path)
+
+    assert list(table.items()) == [("1", {"name": "Max"})]
+    table.close()
+
+
+@pytest.mark.asyncio
+async def test_wal_table_keeps_writes_whose_fsync_wait_is_cancelled(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = str(tmp_path / "petstore")
+    table = WalTable(types.Pet, path=path, fsync="always")
+    fsync = os.fsync
+
+    def slow_fsync(fd: int) -> None:
+        time.sleep(0.05)
+        fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", slow_fsync)
+    await table.run(table.write_many, [("1", {"name": "Max"})])
+    syncing = asyncio.create_task(table.sync())
+    await asyncio.sleep(0.01)
+    syncing.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await syncing
+    await table.sync()
+    table.close()
+
+    assert table.get_many(["1"]) == [{"name": "Max"}]
+    table = WalTable(types.Pet, path=path)
+    assert list(table.items()) == [("1", {"name": "Max"})]
+    table.close()
+
+
+@pytest.mark.asyncio
+async def test_wal_table_shares_fsyncs_between_concurrent_writes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    fsyncs = 0
+    fsync = os.fsync
+
+    def slow_fsync(fd: int) -> None:
+        nonlocal fsyncs
+        fsyncs += 1
+        time.sleep(0.01)
+        fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", slow_fsync)
+    path = str(tmp_path / "petstore")
+    database = Database(types.Pet, table=partial(WalTable, path=path, fsync="always"))
+    await asyncio.gather(
+        *(database.create_item({"name": f"Pet {i}"}) for i in range(20))
+    )
+    await database.close()
+
+    assert fsyncs < 20
+    database = Database(types.Pet, table=partial(WalTable, path=path))
+    assert await database.count_items() == 20
+    await database.close()
+
+
+def test_wal_table_syncs_on_an_interval_after_writes_stop(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    synced = threading.Event()
+    fsync = os.fsync
+
+    def recording_fsync(fd: int) -> None:
+        fsync(fd)
+        synced.set()
+
+    monkeypatch.setattr(os, "fsync", recording_fsync)
+    table = WalTable(types.Pet, path=str(tmp_path / "petstore"), fsync_interval=0.01)
+    table.write_many([("1", {"name": "Max"})])
+
+    assert synced.wait(5)
+    table.close()
+
+
+def test_wal_table_skips_damaged_frames_before_good_ones(tmp_path: Path) -> None:
+    path = str(tmp_path / "petstore")
+    table = WalTable(types.Pet, path=path)
+    table.write_many([("1", {"name": "Max"})])
+    damaged_at = table._segment_size + 12
+    table.write_many([("2", {"name": "Rex"})])
+    table.write_many([("3", {"name": "Bella"})])
+    table.close()
+    with open(os.path.join(path, "log-00000000"), "r+b") as log:
+        log.seek(damaged_at)
+        log.write(b"\xff")
+
+    table = WalTable(types.Pet, path=path)
+
+    assert list(table.items()) == [("1", {"name": "Max"}), ("3", {"name": "Bella"})]
+    table.close()
+
+
+def test_wal_table_never_replays_frames_inside_a_torn_payload(
+    tmp_path: Path,
+) -> None:
+    path = str(tmp_path / "petstore")
+    table = WalTable(types.Pet, path=path)
+    table.write_many([("1", {"name": "Max"})])
+    # Names are stored as UTF-8, so only an all-ASCII frame survives intact.
+    attempt = 0
+    forged = b"\x80"
+    while not forged.isascii():
+        attempt += 1
+        forged = WalTable._frame(marshal.dumps([("2", {"name": f"Evil {attempt}"})], 2))
+    table.write_many([("3", {"name": forged.decode() + "x" * 100})])
+    table.close()
+    with open(os.path.join(path, "log-00000000"), "r+b") as log:
+        log.truncate(os.path.getsize(log.name) - 50)
+
+    table = WalTable(types.Pet, path=path)
+
+    assert list(table.items()) == [("1", {"name": "Max"})]
+    table.close()
+
+
+def test_wal_table_cuts_off_a_damaged_header(tmp_path: Path) -> None:
+    path = str(tmp_path / "petstore")
+    table = WalTable(types.Pet, path=path)
+    table.write_many([("1", {"name": "Max"})])
+    damaged_at = table._segment_size
+    table.write_many([("2", {"name": "Rex"})])
+    table.close()
+    with open(os.path.join(path, "log-00000000"), "r+b") as log:
+        log.seek(damaged_at)
+        log.write(b"\xff")
+
+    table = WalTable(types.Pet, path=path)
+
+    assert list(table.items()) == [("1", {"name": "Max"})]
+    assert os.path.getsize(os.path.join(path, "log-00000000")) == damaged_at
+    table.close()
+
+
+def test_loading_wal_table_leaves_the_garbage_collector_as_it_was(
+    tmp_path: Path,
+) -> None:
+    path = str(tmp_path / "petstore")
+    table = WalTable(types.Pet, path=path)
+    table.write_many([("1", {"name": "Max"})])
+    table.close()
+    frozen = gc.get_freeze_count()
+
+    gc.disable()
+    try:
+        WalTable(types.Pet, path=path).close()
+        assert not gc.isenabled()
+    finally:
+        gc.enable()
+    WalTable(types.Pet, path=path).close()
+
+    assert gc.isenabled()
+    assert gc.get_freeze_count() == frozen